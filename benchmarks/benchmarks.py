@@ -0,0 +1,133 @@
+# This file contains the benchmarks for the hot paths of an optimisation,
+# written as asv-style suites so they can be run by asv or by the lightweight
+# runner in benchmarks/run.py.
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.Cache import Cache
+from pyReSolver.init_opt_funcs import init_opt_funcs
+from pyReSolver.traj2vec import init_comp_vec, traj2vec
+import pyReSolver.residual_functions as res_funcs
+
+systems = {'lorenz': (pyReSolver.systems.lorenz, np.array([[0, 0, 23.64]]), {'rho': 28.0, 'beta': 8/3, 'sigma': 10.0}),
+            'van_der_pol': (pyReSolver.systems.van_der_pol, np.zeros([1, 2]), {'mu': 2.0})}
+modes = [16, 64, 256]
+flags = ['FFTW_ESTIMATE', 'FFTW_MEASURE']
+period = 3.0
+
+def init_problem(system, no_modes, flag, seed = 0):
+    """
+        Return the objects defining a reproducible optimisation problem.
+
+        Parameters
+        ----------
+        system : {'lorenz', 'van_der_pol'}
+        no_modes : positive int
+        flag : str
+            FFTW flag used to setup the transform plans.
+        seed : int, default=0
+
+        Returns
+        -------
+        traj : Trajectory
+        sys : System
+        mean : ndarray
+        plans : FFTPlans
+    """
+    module, mean, parameters = systems[system]
+    rng = np.random.default_rng(seed)
+    traj = pyReSolver.Trajectory(rng.standard_normal([no_modes, mean.shape[1]]) + 1j*rng.standard_normal([no_modes, mean.shape[1]]))
+    traj[0] = 0
+    plans = pyReSolver.FFTPlans([(no_modes - 1) << 1, mean.shape[1]], flag = flag)
+    return traj, pyReSolver.System(module, parameters), mean, plans
+
+class FFTPlansSuite:
+
+    params = (modes, flags)
+    param_names = ['modes', 'flag']
+
+    def setup(self, no_modes, flag):
+        self.traj, _, _, self.plans = init_problem('lorenz', no_modes, flag)
+        self.curve = np.zeros_like(self.plans.tmp_t)
+
+    def time_fft(self, no_modes, flag):
+        self.plans.fft(self.traj, self.curve)
+
+    def time_ifft(self, no_modes, flag):
+        self.plans.ifft(self.traj, self.curve)
+
+class ResidualSuite:
+
+    params = (list(systems), modes, flags)
+    param_names = ['system', 'modes', 'flag']
+
+    def setup(self, system, no_modes, flag):
+        traj, self.sys, self.mean, self.plans = init_problem(system, no_modes, flag)
+        self.freq = (2*np.pi)/period
+        self.cache = Cache(traj, self.mean, self.sys, self.plans)
+        self.H_n_inv = pyReSolver.resolvent_inv(no_modes, self.freq, self.sys.jacobian(self.mean))
+        res_funcs.local_residual(self.cache, self.sys, self.H_n_inv, self.plans)
+
+    def time_local_residual(self, system, no_modes, flag):
+        res_funcs.local_residual(self.cache, self.sys, self.H_n_inv, self.plans)
+
+    def time_global_residual(self, system, no_modes, flag):
+        res_funcs.global_residual(self.cache)
+
+    def time_gr_traj_grad(self, system, no_modes, flag):
+        res_funcs.gr_traj_grad(self.cache, self.sys, self.freq, self.mean, self.plans)
+
+class OptFuncsSuite:
+
+    params = (list(systems), modes, ['block', 'interleaved'])
+    param_names = ['system', 'modes', 'layout']
+
+    def setup(self, system, no_modes, layout):
+        traj, sys, mean, plans = init_problem(system, no_modes, 'FFTW_MEASURE')
+        cache = Cache(traj, mean, sys, plans)
+        self.res_func, self.jac_func = init_opt_funcs(cache, (2*np.pi)/period, plans, sys, mean, layout = layout)
+        self.vec = init_comp_vec(traj)
+        traj2vec(traj, self.vec)
+
+    def time_res_func(self, system, no_modes, layout):
+        self.res_func(self.vec)
+
+    def time_res_jac_func(self, system, no_modes, layout):
+        self.res_func(self.vec)
+        self.jac_func(np.copy(self.vec))
+
+class ResolventSuite:
+
+    params = modes
+    param_names = ['modes']
+
+    def setup(self, no_modes):
+        module, self.mean, parameters = systems['lorenz']
+        self.jac_at_mean = pyReSolver.System(module, parameters).jacobian(self.mean)
+        self.B = np.array([[0, 0], [-1, 0], [0, 1]])
+        self.freq = (2*np.pi)/period
+        self.H = pyReSolver.resolvent(self.freq, range(no_modes), self.jac_at_mean, self.B)
+
+    def time_resolvent(self, no_modes):
+        pyReSolver.resolvent(self.freq, range(no_modes), self.jac_at_mean, self.B)
+
+    def time_resolvent_inv(self, no_modes):
+        pyReSolver.resolvent_inv(no_modes, self.freq, self.jac_at_mean)
+
+    def time_resolvent_modes(self, no_modes):
+        pyReSolver.resolvent_modes(self.H)
+
+class MinimiseSuite:
+
+    params = (list(systems), [16, 64], flags)
+    param_names = ['system', 'modes', 'flag']
+    timeout = 300
+
+    def setup(self, system, no_modes, flag):
+        self.traj, self.sys, self.mean, self.plans = init_problem(system, no_modes, flag)
+        self.freq = (2*np.pi)/period
+
+    def time_minimiseResidual(self, system, no_modes, flag):
+        pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, plans = self.plans, options = {'maxiter': 50, 'ftol': 0, 'gtol': 0})
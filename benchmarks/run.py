@@ -0,0 +1,156 @@
+# This file contains a lightweight runner for the asv-style benchmark suites,
+# storing the timings as JSON and comparing them against a stored baseline to
+# detect performance regressions.
+#
+# Usage:
+#     python -m benchmarks.run [--quick] [--filter REGEX] [--output FILE]
+#                              [--compare BASELINE] [--threshold RATIO]
+#
+# Timings only compare on the same machine and library versions, so no
+# baseline is kept in the repository. Record one before a change and compare
+# against it after:
+#     python -m benchmarks.run --quick --output baseline.json
+#     python -m benchmarks.run --quick --compare baseline.json
+
+import argparse
+import datetime
+import inspect
+import itertools
+import json
+import platform
+import re
+import sys
+import timeit
+
+import numpy as np
+
+from . import benchmarks
+
+def suites():
+    """Return the benchmark suite classes in definition order."""
+    return [cls for _, cls in sorted(inspect.getmembers(benchmarks, inspect.isclass), key = lambda item: inspect.getsourcelines(item[1])[1]) if cls.__module__ == benchmarks.__name__ and cls.__name__.endswith('Suite')]
+
+def param_grid(cls):
+    """Return every combination of the parameters of a suite as dictionaries."""
+    params = getattr(cls, 'params', [])
+    names = getattr(cls, 'param_names', [])
+    if len(names) == 1:
+        params = [params]
+    return [dict(zip(names, combination)) for combination in itertools.product(*params)]
+
+def benchmark_name(cls, method, params):
+    """Return the unique name of a benchmark for a given set of parameters."""
+    return "{}.{}({})".format(cls.__name__, method, ", ".join("{}={}".format(key, value) for key, value in params.items()))
+
+def time_benchmark(func, repeat = 5, min_time = 0.05):
+    """
+        Return the timings of a benchmark function.
+
+        The number of calls per measurement is chosen such that a single
+        measurement takes at least min_time seconds.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 10 if number < 1000 else 2
+    times = np.array(timer.repeat(repeat = repeat, number = number))/number
+    return {"min": times.min().item(), "median": np.median(times).item(), "number": number, "repeat": repeat}
+
+def run(pattern = None, quick = False):
+    """
+        Run the benchmarks matching a regular expression and return the
+        results keyed by benchmark name.
+    """
+    results = {}
+    for cls in suites():
+        methods = [name for name in dir(cls) if name.startswith('time_')]
+        for params in param_grid(cls):
+            if quick and params.get('modes', 0) > 64:
+                continue
+            for method in methods:
+                name = benchmark_name(cls, method, params)
+                if pattern is not None and re.search(pattern, name) is None:
+                    continue
+                instance = cls()
+                instance.setup(*params.values())
+                bound = getattr(instance, method)
+                timing = time_benchmark(lambda: bound(*params.values()), repeat = 3 if quick else 5, min_time = 0.01 if quick else 0.05)
+                timing["params"] = params
+                results[name] = timing
+                print("{:<90} {:>12.3e} s".format(name, timing["min"]), flush = True)
+    return results
+
+def machine_info():
+    """Return a description of the machine and library versions."""
+    import scipy
+    import pyfftw
+    return {"platform": platform.platform(), "processor": platform.processor(), "python": platform.python_version(),
+            "numpy": np.__version__, "scipy": scipy.__version__, "pyfftw": pyfftw.__version__}
+
+def scaling(results):
+    """
+        Return the log-log slope of every benchmark with respect to the number
+        of modes, with all other parameters fixed.
+    """
+    curves = {}
+    for name, timing in results.items():
+        params = dict(timing["params"])
+        if 'modes' not in params:
+            continue
+        no_modes = params.pop('modes')
+        key = "{}({})".format(name.split('(')[0], ", ".join("{}={}".format(k, v) for k, v in params.items()))
+        curves.setdefault(key, []).append((no_modes, timing["min"]))
+    slopes = {}
+    for key, points in curves.items():
+        if len(points) > 1:
+            points = np.array(sorted(points))
+            slopes[key] = np.polyfit(np.log(points[:, 0]), np.log(points[:, 1]), 1)[0].item()
+    return slopes
+
+def compare(results, baseline, threshold = 1.5):
+    """
+        Return the benchmarks that are slower than the baseline by more than a
+        given ratio, as a dictionary of name to ratio.
+    """
+    regressions = {}
+    for name, timing in results.items():
+        if name in baseline["results"]:
+            ratio = timing["min"]/baseline["results"][name]["min"]
+            marker = " <-- regression" if ratio > threshold else ""
+            print("{:<90} {:>8.2f}x{}".format(name, ratio, marker))
+            if ratio > threshold:
+                regressions[name] = ratio
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run the pyReSolver benchmarks.")
+    parser.add_argument('--filter', default = None, help = "regular expression selecting benchmarks by name")
+    parser.add_argument('--quick', action = 'store_true', help = "skip the largest mode counts and use fewer repeats")
+    parser.add_argument('--output', default = None, help = "file to write the JSON results to")
+    parser.add_argument('--compare', default = None, help = "baseline JSON file to compare the results against")
+    parser.add_argument('--threshold', type = float, default = 1.5, help = "slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.quick)
+    output = {"date": datetime.datetime.now().isoformat(timespec = 'seconds'), "machine": machine_info(), "results": results, "scaling": scaling(results)}
+
+    print("\nScaling with the number of modes (log-log slope):")
+    for key, slope in output["scaling"].items():
+        print("{:<90} {:>8.2f}".format(key, slope))
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent = 1)
+
+    if args.compare is not None:
+        print("\nComparison against {}:".format(args.compare))
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if len(regressions) != 0:
+            print("\n{} benchmark(s) regressed by more than {}x".format(len(regressions), args.threshold))
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,14 +6,20 @@
 import numpy as np
 
 from .Trajectory import Trajectory
+from .precision import complex_dtype
 from .trajectory_functions import transpose, conj
 
 class Cache:
 
     __slots__ = ['traj', 'traj_grad', 'lr', 'lr_grad', 'f', 'tmp_conv',
-                'red_traj', 'tmp_t1', 'tmp_t2', 'tmp_inner', 'resp_mean']
+                'red_traj', 'red_traj_grad', 'psi', 'psi_adj', 'tmp_t1',
+                'tmp_t2', 'tmp_inner', 'resp_mean']
 
-    def __init__(self, traj, mean, sys, fftplans, psi = None):
+    def __init__(self, traj, mean, sys, fftplans, psi = None, precision = None):
+        if precision is None:
+            precision = fftplans.precision
+        if traj.dtype != complex_dtype(precision):
+            traj = Trajectory(traj.astype(complex_dtype(precision)))
         self.traj = traj
         self.tmp_inner = Trajectory(np.einsum('ij,ij->i', traj, traj))
         self.traj_grad = np.zeros_like(self.traj)
@@ -24,8 +30,14 @@ class Cache:
         self.tmp_t1 = np.copy(fftplans.tmp_t)
         self.tmp_t2 = np.copy(fftplans.tmp_t)
         if psi is not None:
-            self.red_traj = Trajectory(np.zeros_like(np.einsum('ikl,il->ik', transpose(conj(psi)), self.traj)))
+            self.red_traj = Trajectory(np.zeros([self.traj.shape[0], psi.shape[2]], dtype = self.traj.dtype))
+            self.red_traj_grad = np.zeros_like(self.red_traj)
+            self.psi = Trajectory(np.ascontiguousarray(psi, dtype = self.traj.dtype))
+            self.psi_adj = Trajectory(np.ascontiguousarray(transpose(conj(self.psi))))
         else:
             self.red_traj = None
+            self.red_traj_grad = None
+            self.psi = None
+            self.psi_adj = None
         self.resp_mean = np.zeros_like(mean)
         sys.response(mean, self.resp_mean)
@@ -0,0 +1,266 @@
+# This file contains the class definition for a store of the tasks and results
+# of an optimisation campaign in a SQLite database, which many worker processes
+# can pull work from concurrently and which survives crashes and restarts.
+
+import os
+import json
+import time
+import sqlite3
+
+import numpy as np
+
+from .Trajectory import Trajectory
+
+_schema = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER NOT NULL,
+    period REAL NOT NULL,
+    parameters TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed REAL,
+    residual REAL,
+    iterations INTEGER,
+    time REAL,
+    trajectory TEXT,
+    error TEXT,
+    UNIQUE (seed, period, parameters)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+"""
+
+class CampaignStore:
+    """
+        A campaign of (seed, period, parameters) tasks stored in a database
+        file.
+
+        Every task is pending, running, done or failed. A task is claimed by
+        a single worker with an atomic transaction, and marked done with its
+        final residual, number of iterations, run time and the path of the
+        file holding its optimised trajectory. Adding the tasks of a campaign
+        again skips the ones already known, so a restarted campaign only runs
+        the work left over. Only the worker holding a running task can
+        complete or fail it, so a worker whose task was requeued and claimed
+        again cannot overwrite the result of the new one.
+
+        Attributes
+        ----------
+        path : str
+            Path of the database file.
+        directory : str
+            Directory holding the optimised trajectories.
+        timeout : float
+            Time to wait for the database to be unlocked by another process.
+        conn : Connection
+    """
+
+    __slots__ = ['path', 'directory', 'timeout', 'conn']
+
+    def __init__(self, path, directory = None, timeout = 30.0):
+        """
+            Initialisation of CampaignStore instance.
+
+            Parameters
+            ----------
+            path : str
+                Path of the database file, created if it does not exist.
+            directory : str, default=None
+                Directory for the optimised trajectories, next to the database
+                file if not given.
+            timeout : float, default=30.0
+        """
+        self.path = path
+        self.directory = os.path.splitext(path)[0] + '_trajectories' if directory is None else directory
+        self.timeout = timeout
+        os.makedirs(self.directory, exist_ok = True)
+        self._connect()
+
+    def _connect(self):
+        # transactions are opened explicitly where they are needed
+        self.conn = sqlite3.connect(self.path, timeout = self.timeout, isolation_level = None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_schema)
+
+    def __getstate__(self):
+        return (self.path, self.directory, self.timeout)
+
+    def __setstate__(self, state):
+        self.path, self.directory, self.timeout = state
+        self._connect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection to the database."""
+        self.conn.close()
+
+    def add_tasks(self, tasks):
+        """
+            Add tasks to the campaign, skipping the ones already known.
+
+            Parameters
+            ----------
+            tasks : iterable of tuple
+                The (seed, period, parameters) of every task, with the
+                parameters given as a dict (or None) of JSON-compatible values.
+
+            Returns
+            -------
+            int
+                Number of tasks added.
+        """
+        rows = [(int(seed), float(period), json.dumps(parameters or {}, sort_keys = True)) for seed, period, parameters in tasks]
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.executemany('INSERT OR IGNORE INTO tasks (seed, period, parameters) VALUES (?, ?, ?)', rows)
+        return self.conn.total_changes - before
+
+    def claim(self, worker = None):
+        """
+            Claim the next pending task, no two workers can claim the same one.
+
+            Parameters
+            ----------
+            worker : str, default=None
+                Name of the worker recorded with the task.
+
+            Returns
+            -------
+            dict
+                The id, seed, period and parameters of the task, None if no
+                task is pending.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute("SELECT id, seed, period, parameters FROM tasks WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE tasks SET status = 'running', worker = ?, claimed = ? WHERE id = ?", (worker, time.time(), row[0]))
+        return {'id': row[0], 'seed': row[1], 'period': row[2], 'parameters': json.loads(row[3])}
+
+    def complete(self, task_id, traj, freq, mean, residual, iterations, run_time, worker = None):
+        """
+            Store the result of a task and mark it as done.
+
+            The trajectory file is written completely before the task is
+            marked as done, so a crash never leaves a done task without its
+            trajectory, and it only replaces the file of the task once the
+            task is known to still be held by the worker.
+
+            Parameters
+            ----------
+            task_id : int
+            traj : Trajectory
+            freq : float
+            mean : ndarray
+            residual : float
+            iterations : int
+            run_time : float
+            worker : str, default=None
+                Name of the worker that claimed the task.
+
+            Returns
+            -------
+            bool
+                Whether or not the task was still running on the worker and
+                is now done.
+        """
+        path = os.path.join(self.directory, 'task_{}.npz'.format(task_id))
+        tmp_path = path[:-4] + '.{}.tmp.npz'.format(os.getpid())
+        np.savez(tmp_path, traj = np.asarray(traj), freq = freq, mean = np.asarray(mean))
+        try:
+            with self.conn:
+                self.conn.execute('BEGIN IMMEDIATE')
+                cursor = self.conn.execute("UPDATE tasks SET status = 'done', residual = ?, iterations = ?, time = ?, trajectory = ?, error = NULL WHERE id = ? AND status = 'running' AND worker IS ?",
+                                           (float(residual), int(iterations), float(run_time), path, task_id, worker))
+                if cursor.rowcount == 1:
+                    os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, error, worker = None):
+        """
+            Mark a task as failed with the error raised.
+
+            Returns
+            -------
+            bool
+                Whether or not the task was still running on the worker and
+                is now failed.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            cursor = self.conn.execute("UPDATE tasks SET status = 'failed', error = ? WHERE id = ? AND status = 'running' AND worker IS ?", (str(error), task_id, worker))
+        return cursor.rowcount == 1
+
+    def requeue(self, older_than = 0.0, failed = False):
+        """
+            Return running tasks (left over by crashed workers) to the pending
+            tasks.
+
+            Parameters
+            ----------
+            older_than : float, default=0.0
+                Only requeue the tasks claimed at least this many seconds ago.
+            failed : bool, default=False
+                Whether or not to requeue the failed tasks too.
+
+            Returns
+            -------
+            int
+                Number of tasks requeued.
+        """
+        statuses = ('running', 'failed') if failed else ('running',)
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            cursor = self.conn.execute("UPDATE tasks SET status = 'pending', worker = NULL, claimed = NULL WHERE status IN ({}) AND (claimed IS NULL OR claimed <= ?)".format(', '.join('?'*len(statuses))),
+                                       (*statuses, time.time() - older_than))
+        return cursor.rowcount
+
+    def counts(self):
+        """Return the number of tasks with every status."""
+        counts = dict.fromkeys(['pending', 'running', 'done', 'failed'], 0)
+        counts.update(self.conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+        return counts
+
+    def results(self):
+        """
+            Return the completed tasks.
+
+            Returns
+            -------
+            list of dict
+                The id, seed, period, parameters, residual, iterations, time
+                and trajectory path of every completed task, by increasing
+                residual.
+        """
+        rows = self.conn.execute("SELECT id, seed, period, parameters, residual, iterations, time, trajectory FROM tasks WHERE status = 'done' ORDER BY residual").fetchall()
+        keys = ['id', 'seed', 'period', 'parameters', 'residual', 'iterations', 'time', 'trajectory']
+        results = [dict(zip(keys, row)) for row in rows]
+        for result in results:
+            result['parameters'] = json.loads(result['parameters'])
+        return results
+
+    def load(self, task_id):
+        """
+            Return the optimised trajectory of a completed task.
+
+            Returns
+            -------
+            traj : Trajectory
+            freq : float
+            mean : ndarray
+        """
+        row = self.conn.execute("SELECT trajectory FROM tasks WHERE id = ? AND status = 'done'", (task_id,)).fetchone()
+        if row is None:
+            raise KeyError("Task {} is not done!".format(task_id))
+        with np.load(row[0]) as data:
+            return Trajectory(data['traj']), float(data['freq']), data['mean']
@@ -5,13 +5,16 @@
 import pyfftw
 import numpy as np
 
+from .precision import real_dtype, complex_dtype
+
 class FFTPlans:
 
-    __slots__ = ['tmp_t', 'tmp_f', 'fftplan', 'ifftplan']
+    __slots__ = ['tmp_t', 'tmp_f', 'fftplan', 'ifftplan', 'precision']
 
-    def __init__(self, shape, flag = 'FFTW_EXHAUSTIVE'):
-        self.tmp_t = pyfftw.empty_aligned(shape, dtype = 'float64')
-        self.tmp_f = pyfftw.empty_aligned([(shape[0] >> 1) + 1, shape[1]], dtype = 'complex128')
+    def __init__(self, shape, flag = 'FFTW_EXHAUSTIVE', precision = 'double'):
+        self.precision = precision
+        self.tmp_t = pyfftw.empty_aligned(shape, dtype = real_dtype(precision))
+        self.tmp_f = pyfftw.empty_aligned([(shape[0] >> 1) + 1, shape[1]], dtype = complex_dtype(precision))
         self.fftplan = pyfftw.FFTW(self.tmp_t, self.tmp_f, axes = (0,), direction = 'FFTW_FORWARD', flags = (flag,))
         self.ifftplan = pyfftw.FFTW(self.tmp_f, self.tmp_t, axes = (0,), direction = 'FFTW_BACKWARD', flags = (flag,))
 
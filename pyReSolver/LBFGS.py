@@ -0,0 +1,267 @@
+# This file contains the class definition for a limited-memory BFGS optimiser
+# working directly on complex trajectory buffers, with its curvature history
+# held in a fixed-size ring buffer that can be saved and resumed.
+
+import numpy as np
+
+def inner(a, b):
+    """Return the real inner product of two complex arrays."""
+    return np.real(np.vdot(a, b))
+
+class LBFGS:
+    """
+        Limited-memory BFGS optimiser of a real function of a complex array.
+
+        The real and imaginary parts of every element are independent
+        variables, so inner products are the real part of the complex ones.
+        All the arrays are allocated once, the history of steps and gradient
+        changes is a ring buffer of the most recent pairs, which is kept
+        between runs so that a restarted optimisation (after a continuation
+        step or a checkpoint) starts with the curvature already learnt.
+
+        Attributes
+        ----------
+        memory : positive int
+            Number of pairs kept in the history.
+        s, y : ndarray
+            Steps and gradient changes of the history, of shape
+            [memory, *shape].
+        rho : ndarray
+            Inverse of the inner product of every pair.
+        head : int
+            Index of the next pair to be overwritten.
+        count : int
+            Number of pairs held in the history.
+        iteration : int
+            Number of iterations run in total.
+        x, g, d, x_old, g_old, tmp : ndarray
+            Work buffers for the current point, gradient and direction.
+    """
+
+    __slots__ = ['memory', 's', 'y', 'rho', 'head', 'count', 'iteration', 'x', 'g', 'd', 'x_old', 'g_old', 'tmp', 'alpha']
+
+    def __init__(self, shape, memory = 10, dtype = complex):
+        """
+            Initialisation of LBFGS instance.
+
+            Parameters
+            ----------
+            shape : tuple of int
+                Shape of the optimised array.
+            memory : positive int, default=10
+            dtype : data-type, default=complex
+        """
+        self.memory = memory
+        self.s = np.zeros([memory, *shape], dtype = dtype)
+        self.y = np.zeros_like(self.s)
+        self.rho = np.zeros(memory)
+        self.alpha = np.zeros(memory)
+        self.head = 0
+        self.count = 0
+        self.iteration = 0
+        self._allocate_work()
+
+    def _allocate_work(self):
+        self.x = np.zeros_like(self.s[0])
+        self.g = np.zeros_like(self.x)
+        self.d = np.zeros_like(self.x)
+        self.x_old = np.zeros_like(self.x)
+        self.g_old = np.zeros_like(self.x)
+        self.tmp = np.zeros_like(self.x)
+
+    def __getstate__(self):
+        return (self.memory, self.s, self.y, self.rho, self.head, self.count, self.iteration)
+
+    def __setstate__(self, state):
+        self.memory, self.s, self.y, self.rho, self.head, self.count, self.iteration = state
+        self.alpha = np.zeros(self.memory)
+        self._allocate_work()
+
+    def reset(self):
+        """Forget the history."""
+        self.head = 0
+        self.count = 0
+
+    def ensure(self, shape, dtype):
+        """
+            Make the optimiser compatible with an array, the history is
+            forgotten if the shape changes and converted if the data type
+            changes.
+        """
+        if self.s.shape[1:] != tuple(shape):
+            self.__init__(shape, self.memory, dtype)
+        elif self.s.dtype != dtype:
+            self.__setstate__((self.memory, self.s.astype(dtype), self.y.astype(dtype), self.rho, self.head, self.count, self.iteration))
+
+    def save(self, file):
+        """Save the history to a .npz file."""
+        np.savez(file, s = self.s, y = self.y, rho = self.rho, head = self.head, count = self.count, iteration = self.iteration)
+
+    @classmethod
+    def load(cls, file):
+        """Return the optimiser saved to a .npz file."""
+        with np.load(file) as data:
+            lbfgs = cls.__new__(cls)
+            lbfgs.__setstate__((data['s'].shape[0], data['s'], data['y'], data['rho'], int(data['head']), int(data['count']), int(data['iteration'])))
+        return lbfgs
+
+    def direction(self, grad, out):
+        """
+            Return the search direction at a gradient with the two-loop
+            recursion over the history, the steepest descent direction if the
+            history is empty.
+        """
+        np.copyto(out, grad)
+        order = [(self.head - 1 - k) % self.memory for k in range(self.count)]
+        for i in order:
+            self.alpha[i] = self.rho[i]*inner(self.s[i], out)
+            np.multiply(self.y[i], self.alpha[i], out = self.tmp)
+            np.subtract(out, self.tmp, out = out)
+        if self.count != 0:
+            newest = order[0]
+            out *= inner(self.s[newest], self.y[newest])/inner(self.y[newest], self.y[newest])
+        for i in reversed(order):
+            beta = self.rho[i]*inner(self.y[i], out)
+            np.multiply(self.s[i], self.alpha[i] - beta, out = self.tmp)
+            np.add(out, self.tmp, out = out)
+        np.negative(out, out = out)
+        return out
+
+    def update(self, step, grad_change):
+        """
+            Add a pair to the history, overwriting the oldest one, return
+            whether or not it was added (the curvature must be positive).
+        """
+        curvature = inner(step, grad_change)
+        if curvature <= 1e-10*inner(grad_change, grad_change):
+            return False
+        np.copyto(self.s[self.head], step)
+        np.copyto(self.y[self.head], grad_change)
+        self.rho[self.head] = 1/curvature
+        self.head = (self.head + 1) % self.memory
+        self.count = min(self.count + 1, self.memory)
+        return True
+
+    def minimise(self, func, grad, x0, free = None, callback = None, maxiter = 15000, gtol = 1e-5, ftol = 2.2e-9, maxls = 20):
+        """
+            Minimise a function from a starting point.
+
+            The gradient is assumed to be half the derivative with respect to
+            the real and imaginary parts (as for the global residual), the
+            steps are taken with a backtracking line search satisfying the
+            sufficient decrease condition.
+
+            Parameters
+            ----------
+            func : function
+                Function of the point returning a float.
+            grad : function
+                Function of the point returning its gradient, called after
+                func at the same point.
+            x0 : ndarray
+                Starting point, it is overwritten by the trial points.
+            free : ndarray, default=None
+                Array of complex type, the real and imaginary parts of an
+                element are only optimised if they are non-zero.
+            callback : function, default=None
+                Function of the iteration, point and value called after every
+                iteration, raising StopIteration ends the run.
+            maxiter : positive int, default=15000
+            gtol : float, default=1e-5
+                Largest element of the gradient at convergence.
+            ftol : float, default=2.2e-9
+                Smallest relative decrease of the function before stopping.
+            maxls : positive int, default=20
+                Largest number of step halvings of a line search.
+
+            Returns
+            -------
+            dict
+                The value, number of iterations, function and gradient
+                evaluations, status (0 converged, 1 iteration limit, 2 line
+                search failure, 99 stopped by the callback) and message. The
+                optimum is held in x0.
+        """
+        self.ensure(x0.shape, x0.dtype)
+        np.copyto(self.x, x0)
+        value = func(x0)
+        self._project(grad(x0), free, self.g)
+        nfev = njev = 1
+        nit = 0
+        status, message = 1, "Iteration limit reached"
+
+        while nit < maxiter:
+            if np.max(np.abs(self.g.view(self.g.real.dtype))) <= gtol:
+                status, message = 0, "Gradient below tolerance"
+                break
+            np.copyto(self.x_old, self.x)
+            np.copyto(self.g_old, self.g)
+
+            # line search along the search direction, retried along the
+            # gradient with the history forgotten if it fails
+            accepted = False
+            while not accepted:
+                # search direction, restarted along the gradient if not descending
+                self._project(self.direction(self.g, self.d), free, self.d)
+                slope = 2*inner(self.g, self.d)
+                if slope >= 0:
+                    self.reset()
+                    np.negative(self.g, out = self.d)
+                    slope = 2*inner(self.g, self.d)
+                step = 1.0 if self.count != 0 else min(1.0, 1/np.sqrt(inner(self.g, self.g)))
+
+                # backtracking on the sufficient decrease condition
+                for _ in range(maxls):
+                    np.multiply(self.d, step, out = self.tmp)
+                    np.add(self.x_old, self.tmp, out = x0)
+                    new_value = func(x0)
+                    nfev += 1
+                    if new_value <= value + 1e-4*step*slope:
+                        accepted = True
+                        break
+                    step *= 0.5
+                else:
+                    # evaluate the current point again to restore its state
+                    np.copyto(x0, self.x_old)
+                    func(x0)
+                    nfev += 1
+                    if self.count == 0:
+                        break
+                    self.reset()
+            if not accepted:
+                status, message = 2, "Line search failed"
+                break
+            nit += 1
+
+            # move to the new point and learn the curvature
+            np.copyto(self.x, x0)
+            self._project(grad(x0), free, self.g)
+            njev += 1
+            np.subtract(self.x, self.x_old, out = self.tmp)
+            np.subtract(self.g, self.g_old, out = self.g_old)
+            self.update(self.tmp, self.g_old)
+            self.iteration += 1
+            old_value, value = value, new_value
+
+            if callback is not None:
+                try:
+                    callback(nit, x0, value)
+                except StopIteration:
+                    status, message = 99, "Stopped by the callback"
+                    break
+            if (old_value - value) <= ftol*max(abs(old_value), abs(value), 1):
+                status, message = 0, "Relative reduction of the function below tolerance"
+                break
+
+        np.copyto(x0, self.x)
+        return {'fun': value, 'nit': nit, 'nfev': nfev, 'njev': njev, 'status': status, 'message': message, 'success': status == 0}
+
+    @staticmethod
+    def _project(array, free, out):
+        """Copy an array with the fixed elements set to zero."""
+        if free is None:
+            np.copyto(out, array)
+        else:
+            np.copyto(out.real, array.real*(free.real != 0))
+            np.copyto(out.imag, array.imag*(free.imag != 0))
+        return out
@@ -0,0 +1,181 @@
+# This file contains the class definition for a library of converged periodic
+# orbits, indexed by a phase-invariant fingerprint so that new solutions can be
+# matched against the known ones with a nearest-neighbour lookup.
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .Trajectory import Trajectory
+
+class OrbitLibrary:
+    """
+        A collection of distinct periodic orbits.
+
+        Every orbit is described by the fingerprint (mean, |u_1|, ..., |u_K|,
+        period), which does not change under a shift in time of the orbit.
+        Orbits closer than a tolerance in this fingerprint are considered
+        duplicates, and only the one with the lowest residual is kept.
+
+        The fingerprints are held in a logarithmic set of KD-trees (the
+        Bentley-Saxe method), with the most recent additions held in a pending
+        buffer of at most buffer_size fingerprints that is searched by brute
+        force. A full buffer is merged with the trees no larger than twice its
+        size into a new tree, so every tree is more than twice as large as the
+        next, a lookup searches O(log n) trees and every fingerprint is
+        re-indexed O(log n) times.
+
+        Attributes
+        ----------
+        no_modes : positive int
+            Number of modes K used in the fingerprints.
+        tol : positive float
+            Largest distance between the fingerprints of two duplicate orbits.
+        orbits : list of tuple
+            The (traj, freq, mean, residual) of every orbit.
+        fingerprints : list of ndarray
+            The fingerprint of every orbit.
+        trees : list of tuple
+            The (start, tree) of every KD-tree, indexing the fingerprints from
+            start up to the start of the next one.
+        indexed : int
+            Number of fingerprints held in the trees.
+    """
+
+    __slots__ = ['no_modes', 'tol', 'orbits', 'fingerprints', 'trees', 'indexed']
+
+    buffer_size = 32
+
+    def __init__(self, no_modes = 8, tol = 1e-2):
+        """
+            Initialisation of OrbitLibrary instance.
+
+            Parameters
+            ----------
+            no_modes : positive int, default=8
+            tol : positive float, default=1e-2
+        """
+        self.no_modes = no_modes
+        self.tol = tol
+        self.orbits = []
+        self.fingerprints = []
+        self.trees = []
+        self.indexed = 0
+
+    def __len__(self):
+        return len(self.orbits)
+
+    def __getitem__(self, index):
+        return self.orbits[index]
+
+    def fingerprint(self, traj, freq, mean):
+        """Return the phase-invariant fingerprint of an orbit."""
+        magnitudes = np.zeros([self.no_modes, traj.shape[1]])
+        no_modes = min(self.no_modes, traj.shape[0] - 1)
+        magnitudes[:no_modes] = np.abs(np.asarray(traj[1:no_modes + 1]))
+        return np.concatenate([np.ravel(mean), np.ravel(magnitudes), [2*np.pi/freq]])
+
+    def query(self, traj, freq, mean):
+        """
+            Return the distance to and index of the nearest known orbit.
+
+            Returns
+            -------
+            distance : float
+                Distance between the fingerprints, inf if the library is empty.
+            index : int
+                Index of the nearest orbit, None if the library is empty.
+        """
+        fingerprint = self.fingerprint(traj, freq, mean)
+        distance, index = np.inf, None
+
+        # search the trees
+        for start, tree in self.trees:
+            tree_distance, tree_index = tree.query(fingerprint)
+            if tree_distance < distance:
+                distance, index = tree_distance, start + int(tree_index)
+
+        # search the pending fingerprints
+        if self.indexed < len(self.fingerprints):
+            distances = np.linalg.norm(np.array(self.fingerprints[self.indexed:]) - fingerprint, axis = 1)
+            nearest = np.argmin(distances)
+            if distances[nearest] < distance:
+                distance, index = distances[nearest], self.indexed + int(nearest)
+
+        return float(distance), index
+
+    def match(self, traj, freq, mean):
+        """Return the index of the known orbit duplicated by an orbit, or None."""
+        distance, index = self.query(traj, freq, mean)
+        return index if distance <= self.tol else None
+
+    def add(self, traj, freq, mean, residual = np.inf):
+        """
+            Add an orbit to the library unless it is already known.
+
+            If the orbit duplicates a known one with a higher residual, the
+            known orbit is replaced (keeping its original fingerprint).
+
+            Parameters
+            ----------
+            traj : Trajectory
+            freq : float
+            mean : ndarray
+            residual : float, default=inf
+
+            Returns
+            -------
+            index : int
+                Index of the orbit in the library.
+            new : bool
+                Whether or not the orbit was not known before.
+        """
+        index = self.match(traj, freq, mean)
+        if index is not None:
+            if residual < self.orbits[index][3]:
+                self.orbits[index] = (Trajectory(np.copy(traj)), freq, np.copy(mean), residual)
+            return index, False
+
+        self.orbits.append((Trajectory(np.copy(traj)), freq, np.copy(mean), residual))
+        self.fingerprints.append(self.fingerprint(traj, freq, mean))
+        if len(self.fingerprints) - self.indexed >= self.buffer_size:
+            self.flush()
+        return len(self.orbits) - 1, True
+
+    def flush(self):
+        """Merge the pending fingerprints into the trees."""
+        start, end = self.indexed, len(self.fingerprints)
+        while len(self.trees) != 0 and start - self.trees[-1][0] <= 2*(end - start):
+            start = self.trees.pop()[0]
+        if start < end:
+            self.trees.append((start, cKDTree(np.array(self.fingerprints[start:end]))))
+        self.indexed = end
+
+    def rebuild(self):
+        """Index all the fingerprints in a single tree."""
+        self.trees = []
+        if len(self.fingerprints) != 0:
+            self.trees.append((0, cKDTree(np.array(self.fingerprints))))
+        self.indexed = len(self.fingerprints)
+
+    def save(self, file):
+        """Save the library to a .npz file."""
+        arrays = {'no_modes': self.no_modes, 'tol': self.tol,
+                  'freqs': np.array([orbit[1] for orbit in self.orbits]),
+                  'residuals': np.array([orbit[3] for orbit in self.orbits])}
+        for index, (traj, _, mean, _) in enumerate(self.orbits):
+            arrays['traj_{}'.format(index)] = np.asarray(traj)
+            arrays['mean_{}'.format(index)] = np.asarray(mean)
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        """Return the library saved to a .npz file."""
+        with np.load(file) as data:
+            library = cls(int(data['no_modes']), float(data['tol']))
+            for index, (freq, residual) in enumerate(zip(data['freqs'], data['residuals'])):
+                traj = Trajectory(data['traj_{}'.format(index)])
+                mean = data['mean_{}'.format(index)]
+                library.orbits.append((traj, float(freq), mean, float(residual)))
+                library.fingerprints.append(library.fingerprint(traj, freq, mean))
+        library.rebuild()
+        return library
@@ -0,0 +1,201 @@
+# This file contains the class definitions to allocate arrays (trajectories,
+# psi bases, resolvents) in memory shared between processes, so that workers
+# can be handed small picklable handles instead of copies of the data.
+
+import os
+import shutil
+import tempfile
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .Trajectory import Trajectory
+
+# shared blocks attached by this process, kept open for the arrays using them
+_attached = {}
+
+class SharedHandle:
+    """
+        Picklable reference to an array held in shared memory.
+
+        Attributes
+        ----------
+        backend : {'shm', 'memmap'}
+            Whether the array is held in a shared memory block or in a memory-
+            mapped file.
+        name : str
+            Name of the shared memory block or path of the file.
+        shape : tuple of int
+        dtype : str
+        trajectory : bool
+            Whether or not the array is attached as a Trajectory.
+    """
+
+    __slots__ = ['backend', 'name', 'shape', 'dtype', 'trajectory']
+
+    def __init__(self, backend, name, shape, dtype, trajectory = False):
+        self.backend = backend
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+        self.trajectory = trajectory
+
+    def __getstate__(self):
+        return (self.backend, self.name, self.shape, self.dtype, self.trajectory)
+
+    def __setstate__(self, state):
+        self.backend, self.name, self.shape, self.dtype, self.trajectory = state
+
+    def __repr__(self):
+        return "SharedHandle({}, {}, {}, {})".format(self.backend, self.name, self.shape, self.dtype)
+
+    def attach(self):
+        """
+            Return the array referenced by the handle, without copying it.
+
+            The shared memory block is opened once per process and reused for
+            every later attach.
+
+            Returns
+            -------
+            ndarray or Trajectory
+        """
+        if self.backend == 'shm':
+            if self.name not in _attached:
+                _attached[self.name] = _open_block(self.name)
+            array = np.ndarray(self.shape, dtype = self.dtype, buffer = _attached[self.name].buf)
+        else:
+            array = np.memmap(self.name, dtype = self.dtype, mode = 'r+', shape = self.shape)
+        return Trajectory(array) if self.trajectory else array
+
+def _open_block(name):
+    """Open an existing shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        # python < 3.13, processes started by multiprocessing share the
+        # resource tracker of their parent so the block is not unlinked twice
+        return shared_memory.SharedMemory(name = name)
+
+def detach_all():
+    """Close all the shared memory blocks attached by this process."""
+    for block in _attached.values():
+        try:
+            block.close()
+        except BufferError:
+            pass
+    _attached.clear()
+
+class SharedArrays:
+    """
+        Factory of arrays in shared memory, owning them for their lifetime.
+
+        The arrays are allocated in page-aligned blocks, so they satisfy the
+        alignment of the FFTW plans. All the blocks are released when the
+        factory is closed, either explicitly or at the end of a with block.
+
+        Attributes
+        ----------
+        backend : {'shm', 'memmap'}
+            Allocate in multiprocessing.shared_memory blocks or in memory-
+            mapped files.
+        directory : str
+            Directory holding the memory-mapped files.
+        blocks : list
+            Shared memory blocks or file paths owned by the factory.
+    """
+
+    __slots__ = ['backend', 'directory', 'blocks', 'owns_directory']
+
+    def __init__(self, backend = 'shm', directory = None):
+        """
+            Initialisation of SharedArrays instance.
+
+            Parameters
+            ----------
+            backend : {'shm', 'memmap'}, default='shm'
+            directory : str, default=None
+                Directory for the memory-mapped files, a temporary directory is
+                created (and removed on closing) if not given.
+        """
+        if backend not in ('shm', 'memmap'):
+            raise ValueError("Backend must be 'shm' or 'memmap'!")
+        self.backend = backend
+        self.blocks = []
+        self.owns_directory = backend == 'memmap' and directory is None
+        if self.owns_directory:
+            directory = tempfile.mkdtemp(prefix = 'pyReSolver_')
+        self.directory = directory
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def empty(self, shape, dtype = float, trajectory = False):
+        """
+            Return a new uninitialised array in shared memory and its handle.
+
+            Parameters
+            ----------
+            shape : tuple of int
+            dtype : data-type, default=float
+            trajectory : bool, default=False
+                Whether or not to return the array as a Trajectory.
+
+            Returns
+            -------
+            array : ndarray or Trajectory
+            handle : SharedHandle
+        """
+        nbytes = max(int(np.prod(shape))*np.dtype(dtype).itemsize, 1)
+        if self.backend == 'shm':
+            block = shared_memory.SharedMemory(create = True, size = nbytes)
+            self.blocks.append(block)
+            handle = SharedHandle('shm', block.name, shape, dtype, trajectory)
+            array = np.ndarray(handle.shape, dtype = dtype, buffer = block.buf)
+        else:
+            path = os.path.join(self.directory, 'array_{}.dat'.format(len(self.blocks)))
+            self.blocks.append(path)
+            handle = SharedHandle('memmap', path, shape, dtype, trajectory)
+            array = np.memmap(path, dtype = dtype, mode = 'w+', shape = handle.shape)
+        return (Trajectory(array) if trajectory else array), handle
+
+    def copy(self, array):
+        """
+            Return a copy of an array in shared memory and its handle, a
+            Trajectory is copied as a Trajectory.
+
+            Parameters
+            ----------
+            array : ndarray or Trajectory
+
+            Returns
+            -------
+            array : ndarray or Trajectory
+            handle : SharedHandle
+        """
+        shared, handle = self.empty(np.shape(array), dtype = np.asarray(array).dtype, trajectory = isinstance(array, Trajectory))
+        np.copyto(shared, array)
+        return shared, handle
+
+    def close(self):
+        """
+            Release all the arrays owned by the factory, the arrays must not
+            be used afterwards.
+        """
+        for block in self.blocks:
+            if self.backend == 'shm':
+                _attached.pop(block.name, None)
+                try:
+                    block.close()
+                except BufferError:
+                    # arrays still reference the mapping, it is freed with them
+                    pass
+                block.unlink()
+            elif not self.owns_directory and os.path.exists(block):
+                os.remove(block)
+        if self.owns_directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self.blocks = []
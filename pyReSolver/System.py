@@ -0,0 +1,63 @@
+# This file contains the class definition for a dynamical system bound to its
+# own set of parameters, so that several optimisations can run side by side
+# without sharing the mutable module-level parameter dictionaries.
+
+import functools
+
+class System:
+    """
+        A dynamical system with its parameters fixed at initialisation.
+
+        The system functions of the wrapped module are exposed with the same
+        names and call signatures, so an instance can be used anywhere a
+        system module is expected.
+
+        Attributes
+        ----------
+        module : module
+            File containing the necessary function definitions to define the
+            state-space.
+        parameters : dict
+            Private copy of the parameters used by every function call.
+        symmetries : dict
+            Symmetries of the system, see symmetries.py.
+        nl_term : function
+            Pure version of nl_factor returning its output, taking the array
+            module as the xp argument, None if the module does not define it.
+    """
+
+    functions = ('response', 'jacobian', 'nl_factor', 'jac_conv', 'jac_conv_adj')
+    optional_functions = ('nl_term',)
+
+    __slots__ = ['module', 'parameters', 'symmetries', *functions, *optional_functions]
+
+    def __init__(self, module, parameters = None):
+        """
+            Initialisation of System instance.
+
+            Parameters
+            ----------
+            module : module or System
+                The system definition, if a System is given its parameters are
+                used as the defaults.
+            parameters : dict, default=None
+                Parameter values overriding the defaults of the module.
+        """
+        if isinstance(module, System):
+            defaults = module.parameters
+            module = module.module
+        else:
+            defaults = module.parameters
+        self.module = module
+        self.symmetries = getattr(module, 'symmetries', {})
+        self.parameters = dict(defaults)
+        if parameters is not None:
+            self.parameters.update(parameters)
+        for name in self.functions:
+            setattr(self, name, functools.partial(getattr(module, name), parameters = self.parameters))
+        for name in self.optional_functions:
+            function = getattr(module, name, None)
+            setattr(self, name, None if function is None else functools.partial(function, parameters = self.parameters))
+
+    def __repr__(self):
+        return "System({}, {})".format(self.module.__name__, self.parameters)
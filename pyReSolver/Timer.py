@@ -0,0 +1,86 @@
+# This file contains the class definition for a lightweight timer that counts
+# and times the calls made to the functions evaluated during an optimisation.
+
+from time import perf_counter
+
+class Timer:
+    """
+        Accumulated call counts and wall-clock times keyed by name.
+
+        Attributes
+        ----------
+        calls : dict
+            Number of calls made for each name.
+        times : dict
+            Total time in seconds spent for each name.
+    """
+
+    __slots__ = ['calls', 'times']
+
+    def __init__(self):
+        self.calls = {}
+        self.times = {}
+
+    def add(self, name, elapsed, calls = 1):
+        """Add a number of calls and their elapsed time to a name."""
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.times[name] = self.times.get(name, 0.0) + elapsed
+
+    def wrap(self, name, func):
+        """Return a function that times every call to func under a name."""
+        def timed_func(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, perf_counter() - start)
+        return timed_func
+
+    def breakdown(self):
+        """
+            Return the calls and times of every name.
+
+            If the total time of the optimiser is known, the time spent outside
+            of the residual and gradient evaluations is added as 'overhead'.
+
+            Returns
+            -------
+            dict
+                Dictionary of the form {name: {'calls': int, 'time': float}}.
+        """
+        breakdown = {name: {'calls': self.calls[name], 'time': self.times[name]} for name in self.calls}
+        if 'minimize' in breakdown:
+            overhead = self.times['minimize'] - self.times.get('residual', 0.0) - self.times.get('gradient', 0.0)
+            breakdown['overhead'] = {'calls': self.calls['minimize'], 'time': overhead}
+        return breakdown
+
+    def reset(self):
+        """Remove all the recorded calls and times."""
+        self.calls.clear()
+        self.times.clear()
+
+class TimedProxy:
+    """
+        Proxy to an object with some of its methods timed, all other
+        attributes are those of the wrapped object.
+    """
+
+    def __init__(self, obj, timer, names):
+        self._obj = obj
+        for name in names:
+            setattr(self, name, timer.wrap(name, getattr(obj, name)))
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+def timed(timer, name, func):
+    """Return func timed by timer, or func itself if no timer is given."""
+    if timer is None:
+        return func
+    return timer.wrap(name, func)
+
+def timed_proxy(timer, obj, names):
+    """Return obj with the given methods timed, or obj itself if no timer is given."""
+    if timer is None:
+        return obj
+    return TimedProxy(obj, timer, names)
@@ -1,8 +1,63 @@
+import sys as _sys
+import types as _types
+import importlib as _importlib
+
 from .Trajectory import Trajectory
-from .FFTPlans import FFTPlans
-from .my_min import minimiseResidual
-from .plot_traj import plot_traj, plot_along_s
-from .resolvent_modes import resolvent, resolvent_modes, resolvent_inv
+from .System import System
+from .Timer import Timer
+
+# the remaining attributes are imported on first access (PEP 562), so that the
+# numerical core can be used without loading pyfftw, scipy.optimize or
+# matplotlib until they are needed
+_lazy_attributes = {
+    'FFTPlans': '.FFTPlans',
+    'minimiseResidual': '.my_min',
+    'minimiseResidualThreaded': '.threaded_min',
+    'Scheduler': '.cluster',
+    'LocalCluster': '.cluster',
+    'OrbitLibrary': '.OrbitLibrary',
+    'CampaignStore': '.CampaignStore',
+    'LBFGS': '.LBFGS',
+    'SharedArrays': '.SharedArrays',
+    'StagnationPolicy': '.stop_policies',
+    'RacingPolicy': '.stop_policies',
+    'SuccessiveHalvingPolicy': '.stop_policies',
+    'plot_traj': '.plot_traj',
+    'plot_along_s': '.plot_traj',
+    'plot_traj_collection': '.plot_traj',
+    'resolvent': '.resolvent_modes',
+    'resolvent_modes': '.resolvent_modes',
+    'resolvent_inv': '.resolvent_modes',
+    'floquet_exponents': '.stability',
+    'floquet_multipliers': '.stability',
+    'refine_orbit': '.sensitivity',
+    'orbit_sensitivities': '.sensitivity',
+}
+_lazy_submodules = ['utils', 'systems']
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        value = getattr(_importlib.import_module(_lazy_attributes[name], __name__), name)
+    elif name in _lazy_submodules:
+        value = _importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted({*globals(), *_lazy_attributes, *_lazy_submodules})
+
+class _LazyPackage(_types.ModuleType):
+    """
+        Package module that keeps lazy attributes sharing their name with a
+        submodule (e.g. FFTPlans) from being shadowed by that submodule when it
+        is imported.
+    """
+
+    def __setattr__(self, name, value):
+        if name in _lazy_attributes and isinstance(value, _types.ModuleType):
+            return
+        super().__setattr__(name, value)
 
-from . import utils
-from . import systems
+_sys.modules[__name__].__class__ = _LazyPackage
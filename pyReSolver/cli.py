@@ -0,0 +1,234 @@
+# This file contains the command-line entry point running a campaign of
+# optimisations described by a configuration file, with the progress of the
+# campaign checkpointed in a CampaignStore so an interrupted run can resume.
+#
+#   pyresolver run campaign.json
+#   pyresolver status campaign.db
+
+import os
+import json
+import time
+import socket
+import argparse
+import importlib
+from multiprocessing import get_context
+
+import numpy as np
+
+from .System import System
+from .CampaignStore import CampaignStore
+
+defaults = {
+    'parameters': {},
+    'sweep': [{}],
+    'seeds': 1,
+    'modes_per_period': 10,
+    'psi': None,
+    'method': 'L-BFGS-B',
+    'options': {'maxiter': 1000},
+    'precision': 'double',
+    'flag': 'FFTW_MEASURE',
+    'workers': 1,
+    'store': None,
+}
+
+def load_config(path):
+    """
+        Return the configuration of a campaign read from a JSON or TOML file,
+        completed with the defaults.
+
+        The configuration holds:
+        system : str
+            Name of a system of pyReSolver.systems, or a module path.
+        parameters : dict
+            Parameter values overriding the defaults of the system.
+        sweep : list of dict
+            Parameter overrides for every point of a parameter sweep.
+        mean : list
+            Mean of the trajectories.
+        periods : list of float, or dict
+            Periods of the initial trajectories, or a range given by its min,
+            max and count.
+        seeds : int
+            Number of random initial trajectories per period and parameters.
+        modes, modes_per_period : int, float
+            Number of modes of the trajectories, or the number per unit of
+            period if modes is not given.
+        psi : dict
+            Resolvent modes to optimise in, given by the forcing matrix B and
+            the number of singular modes to cut, None for the full space.
+        method, options, precision, flag :
+            Passed to minimiseResidual.
+        workers : int
+            Number of worker processes.
+        store : str
+            Path of the campaign database, next to the configuration file if
+            not given.
+
+        Returns
+        -------
+        dict
+    """
+    if path.endswith('.toml'):
+        # tomllib is only in the standard library from Python 3.11
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(path, 'rb') as file:
+            config = tomllib.load(file)
+    else:
+        with open(path) as file:
+            config = json.load(file)
+    for key in ('system', 'mean', 'periods'):
+        if key not in config:
+            raise ValueError("The configuration must define {}!".format(key))
+    config = {**defaults, **config}
+    if config['store'] is None:
+        config['store'] = os.path.splitext(path)[0] + '.db'
+    return config
+
+def campaign_periods(config):
+    """Return the periods of the initial trajectories of a campaign."""
+    periods = config['periods']
+    if isinstance(periods, dict):
+        return list(np.linspace(periods['min'], periods['max'], periods['count']))
+    return list(periods)
+
+def campaign_system(config):
+    """Return the system of a campaign."""
+    name = config['system']
+    module = importlib.import_module(name if '.' in name else 'pyReSolver.systems.' + name)
+    return System(module, config['parameters'])
+
+def run_tasks(config, worker = None):
+    """
+        Run the pending tasks of a campaign until none are left.
+
+        The FFTW plans and resolvent modes are computed once per shape (and
+        period for the modes) and reused for all the tasks of the worker.
+
+        Parameters
+        ----------
+        config : dict
+        worker : str, default=None
+            Name of the worker recorded with the tasks.
+
+        Returns
+        -------
+        int
+            Number of tasks completed.
+    """
+    from .my_min import minimiseResidual
+    from .threaded_min import thread_plans
+    from .resolvent_modes import resolvent, resolvent_modes
+    from .utils import generateRandomTrajectory
+
+    sys = campaign_system(config)
+    mean = np.array(config['mean'], dtype = float).reshape(1, -1)
+    precision = 'single' if config['precision'] == 'single' else 'double'
+    psis = {}
+    completed = 0
+
+    with CampaignStore(config['store']) as store:
+        while True:
+            task = store.claim(worker)
+            if task is None:
+                return completed
+            try:
+                period = task['period']
+                freq = (2*np.pi)/period
+                run_sys = System(sys, task['parameters'])
+                no_modes = config.get('modes', int(config['modes_per_period']*period))
+                traj = generateRandomTrajectory(mean.shape[1], no_modes, distribution = np.random.default_rng(task['seed']).standard_normal)
+                traj[0] = 0
+
+                # resolvent modes cached by period and parameters
+                psi = None
+                if config['psi'] is not None:
+                    key = (period, no_modes, json.dumps(task['parameters'], sort_keys = True))
+                    if key not in psis:
+                        B = np.array(config['psi']['B'])
+                        psis[key] = resolvent_modes(resolvent(freq, range(no_modes), run_sys.jacobian(mean), B), cut = config['psi'].get('cut', 0))[0]
+                    psi = psis[key]
+
+                plans = thread_plans([(no_modes - 1) << 1, mean.shape[1]], flag = config['flag'], precision = precision)
+                start = time.perf_counter()
+                op_traj, traces, sol = minimiseResidual(traj, freq, run_sys, mean, psi = psi, plans = plans, method = config['method'],
+                                                        precision = config['precision'], options = dict(config['options']))
+                if store.complete(task['id'], op_traj, freq, mean, sol.fun, sol.nit, time.perf_counter() - start, worker):
+                    completed += 1
+            except Exception as error:
+                store.fail(task['id'], repr(error), worker)
+
+def run(config, requeue = True):
+    """
+        Run a campaign, resuming from its store if it already exists.
+
+        Parameters
+        ----------
+        config : dict
+        requeue : bool, default=True
+            Whether or not to requeue the tasks left running by an interrupted
+            run, only safe if no other run of the campaign is active.
+
+        Returns
+        -------
+        dict
+            Number of tasks with every status at the end of the run.
+    """
+    # record the tasks, the ones already known are skipped
+    with CampaignStore(config['store']) as store:
+        tasks = [(seed, period, parameters) for parameters in config['sweep'] for period in campaign_periods(config) for seed in range(config['seeds'])]
+        store.add_tasks(tasks)
+        if requeue:
+            store.requeue()
+
+    # pull the tasks from the store on every worker
+    host = socket.gethostname()
+    if config['workers'] == 1:
+        run_tasks(config, '{}:{}'.format(host, os.getpid()))
+    else:
+        with get_context('spawn').Pool(config['workers']) as pool:
+            pool.starmap(run_tasks, [(config, '{}:{}'.format(host, index)) for index in range(config['workers'])])
+
+    with CampaignStore(config['store']) as store:
+        return store.counts()
+
+def status(path, top = 10):
+    """Print the progress and best results of a campaign."""
+    with CampaignStore(path) as store:
+        counts = store.counts()
+        results = store.results()
+    print(' '.join('{}: {}'.format(key, value) for key, value in counts.items()))
+    for result in results[:top]:
+        print("task {id}: seed {seed} period {period:.6g} parameters {parameters} residual {residual:.6e} iterations {iterations} time {time:.3g}s".format(**result))
+
+def main(argv = None):
+    """Entry point of the pyresolver command."""
+    parser = argparse.ArgumentParser(prog = 'pyresolver', description = "Run campaigns of periodic orbit searches.")
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    run_parser = commands.add_parser('run', help = "run or resume the campaign of a configuration file")
+    run_parser.add_argument('config', help = "JSON or TOML configuration file")
+    run_parser.add_argument('--workers', type = int, help = "number of worker processes")
+    run_parser.add_argument('--store', help = "path of the campaign database")
+    run_parser.add_argument('--no-requeue', action = 'store_true', help = "leave the running tasks of other runs alone")
+    status_parser = commands.add_parser('status', help = "print the progress of a campaign")
+    status_parser.add_argument('store', help = "path of the campaign database")
+    status_parser.add_argument('--top', type = int, default = 10, help = "number of best results to print")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        config = load_config(args.config)
+        if args.workers is not None:
+            config['workers'] = args.workers
+        if args.store is not None:
+            config['store'] = args.store
+        run(config, requeue = not args.no_requeue)
+        status(config['store'])
+    else:
+        status(args.store, top = args.top)
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
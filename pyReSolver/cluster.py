@@ -0,0 +1,392 @@
+# This file contains the class and function definitions to distribute the
+# optimisations of a campaign over worker processes on any number of nodes,
+# with a scheduler talking to the workers over authenticated sockets.
+#
+# Only the initial trajectories, frequencies and parameter overrides are sent
+# with every task, the data shared by a whole campaign (system, mean, resolvent
+# modes and options) is sent once to every worker and kept resident there.
+
+import os
+import sys as _sys
+import queue
+import pickle
+import threading
+import importlib
+import traceback
+from concurrent.futures import Future
+from multiprocessing import get_context
+from multiprocessing.connection import Listener, Client
+
+from .System import System
+
+class Scheduler:
+    """
+        Scheduler handing out the tasks of campaigns to connected workers.
+
+        Workers can connect at any time, each one is served by its own thread
+        which sends it one task at a time. If a worker is lost the task it was
+        running is resubmitted to the other workers.
+
+        Attributes
+        ----------
+        address : tuple
+            Address (host, port) the workers connect to.
+        authkey : bytes
+            Key authenticating the workers.
+        max_retries : int
+            Number of times a task is resubmitted before it fails.
+        worker_timeout : float
+            Time the waiting tasks are kept while no worker is connected
+            before they fail.
+        tasks : Queue
+            Tasks waiting for a worker.
+        campaigns : dict
+            Data shared by all the tasks of every campaign with unfinished
+            tasks.
+        workers : int
+            Number of workers currently connected.
+    """
+
+    def __init__(self, address = ('localhost', 0), authkey = None, max_retries = 3, worker_timeout = 60.0):
+        """
+            Initialisation of Scheduler instance.
+
+            Parameters
+            ----------
+            address : tuple, default=('localhost', 0)
+                Address to listen on, port 0 picks a free port.
+            authkey : bytes, default=None
+                Key authenticating the workers, a random key if not given.
+            max_retries : int, default=3
+            worker_timeout : float, default=60.0
+        """
+        self.authkey = os.urandom(16) if authkey is None else authkey
+        self.listener = Listener(address, authkey = self.authkey)
+        self.address = self.listener.address
+        self.max_retries = max_retries
+        self.worker_timeout = worker_timeout
+        self.tasks = queue.Queue()
+        self.campaigns = {}
+        self.pending = {}
+        self.workers = 0
+        self.lock = threading.Lock()
+        self.connected = threading.Condition(self.lock)
+        # unpickling a result can import the modules of its classes, which is
+        # not safe to do from several serving threads at once
+        self.loads_lock = threading.Lock()
+        self.closed = False
+        self.next_campaign = 0
+        self.accept_thread = threading.Thread(target = self._accept, daemon = True)
+        self.accept_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _accept(self):
+        """Accept new workers until the scheduler is closed."""
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self.closed:
+                    return
+                continue
+            if self.closed:
+                conn.close()
+                return
+            with self.lock:
+                self.workers += 1
+                self.connected.notify_all()
+            threading.Thread(target = self._serve, args = (conn,), daemon = True).start()
+
+    def _serve(self, conn):
+        """Send tasks to a worker and collect their results."""
+        sent = set()
+        try:
+            while True:
+                task = self.tasks.get()
+                if task is None:
+                    conn.send(('stop',))
+                    return
+                campaign, index, payload, future, retries = task
+                try:
+                    # release the data of the finished campaigns on the worker
+                    for finished in [sent_campaign for sent_campaign in sent if sent_campaign not in self.campaigns]:
+                        conn.send(('drop', finished))
+                        sent.discard(finished)
+                    if campaign not in sent:
+                        conn.send(('setup', campaign, self.campaigns[campaign]))
+                        sent.add(campaign)
+                    conn.send(('task', campaign, index, payload))
+                    data = conn.recv_bytes()
+                    with self.loads_lock:
+                        message = pickle.loads(data)
+                except (EOFError, OSError):
+                    # the worker is lost, resubmit its task
+                    if retries < self.max_retries:
+                        self.tasks.put((campaign, index, payload, future, retries + 1))
+                    else:
+                        self._finish(campaign)
+                        future.set_exception(RuntimeError("Task {} failed on {} workers!".format(index, retries + 1)))
+                    return
+                except Exception as error:
+                    # a message is pickled whole before it is written, so the
+                    # connection is still usable and only the task fails
+                    self._finish(campaign)
+                    future.set_exception(RuntimeError("Task {} could not be exchanged with its worker: {!r}".format(index, error)))
+                    continue
+                self._finish(campaign)
+                if message[0] == 'result':
+                    future.set_result(message[1])
+                else:
+                    future.set_exception(RuntimeError("Task {} raised on its worker:\n{}".format(index, message[1])))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            with self.lock:
+                self.workers -= 1
+                if self.workers == 0:
+                    self._watch_workers()
+
+    def _watch_workers(self):
+        """Fail the waiting tasks if no worker connects within the timeout."""
+        if self.closed:
+            return
+        timer = threading.Timer(self.worker_timeout, self._fail_waiting)
+        timer.daemon = True
+        timer.start()
+
+    def _fail_waiting(self):
+        waiting = []
+        with self.lock:
+            if self.workers != 0 or self.closed:
+                return
+            while not self.tasks.empty():
+                waiting.append(self.tasks.get_nowait())
+        for task in waiting:
+            if task is not None:
+                self._finish(task[0])
+                task[3].set_exception(RuntimeError("No worker connected within {} seconds!".format(self.worker_timeout)))
+
+    def _finish(self, campaign):
+        # drop the shared data once every task of the campaign is done, before
+        # the last future is resolved
+        with self.lock:
+            self.pending[campaign] -= 1
+            if self.pending[campaign] == 0:
+                del self.pending[campaign]
+                del self.campaigns[campaign]
+
+    def wait_for_workers(self, no_workers, timeout = None):
+        """Block until a number of workers are connected, return whether they are."""
+        with self.lock:
+            return self.connected.wait_for(lambda: self.workers >= no_workers, timeout = timeout)
+
+    def submit(self, trajs, freqs, sys, mean, **kwargs):
+        """
+            Submit the optimisations of a campaign and return their futures.
+
+            Parameters
+            ----------
+            trajs : list of Trajectory
+            freqs : float or list of float
+            sys : file or System
+                The system definition shared by all the tasks, sent by the name
+                of its module and its parameters.
+            mean : ndarray
+            parameters : list of dict, default=None
+                Per-task parameter overrides for the system.
+            **kwargs
+                Keyword arguments passed to minimiseResidual for every task,
+                except plans and traces, they must be picklable (a ValueError
+                is raised otherwise). Large shared data such as psi is only
+                sent once to every worker.
+
+            Returns
+            -------
+            list of Future
+                Futures of the (op_traj, traces, sol) output of
+                minimiseResidual for each initial trajectory, in order.
+        """
+        parameters = kwargs.pop('parameters', None)
+        if 'plans' in kwargs or 'traces' in kwargs:
+            raise ValueError("Plans and traces cannot be shared between workers!")
+        if not hasattr(freqs, '__len__'):
+            freqs = [freqs]*len(trajs)
+        if parameters is None:
+            parameters = [None]*len(trajs)
+        sys = System(sys)
+        if len(trajs) == 0:
+            return []
+
+        # fail here rather than on the serving threads if the data cannot be sent
+        try:
+            pickle.dumps((sys.module.__name__, sys.parameters, mean, kwargs))
+            for traj, freq, run_params in zip(trajs, freqs, parameters):
+                pickle.dumps((traj, freq, run_params))
+        except Exception as error:
+            raise ValueError("The tasks must be picklable to be sent to the workers!") from error
+
+        # register the data resident on the workers
+        with self.lock:
+            campaign = self.next_campaign
+            self.next_campaign += 1
+            self.campaigns[campaign] = {'module': sys.module.__name__, 'parameters': sys.parameters, 'mean': mean, 'kwargs': kwargs}
+            self.pending[campaign] = len(trajs)
+            if self.workers == 0:
+                self._watch_workers()
+
+        # queue a light task per initial trajectory
+        futures = []
+        for index, (traj, freq, run_params) in enumerate(zip(trajs, freqs, parameters)):
+            future = Future()
+            self.tasks.put((campaign, index, (traj, freq, run_params), future, 0))
+            futures.append(future)
+        return futures
+
+    def map(self, trajs, freqs, sys, mean, **kwargs):
+        """
+            Return the results of the optimisations of a campaign, see submit.
+
+            Returns
+            -------
+            list of tuple
+                The (op_traj, traces, sol) output of minimiseResidual for each
+                initial trajectory, in order.
+        """
+        return [future.result() for future in self.submit(trajs, freqs, sys, mean, **kwargs)]
+
+    def close(self):
+        """Stop all the connected workers and stop accepting new ones."""
+        if self.closed:
+            return
+        self.closed = True
+        with self.lock:
+            workers = self.workers
+        for _ in range(workers):
+            self.tasks.put(None)
+
+        # wake up the thread waiting for connections
+        try:
+            Client(self.address, authkey = self.authkey).close()
+        except OSError:
+            pass
+        self.listener.close()
+        self.accept_thread.join()
+
+def run_worker(address, authkey):
+    """
+        Connect to a scheduler and run the tasks it sends until it stops.
+
+        The campaign data and the FFTW plans are kept between tasks, so only
+        the first task of a campaign pays for their setup. The campaign data
+        is dropped once the scheduler has finished the campaign.
+
+        Parameters
+        ----------
+        address : tuple
+            Address (host, port) of the scheduler.
+        authkey : bytes
+    """
+    from .my_min import minimiseResidual
+    from .threaded_min import thread_plans
+
+    campaigns = {}
+    with Client(tuple(address), authkey = authkey) as conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            if message[0] == 'stop':
+                return
+            if message[0] == 'setup':
+                _, campaign, data = message
+                data = dict(data)
+                data['sys'] = System(importlib.import_module(data['module']), data['parameters'])
+                campaigns[campaign] = data
+                continue
+            if message[0] == 'drop':
+                campaigns.pop(message[1], None)
+                continue
+
+            _, campaign, index, (traj, freq, parameters) = message
+            data = campaigns[campaign]
+            kwargs = data['kwargs']
+            try:
+                sys = data['sys'] if parameters is None else System(data['sys'], parameters)
+                precision = 'single' if kwargs.get('precision', 'double') == 'single' else 'double'
+                plans = thread_plans([(traj.shape[0] - 1) << 1, traj.shape[1]], flag = kwargs.get('flag', 'FFTW_EXHAUSTIVE'), precision = precision)
+                result = minimiseResidual(traj, freq, sys, data['mean'], plans = plans, **kwargs)
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+                continue
+            try:
+                conn.send(('result', result))
+            except (EOFError, OSError):
+                return
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+
+class LocalCluster:
+    """
+        A scheduler with a number of worker processes on the local machine,
+        standing in for a multi-node cluster.
+
+        Attributes
+        ----------
+        scheduler : Scheduler
+        processes : list of Process
+            The worker processes, which can be terminated to simulate the loss
+            of a node.
+    """
+
+    def __init__(self, no_workers = 2, timeout = 60, worker_timeout = 60.0):
+        """
+            Initialisation of LocalCluster instance, returns once all the
+            workers are connected.
+
+            Parameters
+            ----------
+            no_workers : positive int, default=2
+            timeout : float, default=60
+                Time to wait for the workers to connect.
+            worker_timeout : float, default=60.0
+                Time the waiting tasks are kept once all the workers are lost,
+                see Scheduler.
+        """
+        self.scheduler = Scheduler(worker_timeout = worker_timeout)
+        context = get_context('spawn')
+        self.processes = [context.Process(target = run_worker, args = (self.scheduler.address, self.scheduler.authkey), daemon = True) for _ in range(no_workers)]
+        for process in self.processes:
+            process.start()
+        if not self.scheduler.wait_for_workers(no_workers, timeout = timeout):
+            self.close()
+            raise RuntimeError("The workers failed to connect!")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def map(self, trajs, freqs, sys, mean, **kwargs):
+        """Return the results of the optimisations of a campaign, see Scheduler.submit."""
+        return self.scheduler.map(trajs, freqs, sys, mean, **kwargs)
+
+    def close(self):
+        """Stop the scheduler and the worker processes."""
+        self.scheduler.close()
+        for process in self.processes:
+            process.join(timeout = 5)
+            if process.is_alive():
+                process.terminate()
+
+if __name__ == '__main__':
+    # run a worker on a node: python -m pyReSolver.cluster HOST PORT, with the
+    # key of the scheduler in hexadecimal in the PYRESOLVER_AUTHKEY variable
+    run_worker((_sys.argv[1], int(_sys.argv[2])), bytes.fromhex(os.environ['PYRESOLVER_AUTHKEY']))
@@ -6,10 +6,12 @@ import numpy as np
 
 from .resolvent_modes import resolvent_inv
 from . import residual_functions as res_funcs
-from .trajectory_functions import transpose, conj
-from .traj2vec import traj2vec, vec2traj
+from .Trajectory import Trajectory
+from . import trajectory_functions as traj_funcs
+from .traj2vec import init_vec_funcs
+from .Timer import timed, timed_proxy
 
-def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
+def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None, layout = 'block', mask = None, scale = None, free_mean = False, timer = None):
     """
         Return the functions to allow the calculation of the global residual
         and its associated gradients with a vector derived from a trajectory
@@ -30,6 +32,23 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
             compatible with the trajectory.
         conv_method : {'fft', 'sum'}, default='fft'
             The convolution method used.
+        layout : {'block', 'interleaved'}, default='block'
+            Layout of the optimisation vector, see init_vec_funcs.
+        mask : ndarray, default=None
+            Mask of the free elements of the optimisation vector, see
+            init_vec_funcs.
+        scale : ndarray, default=None
+            Scale of every mode of the trajectory in the optimisation vector,
+            see init_vec_funcs and vector_scale. The gradient is multiplied by
+            the scale, so it is the gradient with respect to the vector.
+        free_mean : bool, default=False
+            Whether or not the mean is an unknown of the optimisation, held in
+            the last elements of the optimisation vector. The inverse
+            resolvent and the response at the mean are updated whenever the
+            mean changes, the resolvent modes (if any) are kept fixed.
+        timer : Timer, default=None
+            Timer recording the calls to the functions evaluated, nothing is
+            recorded if None.
         
         Returns
         -------
@@ -38,9 +57,31 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
             respectively.
     """
     # initialise stuff
-    H_n_inv = resolvent_inv(cache.traj.shape[0], freq, sys.jacobian(mean))
+    to_traj = init_vec_funcs(layout, mask, scale)[1]
+    to_vec = init_vec_funcs(layout, mask, None if scale is None else 1/scale)[0]
+    if free_mean:
+        # private copy updated in place as the mean changes
+        mean = np.array(mean, dtype = float).reshape(1, -1)
+    H_n_inv = resolvent_inv(cache.traj.shape[0], freq, sys.jacobian(mean), precision = fftplans.precision)
+    H_n_inv_psi = None
+    unwrapped_sys = sys
+
+    # wrap the functions to be timed, these are unchanged if there is no timer
+    fftplans = timed_proxy(timer, fftplans, ('fft', 'ifft'))
+    sys = timed_proxy(timer, sys, ('nl_factor', 'jac_conv_adj'))
+    to_vec = timed(timer, 'traj2vec', to_vec)
+    to_traj = timed(timer, 'vec2traj', to_traj)
+    response = timed(timer, 'traj_response', traj_funcs.traj_response)
+    response2 = timed(timer, 'traj_response2', traj_funcs.traj_response2)
+    global_residual = timed(timer, 'global_residual', res_funcs.global_residual)
 
     if psi is not None:
+        local_residual = timed(timer, 'local_residual', res_funcs.local_residual_reduced)
+        traj_grad = timed(timer, 'gr_traj_grad', res_funcs.gr_red_traj_grad)
+
+        # linear operator mapping reduced coordinates to the local residual
+        H_n_inv_psi = Trajectory(np.einsum('ikl,ilm->ikm', H_n_inv, cache.psi))
+
         def traj_global_res(opt_vector):
             """
                 Return the global residual of a trajectory frequency pair given as
@@ -56,14 +97,11 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
                 float
             """
             # unpack trajectory
-            vec2traj(cache.red_traj, opt_vector)
-
-            # convert to full space if singular matrix is provided
-            np.copyto(cache.traj, cache.red_traj.matmul_left_traj(psi))
+            to_traj(cache.red_traj, opt_vector)
 
             # calculate global residual and return
-            res_funcs.local_residual(cache, sys, H_n_inv, fftplans)
-            return res_funcs.global_residual(cache)
+            local_residual(cache, sys, H_n_inv_psi, fftplans, response = response)
+            return global_residual(cache)
 
         def traj_global_res_jac(opt_vector):
             """
@@ -84,23 +122,23 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
                     Gradient of the global residual with respect to the frequency.
             """
             # unpack trajectory
-            vec2traj(cache.red_traj, opt_vector)
+            to_traj(cache.red_traj, opt_vector)
 
-            # convert to full space if singular matrix is provided
-            np.copyto(cache.traj, cache.red_traj.matmul_left_traj(psi))
+            # convert to full space
+            np.einsum('ikl,il->ik', cache.psi, cache.red_traj, out = cache.traj)
 
-            # calculate global residual gradients
-            gr_traj_grad = res_funcs.gr_traj_grad(cache, sys, freq, mean, fftplans)
-
-            # convert gradient w.r.t modes to reduced space
-            gr_traj_grad = gr_traj_grad.matmul_left_traj(transpose(conj(psi)))
+            # calculate global residual gradients in the reduced space
+            gr_traj_grad = traj_grad(cache, sys, freq, mean, fftplans, response2 = response2)
 
             # convert back to vector and return
-            traj2vec(gr_traj_grad, opt_vector)
+            to_vec(gr_traj_grad, opt_vector)
 
             return opt_vector
     
     else:
+        local_residual = timed(timer, 'local_residual', res_funcs.local_residual)
+        traj_grad = timed(timer, 'gr_traj_grad', res_funcs.gr_traj_grad)
+
         def traj_global_res(opt_vector):
             """
                 Return the global residual of a trajectory frequency pair given as
@@ -116,11 +154,11 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
                 float
             """
             # unpack trajectory
-            vec2traj(cache.traj, opt_vector)
+            to_traj(cache.traj, opt_vector)
 
             # calculate global residual and return
-            res_funcs.local_residual(cache, sys, H_n_inv, fftplans)
-            return res_funcs.global_residual(cache)
+            local_residual(cache, sys, H_n_inv, fftplans, response = response)
+            return global_residual(cache)
 
         def traj_global_res_jac(opt_vector):
             """
@@ -141,14 +179,199 @@ def init_opt_funcs(cache, freq, fftplans, sys, mean, psi = None):
                     Gradient of the global residual with respect to the frequency.
             """
             # unpack trajectory
-            vec2traj(cache.traj, opt_vector)
+            to_traj(cache.traj, opt_vector)
 
             # calculate global residual gradients
-            gr_traj_grad = res_funcs.gr_traj_grad(cache, sys, freq, mean, fftplans)
+            gr_traj_grad = traj_grad(cache, sys, freq, mean, fftplans, response2 = response2)
 
             # convert back to vector and return
-            traj2vec(gr_traj_grad, opt_vector)
+            to_vec(gr_traj_grad, opt_vector)
 
             return opt_vector
 
+    if free_mean:
+        traj_global_res, traj_global_res_jac = init_free_mean_funcs(traj_global_res, traj_global_res_jac, cache, unwrapped_sys, mean, H_n_inv, H_n_inv_psi)
+
+    return timed(timer, 'residual', traj_global_res), timed(timer, 'gradient', traj_global_res_jac)
+
+def init_traj_funcs(cache, freq, fftplans, sys, mean, psi = None, timer = None):
+    """
+        Return the functions to calculate the global residual and its
+        gradient directly from a trajectory held in the cache, without
+        converting to and from optimisation vectors.
+
+        Parameters
+        ----------
+        cache : Cache
+        freq : float
+        fftplans : FFTPlans
+        sys : file or System
+        mean : ndarray
+        psi : ndarray, default=None
+            Resolvent modes, the trajectory is then the reduced trajectory.
+        timer : Timer, default=None
+
+        Returns
+        -------
+        traj_global_res, traj_global_res_grad : function
+            Functions of the trajectory buffer (cache.traj, or cache.red_traj
+            with resolvent modes), the gradient is a Trajectory with its zeroth
+            mode set to zero.
+    """
+    H_n_inv = resolvent_inv(cache.traj.shape[0], freq, sys.jacobian(mean), precision = fftplans.precision)
+    fftplans = timed_proxy(timer, fftplans, ('fft', 'ifft'))
+    sys = timed_proxy(timer, sys, ('nl_factor', 'jac_conv_adj'))
+    response = timed(timer, 'traj_response', traj_funcs.traj_response)
+    response2 = timed(timer, 'traj_response2', traj_funcs.traj_response2)
+    if psi is not None:
+        buffer = cache.red_traj
+        H_n_inv = Trajectory(np.einsum('ikl,ilm->ikm', H_n_inv, cache.psi))
+        local_residual = timed(timer, 'local_residual', res_funcs.local_residual_reduced)
+        traj_grad = timed(timer, 'gr_traj_grad', res_funcs.gr_red_traj_grad)
+    else:
+        buffer = cache.traj
+        local_residual = timed(timer, 'local_residual', res_funcs.local_residual)
+        traj_grad = timed(timer, 'gr_traj_grad', res_funcs.gr_traj_grad)
+    global_residual = timed(timer, 'global_residual', res_funcs.global_residual)
+
+    def traj_global_res(traj):
+        """Return the global residual of a trajectory."""
+        if traj is not buffer:
+            np.copyto(buffer, traj)
+        local_residual(cache, sys, H_n_inv, fftplans, response = response)
+        return global_residual(cache)
+
+    def traj_global_res_grad(traj):
+        """Return the gradient of the global residual with respect to a trajectory."""
+        if traj is not buffer:
+            np.copyto(buffer, traj)
+        if psi is not None:
+            np.einsum('ikl,il->ik', cache.psi, cache.red_traj, out = cache.traj)
+        gradient = traj_grad(cache, sys, freq, mean, fftplans, response2 = response2)
+        gradient[0] = 0
+        return gradient
+
+    return timed(timer, 'residual', traj_global_res), timed(timer, 'gradient', traj_global_res_grad)
+
+def vector_scale(scaling, no_modes, freq, sys, mean, psi = None):
+    """
+        Return the scale of every mode of a trajectory in the optimisation
+        vector, which makes the global residual better conditioned.
+
+        The linear part of the local residual at mode n is the inverse
+        resolvent applied to the trajectory, whose norm grows like n*freq, so
+        dividing the modes by this norm evens out the curvature of the global
+        residual across the modes.
+
+        Parameters
+        ----------
+        scaling : {'freq', 'resolvent'} or ndarray
+            Scale by 1/(n*freq), by the inverse of the norm of the inverse
+            resolvent (multiplied by the resolvent modes if given), or by the
+            given array of length M.
+        no_modes : positive int
+        freq : float
+        sys : file or System
+        mean : ndarray
+        psi : ndarray, default=None
+
+        Returns
+        -------
+        ndarray
+            1D array of float type, the scale of the zeroth mode is one.
+    """
+    if isinstance(scaling, str):
+        if scaling == 'freq':
+            norms = freq*np.arange(no_modes, dtype = float)
+        elif scaling == 'resolvent':
+            H_n_inv = resolvent_inv(no_modes, freq, sys.jacobian(mean))
+            if psi is not None:
+                H_n_inv = np.einsum('ikl,ilm->ikm', H_n_inv, psi)
+            norms = np.linalg.norm(H_n_inv, ord = 2, axis = (1, 2))
+        else:
+            raise ValueError("Scaling must be 'freq', 'resolvent' or an array!")
+        norms[0] = 1
+        return 1/norms
+    return np.asarray(scaling, dtype = float)
+
+def init_free_mean_funcs(traj_res, traj_res_jac, cache, sys, mean, H_n_inv, H_n_inv_psi = None, step = 1e-6):
+    """
+        Return the global residual and gradient functions of a vector holding
+        a trajectory followed by its mean.
+
+        The mean only enters the residual through the Jacobian at the mean in
+        the inverse resolvent, and through the response at the mean in the
+        zeroth mode. Both are updated in place whenever the mean changes: the
+        change of the Jacobian is subtracted from the inverse resolvent of the
+        starting mean, so no inverse resolvent is ever rebuilt.
+
+        Parameters
+        ----------
+        traj_res, traj_res_jac : function
+            The global residual and gradient functions of the trajectory
+            alone, reading the mean, inverse resolvent and cache updated here.
+        cache : Cache
+        sys : file or System
+        mean : ndarray
+            2D array of shape [1, d] updated in place.
+        H_n_inv : Trajectory
+            Inverse resolvent updated in place.
+        H_n_inv_psi : Trajectory, default=None
+            Inverse resolvent multiplied by the resolvent modes, updated in
+            place.
+        step : float, default=1e-6
+            Relative step of the central differences of the Jacobian with
+            respect to the mean.
+
+        Returns
+        -------
+        traj_global_res, traj_global_res_jac : function
+    """
+    dim = mean.shape[1]
+    start_jac = np.reshape(sys.jacobian(mean), (dim, dim))
+    H_n_inv_start = np.copy(H_n_inv)
+    H_n_inv_psi_start = None if H_n_inv_psi is None else np.copy(H_n_inv_psi)
+    state = {'jac': start_jac, 'jac_grad': None}
+
+    def update_mean(opt_vector):
+        new_mean = opt_vector[-dim:]
+        if np.array_equal(new_mean, mean[0]) and state['jac_grad'] is not None:
+            return
+
+        # subtract the change of the jacobian from the starting resolvent
+        mean[0] = new_mean
+        state['jac'] = np.reshape(sys.jacobian(mean), (dim, dim))
+        jac_change = (state['jac'] - start_jac).astype(H_n_inv.dtype)
+        np.subtract(H_n_inv_start[1:], jac_change, out = H_n_inv[1:])
+        if H_n_inv_psi is not None:
+            H_n_inv_psi[1:] = H_n_inv_psi_start[1:] - np.einsum('kl,ilm->ikm', jac_change, cache.psi[1:])
+        sys.response(mean, cache.resp_mean)
+
+        # derivatives of the jacobian with respect to every element of the mean
+        steps = step*np.maximum(1.0, np.abs(mean[0]))
+        perturbed = np.concatenate([mean + np.diag(steps), mean - np.diag(steps)])
+        jacs = np.reshape(sys.jacobian(perturbed), (2, dim, dim, dim))
+        state['jac_grad'] = (jacs[0] - jacs[1])/(2*steps[:, np.newaxis, np.newaxis])
+
+    def traj_global_res(opt_vector):
+        """Return the global residual of a trajectory mean pair given as a vector."""
+        update_mean(opt_vector)
+        return traj_res(opt_vector[:-dim])
+
+    def traj_global_res_jac(opt_vector):
+        """
+            Return the gradient of the global residual with respect to the
+            trajectory and the mean given as a vector, with the same scaling
+            as the gradient with respect to the trajectory.
+        """
+        update_mean(opt_vector)
+        traj_res_jac(opt_vector[:-dim])
+
+        # zeroth mode: d(-f(mean))/d(mean) = -J, other modes: d(-J*u_n)/d(mean)
+        lr, traj = cache.lr, cache.traj
+        opt_vector[-dim:] = -0.5*np.real(state['jac'].T @ lr[0])
+        opt_vector[-dim:] -= np.real(np.einsum('ni,kij,nj->k', np.conj(lr[1:]), state['jac_grad'], traj[1:]))
+
+        return opt_vector
+
     return traj_global_res, traj_global_res_jac
\ No newline at end of file
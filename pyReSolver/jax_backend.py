@@ -0,0 +1,145 @@
+# This file contains the function definitions to evaluate the global residual
+# and its gradient with JAX, so that the whole residual is traced and compiled
+# into a single XLA computation and its gradient is obtained by reverse-mode
+# automatic differentiation instead of the hand-written adjoints.
+
+import contextlib
+import importlib.util
+
+import numpy as np
+
+from .resolvent_modes import resolvent_inv
+
+def jax_available():
+    """Return whether or not JAX can be imported."""
+    return importlib.util.find_spec('jax') is not None
+
+def init_jax_funcs(traj_shape, freq, sys, mean, psi = None, layout = 'block', mask = None, precision = 'double'):
+    """
+        Return the global residual and gradient functions of an optimisation
+        vector, compiled with JAX.
+
+        The system must define nl_term, the pure version of nl_factor. The
+        functions take and return NumPy arrays so they can be passed directly
+        to the SciPy optimisers.
+
+        Parameters
+        ----------
+        traj_shape : tuple of int
+            Shape [M, d] of the trajectory, or of the reduced trajectory if
+            psi is given.
+        freq : float
+        sys : System
+        mean : ndarray
+            2D array of shape [1, d] containing data of float type.
+        psi : ndarray, default=None
+            Resolvent modes mapping the reduced trajectory to the full space.
+        layout : {'block', 'interleaved'}, default='block'
+            Layout of the optimisation vector, see init_vec_funcs.
+        mask : ndarray, default=None
+            Mask of the free elements of the optimisation vector, see
+            init_vec_funcs.
+        precision : {'double', 'single'}, default='double'
+            Floating point precision of the computation, double precision
+            enables the 64 bit types of JAX only while the returned functions
+            are evaluated, leaving the global configuration of JAX untouched.
+
+        Returns
+        -------
+        traj_global_res, traj_global_res_jac : function
+            The global residual and global residual gradient functions, the
+            gradient is halved to match the scaling of the NumPy backend.
+    """
+    # jax is only imported once the backend is used, it is slow to import
+    if not jax_available():
+        raise ImportError("The JAX backend requires jax to be installed!")
+    import jax
+    import jax.numpy as jnp
+    from jax.experimental import enable_x64
+
+    if getattr(sys, 'nl_term', None) is None:
+        raise ValueError("The JAX backend requires the system to define nl_term!")
+    if layout not in ('block', 'interleaved'):
+        raise ValueError("Vector layout must be 'block' or 'interleaved'!")
+    x64 = enable_x64 if precision == 'double' else contextlib.nullcontext
+    real = jnp.float64 if precision == 'double' else jnp.float32
+
+    # constants of the residual
+    no_modes, red_dim = traj_shape
+    no_samples = (no_modes - 1) << 1
+    size = 2*(no_modes - 1)*red_dim
+    resp_mean = np.zeros_like(mean, dtype = float)
+    sys.response(mean, resp_mean)
+    nl_term = sys.nl_term
+    with x64():
+        H_n_inv = jnp.asarray(resolvent_inv(no_modes, freq, sys.jacobian(mean), precision = precision))
+        resp_mean = jnp.asarray(resp_mean[0], dtype = real)
+        if psi is not None:
+            H_n_inv = jnp.einsum('ikl,ilm->ikm', H_n_inv, jnp.asarray(psi, dtype = H_n_inv.dtype))
+            psi = jnp.asarray(psi, dtype = H_n_inv.dtype)
+        free = None if mask is None else jnp.asarray(np.flatnonzero(mask))
+        weights = jnp.ones(no_modes, dtype = real).at[0].set(0.5)
+
+    def to_traj(vec):
+        if free is not None:
+            vec = jnp.zeros(size, dtype = vec.dtype).at[free].set(vec)
+        if layout == 'block':
+            modes = vec[:size >> 1] + 1j*vec[size >> 1:]
+        else:
+            modes = vec[0::2] + 1j*vec[1::2]
+        modes = jnp.reshape(modes, (no_modes - 1, red_dim))
+        return jnp.concatenate([jnp.zeros((1, red_dim), dtype = modes.dtype), modes])
+
+    def residual(vec):
+        red_traj = to_traj(vec)
+        traj = red_traj if psi is None else jnp.einsum('ikl,il->ik', psi, red_traj)
+
+        # response of the nonlinear term, normalised as in FFTPlans
+        curve = jnp.fft.irfft(traj*no_samples, n = no_samples, axis = 0)
+        f = jnp.fft.rfft(nl_term(curve, xp = jnp), axis = 0)/no_samples
+
+        # local residual with the mean constraint in the zeroth mode
+        lr = jnp.einsum('ikl,il->ik', H_n_inv, red_traj) - f
+        lr = lr.at[0].set(-resp_mean - f[0])
+
+        return jnp.sum(weights*jnp.sum(jnp.real(jnp.conj(lr)*lr), axis = 1))
+
+    residual_jit = jax.jit(residual)
+    gradient_jit = jax.jit(jax.grad(residual))
+
+    def traj_global_res(opt_vector):
+        """
+            Return the global residual of a trajectory given as a vector.
+
+            Parameters
+            ----------
+            opt_vector : ndarray
+                1D array containing data of float type.
+
+            Returns
+            -------
+            float
+        """
+        with x64():
+            return float(residual_jit(jnp.asarray(opt_vector, dtype = real)))
+
+    def traj_global_res_jac(opt_vector):
+        """
+            Return the gradient of the global residual with respect to a
+            trajectory given as a vector.
+
+            Parameters
+            ----------
+            opt_vector : ndarray
+                1D array containing data of float type.
+
+            Returns
+            -------
+            ndarray
+                1D array containing data of float type.
+        """
+        with x64():
+            opt_vector[:] = 0.5*np.asarray(gradient_jit(jnp.asarray(opt_vector, dtype = real)))
+        return opt_vector
+
+    return traj_global_res, traj_global_res_jac
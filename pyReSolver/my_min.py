@@ -3,13 +3,25 @@
 # a given dynamical system.
 
 import numpy as np
-from scipy.optimize import minimize
+from scipy.optimize import minimize, OptimizeResult
 
+from .Trajectory import Trajectory
 from .Cache import Cache
 from .FFTPlans import FFTPlans
-from .traj2vec import traj2vec, vec2traj, init_comp_vec
-from .init_opt_funcs import init_opt_funcs
-from .trajectory_functions import transpose, conj
+from . import trajectory_functions as traj_funcs
+from .traj2vec import init_comp_vec, init_vec_mask, init_vec_funcs
+from .init_opt_funcs import init_opt_funcs, init_traj_funcs, vector_scale
+from .LBFGS import LBFGS
+from .resolvent_modes import resolvent, resolvent_modes
+from .jax_backend import init_jax_funcs
+from .symmetries import symmetry_signs, symmetric_modes, reduced_symmetric_modes
+from .Timer import timed
+
+class _StopRun(Exception):
+    """Raised from the callback to end a run early at the current iterate."""
+    def __init__(self, x):
+        super().__init__()
+        self.x = np.copy(x)
 
 def minimiseResidual(traj, freq, sys, mean, **kwargs):
     """
@@ -20,9 +32,9 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
         ----------
         traj : Trajectory
         freq : float
-        sys : file
+        sys : file or System
             File containing the necessary function definitions to define the
-            state-space.
+            state-space, or a System with its own bound parameters.
         mean : ndarray
             1D array containing data of float type.
         use_jac : bool, default=True
@@ -32,7 +44,16 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
         jac_func : function, default=None
             An alternative gradient function to use.
         method : str, default='L-BFGS-B'
-            The optimisation algorithm to use.
+            The optimisation algorithm to use, any method of SciPy minimize or
+            'native-lbfgs' for the L-BFGS optimiser working directly on the
+            trajectory buffers of the cache. The native optimiser takes the
+            maxiter, gtol, ftol, maxcor and maxls options, passes the reduced
+            or full trajectory to the callback instead of a vector and does
+            not support scaling, a free mean or the JAX backend.
+        lbfgs : LBFGS, default=None
+            Optimiser of the native method, its curvature history is kept so
+            that a later run passed the same instance starts warm. It is
+            returned as the lbfgs attribute of the solution.
         traces : dictionary, default=None
             The dictionary that keeps track of all the important information
             during the optimisation.
@@ -42,8 +63,74 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
             FFTW plans to perform the spectral to physical transformations.
         flag : str, default="FFTW_EXHAUSTIVE"
             FFTW flag to setup the default transform plans.
+        precision : {'double', 'single', 'mixed'}, default='double'
+            Floating point precision of the plans and cache used when no plans
+            are given. 'mixed' runs the early iterations in single precision
+            and promotes to double precision for the final polish. Only the
+            transforms and residual evaluations use single precision, the
+            optimisation vector is always of double precision.
+        promote_iter : positive int, default=100
+            The maximum number of single precision iterations for a mixed
+            precision run, the promotion happens earlier if the single
+            precision run terminates by itself.
         store_grad : bool, default=False
             Whether or not to store the gradient norm in the trace
+        layout : {'block', 'interleaved'}, default='block'
+            Layout of the optimisation vector, the interleaved layout maps
+            directly onto the memory of the trajectory so converting between
+            the two is a single copy.
+        scaling : {'freq', 'resolvent'} or ndarray, default=None
+            Scale of every mode in the optimisation vector, making the problem
+            seen by the optimiser better conditioned, see vector_scale. The
+            returned trajectory is unscaled, the vectors passed to the
+            callback are scaled. Not supported by the JAX backend.
+        phase_fix : bool or int, default=None
+            Whether or not to remove the invariance of the residual to shifts
+            in time, by fixing the imaginary part of one component of the
+            first mode to zero. An int gives the component to fix, True picks
+            the component with the largest first mode. The trajectory is
+            shifted beforehand so that the fixed part is zero, the output
+            keeps this phase.
+        symmetry : str or tuple of int, default=None
+            Symmetry of the system the trajectory is invariant under, given by
+            its name in the symmetries of the system or by the sign change of
+            each component. The trajectory is projected onto the invariant
+            subspace and only the elements allowed to be non-zero are kept in
+            the optimisation vector. The mean should be invariant too.
+        adaptive_modes : bool or dict, default=None
+            Whether or not to adapt the number of modes during the run, the
+            optimisation is run in chunks and the number of modes is grown or
+            shrunk between chunks from the fraction of the energy of the
+            trajectory and local residual held in their highest modes. The
+            returned trajectory has the final number of modes, the changes
+            are stored under "modes" in the traces as (iteration, modes)
+            pairs. A dict sets the controller, see _minimise_adaptive.
+        free_mean : bool, default=False
+            Whether or not to optimise the mean together with the trajectory,
+            the given mean is then the starting guess and the optimised mean
+            is returned as the mean attribute of the solution.
+        backend : {'numpy', 'jax'}, default='numpy'
+            Backend evaluating the residual and its gradient when no
+            alternative functions are given. The JAX backend compiles the
+            whole residual and differentiates it automatically, it requires
+            jax and a system defining nl_term, and does not support a free
+            mean.
+        timer : Timer, default=None
+            Timer counting and timing the calls to the transforms, system
+            kernels, residual functions and vector conversions. The breakdown
+            is stored under "timings" in the traces, with the time spent in
+            the optimiser itself given as "overhead".
+        library : OrbitLibrary, default=None
+            Library of known orbits, the optimisation stops early once the
+            trajectory matches one of them and its index is stored under
+            "duplicate" in the traces.
+        library_every : positive int, default=10
+            Number of iterations between the checks against the library.
+        stop_policy : StopPolicy or callable, default=None
+            Policy stopping an unpromising optimisation early, either a
+            StopPolicy shared between runs or a function of the iteration and
+            residual returning whether or not to stop. The iteration at which
+            the run stopped is stored under "stopped" in the traces.
         options : dict, default={}
             Minimisation options exposed from the SciPy interface.
         callback : callable, default=x->None
@@ -59,8 +146,14 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
             function.
     """
     # unpack keyword arguments
+    precision = kwargs.get('precision', 'double')
+    adaptive_modes = kwargs.pop('adaptive_modes', None)
+    if adaptive_modes is not None and adaptive_modes is not False:
+        return _minimise_adaptive(traj, freq, sys, mean, adaptive_modes, **kwargs)
+    if precision == 'mixed':
+        return _minimise_mixed(traj, freq, sys, mean, **kwargs)
     flag = kwargs.get('flag', 'FFTW_EXHAUSTIVE')
-    plans = kwargs.get('plans', FFTPlans([(traj.shape[0] - 1) << 1, traj.shape[1]], flag = flag))
+    plans = kwargs.get('plans', None)
     use_jac = kwargs.get('use_jac', True)
     res_func = kwargs.get('res_func', None)
     jac_func = kwargs.get('jac_func', None)
@@ -70,44 +163,128 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
     options = kwargs.get("options", {})
     store_grad = kwargs.get("store_grad", False)
     user_callback = kwargs.get("callback", lambda *args : None)
+    layout = kwargs.get("layout", 'block')
+    timer = kwargs.get("timer", None)
+    library = kwargs.get("library", None)
+    library_every = kwargs.get("library_every", 10)
+    stop_policy = kwargs.get("stop_policy", None)
+    if hasattr(stop_policy, 'new_run'):
+        stop_policy = stop_policy.new_run()
+    phase_fix = kwargs.get("phase_fix", None)
+    symmetry = kwargs.get("symmetry", None)
+    free_mean = kwargs.get("free_mean", False)
+    scaling = kwargs.get("scaling", None)
+    backend = kwargs.get("backend", 'numpy')
+    if backend not in ('numpy', 'jax'):
+        raise ValueError("Backend must be 'numpy' or 'jax'!")
+    if backend == 'jax' and free_mean:
+        raise ValueError("The JAX backend does not support a free mean!")
+    if backend == 'jax' and scaling is not None:
+        raise ValueError("The JAX backend does not support scaling!")
+    native = my_method == 'native-lbfgs'
+    if native and (free_mean or scaling is not None or backend == 'jax'):
+        raise ValueError("The native L-BFGS optimiser does not support a free mean, scaling or the JAX backend!")
+
+    # initialise plans if none are provided
+    if plans is None:
+        plans = FFTPlans([(traj.shape[0] - 1) << 1, traj.shape[1]], flag = flag, precision = precision)
 
-    # initialise cache
-    cache = Cache(traj, mean, sys, plans, psi)
+    # initialise cache with a private copy of the trajectory
+    cache = Cache(Trajectory(np.copy(traj)), mean, sys, plans, psi)
 
     # convert to reduced space if singular matrix is provided
     if psi is not None:
-        traj = traj.matmul_left_traj(transpose(conj(psi)))
+        traj = traj.matmul_left_traj(cache.psi_adj)
+
+    # restrict the trajectory to the invariant subspace of a symmetry
+    free = np.full(traj.shape, 1 + 1j)
+    if symmetry is not None:
+        signs = symmetry_signs(sys, symmetry)
+        if psi is None:
+            modes = symmetric_modes(signs, traj.shape[0])
+        else:
+            modes = reduced_symmetric_modes(cache.psi, signs)
+        traj = traj*modes
+        free[~modes] = 0
+
+    # shift the trajectory and fix its phase
+    if phase_fix is not None and phase_fix is not False:
+        comp = int(np.argmax(np.abs(traj[1]))) if phase_fix is True else phase_fix
+        traj = traj_funcs.traj_shift(traj, -np.angle(traj[1, comp]))
+        free[1, comp] = free[1, comp].real
+
+    # only keep the free elements in the optimisation vector
+    if symmetry is None and (phase_fix is None or phase_fix is False):
+        mask = None
+    else:
+        mask = init_vec_mask(free, layout)
+    scale = None if scaling is None else vector_scale(scaling, traj.shape[0], freq, sys, mean, psi = cache.psi)
+    traj2vec, vec2traj = init_vec_funcs(layout, mask, scale)
 
     # setup the problem
-    if not hasattr(res_func, '__call__') and not hasattr(jac_func, '__call__'):
-        res_func, jac_func = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi)
+    if native:
+        traj_res_func, traj_jac_func = init_traj_funcs(cache, freq, plans, sys, mean, psi=psi, timer=timer)
+    elif backend == 'jax' and not (hasattr(res_func, '__call__') and hasattr(jac_func, '__call__')):
+        jax_res_func, jax_jac_func = init_jax_funcs(traj.shape, freq, sys, mean, psi=cache.psi, layout=layout, mask=mask, precision=plans.precision)
+        if not hasattr(res_func, '__call__'):
+            res_func = timed(timer, 'residual', jax_res_func)
+        if not hasattr(jac_func, '__call__'):
+            jac_func = timed(timer, 'gradient', jax_jac_func)
+    elif not hasattr(res_func, '__call__') and not hasattr(jac_func, '__call__'):
+        res_func, jac_func = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi, layout=layout, mask=mask, scale=scale, free_mean=free_mean, timer=timer)
     elif not hasattr(res_func, '__call__'):
-        res_func, _ = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi)
+        res_func, _ = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi, layout=layout, mask=mask, scale=scale, free_mean=free_mean, timer=timer)
     elif not hasattr(jac_func, '__call__'):
-        _, jac_func = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi)
+        _, jac_func = init_opt_funcs(cache, freq, plans, sys, mean, psi=psi, layout=layout, mask=mask, scale=scale, free_mean=free_mean, timer=timer)
 
     # define varaibles to be tracked using callback
     if traces is None:
         traces = {"residual": [], "gradient": [], "iteration": []}
         startIteration = 0
+    elif len(traces["iteration"]) == 0:
+        startIteration = 0
     else:
         startIteration = traces["iteration"][-1]
         del traces["residual"][-1]
-        del traces["gradient"][-1]
+        if len(traces["gradient"]) != 0:
+            del traces["gradient"][-1]
         del traces["iteration"][-1]
 
+    # define check against the known orbits
+    if library is not None:
+        lib_traj = np.zeros_like(traj)
+    def check_library(x, currentIteration):
+        if library is None or currentIteration % library_every != 0:
+            return
+        if isinstance(x, Trajectory):
+            np.copyto(lib_traj, x)
+        else:
+            vec2traj(lib_traj, x[:no_traj_vars])
+        full_traj = lib_traj if psi is None else lib_traj.matmul_left_traj(psi)
+        index = library.match(full_traj, freq, x[no_traj_vars:] if free_mean else mean)
+        if index is not None:
+            traces["duplicate"] = index
+            raise _StopRun(x)
+
+    # define check against the stopping policy
+    def check_stop(x, currentIteration):
+        if stop_policy is not None and stop_policy(currentIteration, traces["residual"][-1]):
+            traces["stopped"] = currentIteration
+            raise _StopRun(x)
+
     # define callback function
     if store_grad:
         def initCallback(currentIteration):
-            gradient = np.zeros_like(traj)
             def callback(x):
                 nonlocal currentIteration
-                vec2traj(gradient, jac_func(x))
                 traces["residual"].append(res_func(x))
-                traces["gradient"].append(np.real(np.sum(conj(gradient).traj_inner(gradient))))
+                gradient = jac_func(np.copy(x))
+                traces["gradient"].append(np.dot(gradient, gradient))
                 traces["iteration"].append(currentIteration)
                 user_callback(x, currentIteration, psi, traces["residual"][-1], traces["gradient"][-1])
                 currentIteration += 1
+                check_library(x, currentIteration)
+                check_stop(x, currentIteration)
             return callback
     else:
         def initCallback(currentIteration):
@@ -117,25 +294,238 @@ def minimiseResidual(traj, freq, sys, mean, **kwargs):
                 traces["iteration"].append(currentIteration)
                 user_callback(x, currentIteration, psi, traces["residual"][-1])
                 currentIteration += 1
+                check_library(x, currentIteration)
+                check_stop(x, currentIteration)
             return callback
 
     # convert trajectory to vector of optimisation variables
-    traj_vec = init_comp_vec(traj)
+    traj_vec = init_comp_vec(traj) if mask is None else np.zeros(np.count_nonzero(mask))
     traj2vec(traj, traj_vec)
+    no_traj_vars = traj_vec.shape[0]
+    if free_mean:
+        traj_vec = np.concatenate([traj_vec, np.ravel(mean)])
 
     # perform optimisation
-    if use_jac:
-        sol = minimize(res_func, traj_vec, jac=jac_func, method=my_method, callback=initCallback(startIteration), options=options)
+    if native:
+        sol = _minimise_native(traj, cache.traj if psi is None else cache.red_traj, traj_res_func, traj_jac_func, free, mask, kwargs.get('lbfgs', None),
+                               options, timer, traces, store_grad, user_callback, psi, check_library, check_stop, startIteration)
+        traj2vec(sol.traj, traj_vec)
+        sol.x = traj_vec
+        del sol.traj
     else:
-        sol = minimize(res_func, traj_vec, method=my_method, callback=initCallback(startIteration), options=options)
+        # an early stop ends the run at the iterate of the callback, without
+        # relying on the optimiser handling exceptions raised from it
+        optimiser = timed(timer, 'minimize', minimize)
+        try:
+            if use_jac:
+                sol = optimiser(res_func, traj_vec, jac=jac_func, method=my_method, callback=initCallback(startIteration), options=options)
+            else:
+                sol = optimiser(res_func, traj_vec, method=my_method, callback=initCallback(startIteration), options=options)
+        except _StopRun as stop:
+            sol = OptimizeResult(x = stop.x, fun = traces["residual"][-1], nit = traces["iteration"][-1] + 1 - startIteration,
+                                 status = 99, success = False, message = "Stopped by the callback")
 
     # unpack trajectory from solution
     op_traj = np.zeros_like(traj)
-    op_vec = sol.x
+    op_vec = sol.x[:no_traj_vars]
     vec2traj(op_traj, op_vec)
+    if free_mean:
+        sol.mean = np.reshape(sol.x[no_traj_vars:], (1, -1))
 
     # convert to full space if singular matrix is provided
     if psi is not None:
         op_traj = op_traj.matmul_left_traj(psi)
 
+    # store the breakdown of the timings
+    if timer is not None:
+        traces["timings"] = timer.breakdown()
+
     return op_traj, traces, sol
+
+def _minimise_mixed(traj, freq, sys, mean, **kwargs):
+    """
+        Return the output of minimiseResidual after running the early
+        iterations in single precision and the remaining ones in double
+        precision.
+    """
+    # unpack keyword arguments
+    promote_iter = kwargs.pop('promote_iter', 100)
+    options = kwargs.pop('options', {})
+    plans = kwargs.pop('plans', None)
+    if hasattr(kwargs.get('stop_policy', None), 'new_run'):
+        kwargs['stop_policy'] = kwargs['stop_policy'].new_run()
+
+    # run single precision iterations with their own plans
+    single_options = dict(options)
+    single_options['maxiter'] = min(promote_iter, options.get('maxiter', promote_iter))
+    kwargs['precision'] = 'single'
+    traj, kwargs['traces'], sol = minimiseResidual(traj, freq, sys, mean, options = single_options, **kwargs)
+    if "duplicate" in kwargs['traces'] or "stopped" in kwargs['traces']:
+        return traj, kwargs['traces'], sol
+    if kwargs.get('free_mean', False):
+        mean = sol.mean
+    if kwargs.get('method', None) == 'native-lbfgs':
+        kwargs['lbfgs'] = sol.lbfgs
+
+    # polish the result in double precision
+    double_options = dict(options)
+    if 'maxiter' in options:
+        double_options['maxiter'] = max(options['maxiter'] - sol.nit, 1)
+    kwargs['precision'] = 'double'
+    return minimiseResidual(traj, freq, sys, mean, options = double_options, plans = plans, **kwargs)
+
+def _minimise_native(traj, buffer, res_func, jac_func, free, mask, lbfgs, options, timer, traces, store_grad, user_callback, psi, check_library, check_stop, startIteration):
+    """
+        Return the result of the native L-BFGS optimiser run on a trajectory
+        buffer, with the trajectory of the final iterate as its traj attribute.
+    """
+    if lbfgs is None:
+        lbfgs = LBFGS(buffer.shape, memory = options.get('maxcor', 10), dtype = buffer.dtype)
+    np.copyto(buffer, traj)
+
+    # the zeroth mode and the elements fixed by a symmetry or phase stay put
+    if mask is not None:
+        free = np.copy(free)
+        free[0] = 0
+    else:
+        free = None
+
+    currentIteration = startIteration
+    def callback(iteration, x, value):
+        nonlocal currentIteration
+        traces["residual"].append(value)
+        traces["iteration"].append(currentIteration)
+        if store_grad:
+            traces["gradient"].append(np.real(np.vdot(lbfgs.g, lbfgs.g)))
+            user_callback(x, currentIteration, psi, value, traces["gradient"][-1])
+        else:
+            user_callback(x, currentIteration, psi, value)
+        currentIteration += 1
+        try:
+            check_library(x, currentIteration)
+            check_stop(x, currentIteration)
+        except _StopRun:
+            raise StopIteration
+
+    optimiser = timed(timer, 'minimize', lbfgs.minimise)
+    result = optimiser(res_func, jac_func, buffer, free = free, callback = callback, maxiter = options.get('maxiter', 15000),
+                       gtol = options.get('gtol', 1e-5), ftol = options.get('ftol', 2.2e-9), maxls = options.get('maxls', 20))
+    sol = OptimizeResult(result)
+    sol.traj = Trajectory(np.copy(buffer))
+    sol.lbfgs = lbfgs
+    return sol
+
+def _minimise_adaptive(traj, freq, sys, mean, settings, **kwargs):
+    """
+        Return the output of minimiseResidual with the number of modes adapted
+        between chunks of iterations.
+
+        After every chunk the fraction of the energy held in the highest modes
+        of the trajectory and of its local residual is measured. The number
+        of modes is grown if the trajectory tail is above a tolerance or if
+        the residual is concentrated in the highest modes (a sign of
+        aliasing), and shrunk if the trajectory tail is below another
+        tolerance and the residual tail holds no more than its share of the
+        modes. The run ends once a chunk converges without a change of the
+        number of modes, or the iterations run out.
+
+        Parameters
+        ----------
+        settings : bool or dict
+            True for the default controller, or a dict with any of:
+            chunk : positive int, default=50
+                Number of iterations between adaptations.
+            tail : float, default=0.1
+                Fraction of the modes making up the tail, see tail_energy.
+            grow_tol, shrink_tol : float, default=1e-8, 1e-12
+                Tail energy fractions of the trajectory above which the modes
+                are grown and below which they are shrunk.
+            res_grow_tol : float, default=0.5
+                Tail energy fraction of the residual above which the modes
+                are grown.
+            factor : float, default=1.5
+                Ratio of the numbers of modes before and after a change.
+            min_modes, max_modes : positive int, default=4, 4*M
+                Bounds on the number of modes.
+            B : ndarray, default=None
+                Forcing matrix of the resolvent modes, needed to grow psi.
+    """
+    settings = {} if settings is True else settings
+    chunk = settings.get('chunk', 50)
+    tail = settings.get('tail', 0.1)
+    grow_tol = settings.get('grow_tol', 1e-8)
+    shrink_tol = settings.get('shrink_tol', 1e-12)
+    res_grow_tol = settings.get('res_grow_tol', 0.5)
+    factor = settings.get('factor', 1.5)
+    min_modes = settings.get('min_modes', 4)
+    max_modes = settings.get('max_modes', 4*traj.shape[0])
+    B = settings.get('B', None)
+
+    # unpack keyword arguments
+    precision = kwargs.get('precision', 'double')
+    if precision == 'mixed':
+        raise ValueError("Adaptive modes do not support mixed precision!")
+    if 'plans' in kwargs:
+        raise ValueError("Plans cannot be given with adaptive modes!")
+    flag = kwargs.get('flag', 'FFTW_EXHAUSTIVE')
+    options = kwargs.pop('options', {})
+    maxiter = options.get('maxiter', 15000)
+    psi = kwargs.pop('psi', None)
+    traces = kwargs.pop('traces', None)
+    free_mean = kwargs.get('free_mean', False)
+    if kwargs.get('scaling', None) is not None and not isinstance(kwargs['scaling'], str):
+        raise ValueError("An explicit scaling has a fixed number of modes, it cannot be used with adaptive modes!")
+    if hasattr(kwargs.get('stop_policy', None), 'new_run'):
+        kwargs['stop_policy'] = kwargs['stop_policy'].new_run()
+
+    # plans are kept for every number of modes visited
+    plans = {}
+    modes = []
+    iterations = 0
+    while True:
+        no_modes = traj.shape[0]
+        if no_modes not in plans:
+            plans[no_modes] = FFTPlans([(no_modes - 1) << 1, traj.shape[1]], flag = flag, precision = precision)
+        chunk_options = dict(options)
+        chunk_options['maxiter'] = min(chunk, maxiter - iterations)
+        traj, traces, sol = minimiseResidual(traj, freq, sys, mean, options = chunk_options, plans = plans[no_modes], psi = psi, traces = traces, **kwargs)
+        iterations += sol.nit
+        if free_mean:
+            mean = sol.mean
+        if "duplicate" in traces or "stopped" in traces or iterations >= maxiter or sol.nit == 0:
+            break
+
+        # energy in the tails of the trajectory and local residual
+        cache = Cache(Trajectory(np.copy(traj)), mean, sys, plans[no_modes])
+        res_func, _ = init_opt_funcs(cache, freq, plans[no_modes], sys, mean)
+        traj_vec = init_comp_vec(traj)
+        init_vec_funcs()[0](traj, traj_vec)
+        res_func(traj_vec)
+        traj_tail = traj_funcs.tail_energy(traj, tail)
+        res_tail = traj_funcs.tail_energy(cache.lr, tail)
+
+        # pick the new number of modes
+        if traj_tail > grow_tol or res_tail > res_grow_tol:
+            new_modes = min(int(np.ceil(factor*no_modes)), max_modes)
+        elif traj_tail < shrink_tol and res_tail <= tail:
+            new_modes = max(int(no_modes/factor), min_modes)
+        else:
+            new_modes = no_modes
+        if new_modes == no_modes:
+            if sol.nit < chunk_options['maxiter']:
+                break
+            continue
+
+        # resize the trajectory and resolvent modes
+        traj = traj_funcs.traj_resize(traj, new_modes)
+        if psi is not None and new_modes < no_modes:
+            psi = psi[:new_modes]
+        elif psi is not None:
+            if B is None:
+                raise ValueError("The forcing matrix B is needed to grow the resolvent modes!")
+            new_psi = resolvent_modes(resolvent(freq, range(no_modes, new_modes), sys.jacobian(mean), B), cut = np.shape(B)[1] - psi.shape[2])[0]
+            psi = np.concatenate([psi, new_psi[no_modes:]])
+        modes.append((iterations, new_modes))
+
+    traces["modes"] = modes
+    return traj, traces, sol
@@ -5,12 +5,14 @@ import warnings
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
+from .FFTPlans import FFTPlans
 from .TrajPlotObject import TrajPlotObject
 
-# catch warnings as if they are errors
-warnings.filterwarnings('error')
-
 def plot_single_traj(plot_object, ax = None, proj = None, show = False):
     """
         Plot a single trajectory on a provided matplotlib axis.
@@ -126,10 +128,13 @@ def plot_traj(*args, **kwargs):
     if save is not None:
         plt.savefig(save)
     else:
-        try:
-            plt.show()
-        except UserWarning:
-            plt.savefig('./temp.png')
+        # catch warnings as if they are errors, only while showing the plot
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UserWarning)
+            try:
+                plt.show()
+            except UserWarning:
+                plt.savefig('./temp.png')
 
 def plot_along_s(*args, **kwargs):
     """
@@ -175,3 +180,145 @@ def plot_along_s(*args, **kwargs):
     # add grid and show plot
     ax.grid()
     plt.show()
+
+def traj_curves(trajs, means = None, disc = None, max_points = None, flag = 'FFTW_ESTIMATE'):
+    """
+        Return the closed curves in the time domain of a number of
+        trajectories.
+
+        The inverse transforms are planned once for every distinct shape and
+        reused for all the trajectories sharing it.
+
+        Parameters
+        ----------
+        trajs : list of Trajectory
+        means : list of ndarray, default=None
+            The mean values for all the trajectories, None keeps the zeroth
+            mode of every trajectory.
+        disc : positive int, default=None
+            The discretisation resolution for all the trajectories, None uses
+            the native resolution of each trajectory.
+        max_points : positive int, default=None
+            Largest number of points per curve, the time domain samples are
+            decimated if there are more.
+        flag : str, default='FFTW_ESTIMATE'
+            FFTW flag to setup the transform plans.
+
+        Returns
+        -------
+        list of ndarray
+            2D arrays of shape [n + 1, d] with the first point repeated at the
+            end to close the curve.
+    """
+    if means is None:
+        means = [None]*len(trajs)
+
+    plans = {}
+    curves = []
+    for traj, mean in zip(trajs, means):
+        # plan the transform of the given resolution once
+        no_samples = 2*(traj.shape[0] - 1) if disc is None else max(disc, 2*(traj.shape[0] - 1))
+        key = (no_samples, traj.shape[1])
+        if key not in plans:
+            plans[key] = (FFTPlans(list(key), flag = flag), np.zeros([(no_samples >> 1) + 1, traj.shape[1]], dtype = complex), np.zeros(key))
+        fftplans, padded, time = plans[key]
+
+        # pad with zeros, add mean and convert to time domain
+        padded[:traj.shape[0]] = traj
+        padded[traj.shape[0]:] = 0
+        if mean is not None:
+            padded[0] = mean
+        fftplans.ifft(padded, time)
+
+        # decimate and close the curve
+        stride = 1 if max_points is None else -(-no_samples//max_points)
+        points = time[::stride]
+        curve = np.empty([points.shape[0] + 1, points.shape[1]])
+        curve[:-1] = points
+        curve[-1] = points[0]
+        curves.append(curve)
+
+    return curves
+
+def plot_traj_collection(trajs, **kwargs):
+    """
+        Plot a large number of trajectories on a single axis as one line
+        collection.
+
+        The figure is drawn without pyplot, so no interactive backend is needed
+        to render it to file.
+
+        Parameters
+        ----------
+        trajs : list of Trajectory
+        means : list of ndarray, default=None
+            The mean values for all the trajectories.
+        disc : positive int, default=None
+            The discretisation resolution for all the trajectories.
+        max_points : positive int, default=None
+            Largest number of points plotted per trajectory.
+        proj : {'xy', 'yx', 'xz', 'zx', 'yz', 'zy', None}, default=None
+            Projection of the trajectories in the plot.
+        ax : matplotlib.axes, default=None
+            Axis to plot the trajectories on, a new figure is created if not
+            given.
+        colors : color or list of colors, default=None
+        linewidth : positive float, default=0.5
+        alpha : float, default=None
+        title : str, default=None
+        aspect : positive float, default=None
+        save : str, default=None
+            File to save the figure to.
+        dpi : positive float, default=None
+
+        Returns
+        -------
+        matplotlib.figure.Figure
+    """
+    # unpack keyword arguments
+    proj = kwargs.get('proj', None)
+    ax = kwargs.get('ax', None)
+    colors = kwargs.get('colors', None)
+    linewidth = kwargs.get('linewidth', 0.5)
+    alpha = kwargs.get('alpha', None)
+    title = kwargs.get('title', None)
+    aspect = kwargs.get('aspect', None)
+    save = kwargs.get('save', None)
+    dpi = kwargs.get('dpi', None)
+
+    # convert to curves in the time domain
+    curves = traj_curves(trajs, means = kwargs.get('means', None), disc = kwargs.get('disc', None), max_points = kwargs.get('max_points', None))
+    dim = trajs[0].shape[1]
+    if dim > 3:
+        raise ValueError("Can't plot dimensions higher then 3!")
+    if dim == 3 and proj is not None:
+        comps = sorted('xyz'.index(char) for char in proj)
+        curves = [curve[:, comps] for curve in curves]
+        dim = 2
+
+    # initialise figure and axis
+    if ax is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(projection = '3d') if dim == 3 else fig.add_subplot()
+    else:
+        fig = ax.figure
+
+    # set title and aspect ratio
+    fig.suptitle(title)
+    if aspect is not None:
+        ax.set_aspect(aspect)
+
+    # add all the curves at once
+    if dim == 3:
+        ax.add_collection3d(Line3DCollection(curves, colors = colors, linewidths = linewidth, alpha = alpha))
+        points = np.concatenate(curves)
+        ax.auto_scale_xyz(points[:, 0], points[:, 1], points[:, 2])
+    else:
+        ax.add_collection(LineCollection(curves, colors = colors, linewidths = linewidth, alpha = alpha))
+        ax.autoscale_view()
+
+    if save is not None:
+        fig.savefig(save, dpi = dpi)
+
+    return fig
@@ -0,0 +1,39 @@
+# This file contains the definitions of the floating point precisions that can
+# be used for the arrays allocated during an optimisation.
+
+import numpy as np
+
+dtypes = {'double': (np.float64, np.complex128), 'single': (np.float32, np.complex64)}
+
+def real_dtype(precision):
+    """
+        Return the real data type for a given precision.
+
+        Parameters
+        ----------
+        precision : {'double', 'single'}
+
+        Returns
+        -------
+        type
+    """
+    return _dtypes(precision)[0]
+
+def complex_dtype(precision):
+    """
+        Return the complex data type for a given precision.
+
+        Parameters
+        ----------
+        precision : {'double', 'single'}
+
+        Returns
+        -------
+        type
+    """
+    return _dtypes(precision)[1]
+
+def _dtypes(precision):
+    if precision not in dtypes:
+        raise ValueError("Precision must be one of {}!".format(list(dtypes)))
+    return dtypes[precision]
@@ -5,7 +5,7 @@ import numpy as np
 
 from . import trajectory_functions as traj_funcs
 
-def local_residual(cache, sys, H_n_inv, fftplans):
+def local_residual(cache, sys, H_n_inv, fftplans, response = traj_funcs.traj_response):
     """
         Return the local residual of a trajectory in a state-space.
 
@@ -18,13 +18,15 @@ def local_residual(cache, sys, H_n_inv, fftplans):
         freq : flaot
         mean : ndarray
             1D array containing data of float type.
+        response : function, default=traj_response
+            Function evaluating the response of the trajectory.
         
         Returns
         -------
         local_res : Trajectory
     """
     # evaluate response and multiply by resolvent at every mode
-    traj_funcs.traj_response(cache.traj, fftplans, sys.nl_factor, cache.f, cache.tmp_t1)
+    response(cache.traj, fftplans, sys.nl_factor, cache.f, cache.tmp_t1)
 
     # evaluate local residual trajectory for all modes
     np.copyto(cache.lr, cache.traj.matmul_left_traj(H_n_inv) - cache.f)
@@ -34,6 +36,48 @@ def local_residual(cache, sys, H_n_inv, fftplans):
 
     return cache.lr
 
+def local_residual_reduced(cache, sys, H_n_inv_psi, fftplans, response = traj_funcs.traj_response):
+    """
+        Return the local residual of a trajectory given in the reduced
+        coordinates of a set of resolvent modes.
+
+        The linear part of the residual is applied directly to the reduced
+        trajectory through the precomputed product of the inverse resolvent
+        and the resolvent modes, the full space trajectory is only formed for
+        the nonlinear term.
+
+        Parameters
+        ----------
+        cache : Cache
+            Cache holding the reduced trajectory and the resolvent modes.
+        sys : file
+            File containing the necessary function definitions to define the
+            state-space.
+        H_n_inv_psi : Trajectory
+            Inverse resolvent multiplied by the resolvent modes at every mode.
+        fftplans : FFTPlans
+        response : function, default=traj_response
+            Function evaluating the response of the trajectory.
+
+        Returns
+        -------
+        local_res : Trajectory
+    """
+    # project reduced trajectory to the full space
+    np.einsum('ikl,il->ik', cache.psi, cache.red_traj, out = cache.traj)
+
+    # evaluate response in the full space
+    response(cache.traj, fftplans, sys.nl_factor, cache.f, cache.tmp_t1)
+
+    # evaluate local residual trajectory for all modes from reduced coordinates
+    np.einsum('ikl,il->ik', H_n_inv_psi, cache.red_traj, out = cache.lr)
+    np.subtract(cache.lr, cache.f, out = cache.lr)
+
+    # reassign the mean mode to the second constraint
+    cache.lr[0] = -cache.resp_mean - cache.f[0]
+
+    return cache.lr
+
 def global_residual(cache):
     """
         Return the global residual of a trajectory in a state-space.
@@ -56,7 +100,7 @@ def global_residual(cache):
     # sum and return real part
     return np.real(np.sum(cache.tmp_inner)).item()
 
-def gr_traj_grad(cache, sys, freq, mean, fftplans):
+def gr_traj_grad(cache, sys, freq, mean, fftplans, response2 = traj_funcs.traj_response2):
     """
         Return the gradient of the global residual with respect to a trajectory
         in state-space.
@@ -72,6 +116,8 @@ def gr_traj_grad(cache, sys, freq, mean, fftplans):
             1D array containing data of float type.
         conv_method : {'fft', 'sum'}, default='fft'
             Method to use for the convolution
+        response2 : function, default=traj_response2
+            Function evaluating the joint response of two trajectories.
         
         Returns
         -------
@@ -82,12 +128,41 @@ def gr_traj_grad(cache, sys, freq, mean, fftplans):
 
     # calculate jacobian residual convolution
     cache.traj[0] = mean
-    traj_funcs.traj_response2(cache.traj, cache.lr, fftplans, sys.jac_conv_adj, cache.tmp_conv, cache.tmp_t1, cache.tmp_t2)
+    response2(cache.traj, cache.lr, fftplans, sys.jac_conv_adj, cache.tmp_conv, cache.tmp_t1, cache.tmp_t2)
     cache.traj[0] = 0
 
     # calculate and return gradients w.r.t trajectory and frequency respectively
     return -freq*cache.lr_grad - cache.tmp_conv
 
+def gr_red_traj_grad(cache, sys, freq, mean, fftplans, response2 = traj_funcs.traj_response2):
+    """
+        Return the gradient of the global residual with respect to a
+        trajectory given in the reduced coordinates of a set of resolvent
+        modes.
+
+        Parameters
+        ----------
+        cache : Cache
+            Cache holding the reduced trajectory and the resolvent modes.
+        sys : file
+            File containing the necessary function definitions to define the
+            state-space.
+        freq : float
+        mean : ndarray
+            1D array containing data of float type.
+        fftplans : FFTPlans
+        response2 : function, default=traj_response2
+            Function evaluating the joint response of two trajectories.
+
+        Returns
+        -------
+        Trajectory
+    """
+    # project gradient w.r.t. the full space trajectory with the stored adjoint
+    np.einsum('ikl,il->ik', cache.psi_adj, gr_traj_grad(cache, sys, freq, mean, fftplans, response2 = response2), out = cache.red_traj_grad)
+
+    return cache.red_traj_grad
+
 def gr_freq_grad(traj, local_res):
     """
         Return the gradient of the global residual with respect to the
@@ -5,8 +5,9 @@ import numpy as np
 
 from .Trajectory import Trajectory
 from .trajectory_functions import transpose, conj
+from .precision import complex_dtype
 
-def resolvent_inv(no_modes, freq, jac_at_mean):
+def resolvent_inv(no_modes, freq, jac_at_mean, precision = 'double'):
     """
         Return the inverse resolvent array at a given number of modes.
 
@@ -17,6 +18,8 @@ def resolvent_inv(no_modes, freq, jac_at_mean):
         freq : float
         jac_at_mean : ndarray
             2D array containing data of float type.
+        precision : {'double', 'single'}, default='double'
+            Floating point precision of the returned array.
         
         Returns
         -------
@@ -31,7 +34,7 @@ def resolvent_inv(no_modes, freq, jac_at_mean):
     # set zero mode to zero
     resolvent_inv[0] = 0
 
-    return resolvent_inv
+    return resolvent_inv.astype(complex_dtype(precision), copy = False)
 
 def resolvent(freq, n, jac_at_mean, B):
     """
@@ -0,0 +1,350 @@
+# This file contains the function definitions to refine a periodic orbit with
+# Newton's method and to compute the sensitivities of its period and mean to the
+# parameters of the system with the adjoint of the harmonic balance equations.
+#
+# The unknowns of an orbit are z = (Re u_n, Im u_n for n >= 1, omega, mean), and
+# the equations G(z) = 0 are the harmonic balance of every mode
+# i*n*omega*u_n - f_n = 0 (real and imaginary parts for n >= 1, real part for
+# the mean), closed by the phase condition Im(u_1[c]) = 0.
+#
+# The Newton and adjoint systems are solved with GMRES, applying the Jacobian
+# and its transpose through the jac_conv and jac_conv_adj functions of the
+# system so that the Jacobian is never formed.
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, gmres
+
+from .Trajectory import Trajectory
+from .System import System
+from . import trajectory_functions as traj_funcs
+
+def phase_component(traj):
+    """Return the component of the first mode fixed by the phase condition."""
+    return int(np.argmax(np.abs(traj[1])))
+
+def orbit2vec(traj, freq, mean):
+    """Return the vector of unknowns of an orbit."""
+    return np.concatenate([np.ravel(traj[1:].real), np.ravel(traj[1:].imag), [freq], np.ravel(mean)])
+
+def vec2orbit(z, no_modes, dim):
+    """Return the trajectory, frequency and mean of a vector of unknowns."""
+    size = (no_modes - 1)*dim
+    traj = np.zeros([no_modes, dim], dtype = complex)
+    traj[1:] = np.reshape(z[:size] + 1j*z[size:2*size], (no_modes - 1, dim))
+    return Trajectory(traj), z[2*size], np.reshape(z[2*size + 1:], (1, dim))
+
+def orbit_residual(z, sys, no_modes, dim, comp):
+    """
+        Return the harmonic balance equations of an orbit.
+
+        Parameters
+        ----------
+        z : ndarray
+            1D array of the unknowns of the orbit.
+        sys : file or System
+        no_modes, dim : positive int
+            Shape of the trajectory.
+        comp : int
+            Component of the first mode fixed by the phase condition.
+
+        Returns
+        -------
+        ndarray
+            1D array containing data of float type.
+    """
+    traj, freq, mean = vec2orbit(z, no_modes, dim)
+    no_samples = 2*(no_modes - 1)
+    modes = np.copy(traj)
+    modes[0] = mean
+    curve = np.fft.irfft(modes*no_samples, n = no_samples, axis = 0)
+    response = np.zeros_like(curve)
+    sys.response(curve, response)
+    res = 1j*freq*np.arange(no_modes)[:, np.newaxis]*traj - np.fft.rfft(response, axis = 0)[:no_modes]/no_samples
+    return np.concatenate([np.ravel(res[1:].real), np.ravel(res[1:].imag), res[0].real, [traj[1, comp].imag]])
+
+def orbit_operator(z, sys, no_modes, dim, comp):
+    """
+        Return the Jacobian of the harmonic balance equations of an orbit as a
+        linear operator.
+
+        The products with the Jacobian and its transpose cost a few FFTs and a
+        call to the jac_conv or jac_conv_adj function of the system, so the
+        memory and time used grow linearly with the number of unknowns.
+
+        Parameters
+        ----------
+        z : ndarray
+            1D array of the unknowns of the orbit.
+        sys : file or System
+        no_modes, dim : positive int
+            Shape of the trajectory.
+        comp : int
+            Component of the first mode fixed by the phase condition.
+
+        Returns
+        -------
+        LinearOperator
+            Operator with matvec and rmatvec applying the Jacobian and its
+            transpose.
+    """
+    traj, freq, mean = vec2orbit(z, no_modes, dim)
+    no_samples = 2*(no_modes - 1)
+    size = (no_modes - 1)*dim
+    no_unknowns = 2*size + 1 + dim
+    n = np.arange(no_modes)[:, np.newaxis]
+    modes = np.copy(traj)
+    modes[0] = mean
+    curve = np.fft.irfft(modes*no_samples, n = no_samples, axis = 0)
+
+    # weights of the modes in the sums over the full spectrum
+    weights = np.full([no_modes, 1], 2.0)
+    weights[0] = 1
+    weights[-1] = 1
+
+    def matvec(v):
+        v = np.ravel(v)
+        d_modes = np.zeros([no_modes, dim], dtype = complex)
+        d_modes[1:] = np.reshape(v[:size] + 1j*v[size:2*size], (no_modes - 1, dim))
+        d_modes[0] = v[2*size + 1:]
+        d_curve = np.fft.irfft(d_modes*no_samples, n = no_samples, axis = 0)
+        d_response = np.zeros_like(d_curve)
+        sys.jac_conv(curve, d_curve, d_response)
+        d_res = 1j*n*(freq*d_modes + v[2*size]*traj) - np.fft.rfft(d_response, axis = 0)[:no_modes]/no_samples
+        return np.concatenate([np.ravel(d_res[1:].real), np.ravel(d_res[1:].imag), d_res[0].real, [v[size + comp]]])
+
+    def rmatvec(w):
+        w = np.ravel(w)
+        w_modes = np.zeros([no_modes, dim], dtype = complex)
+        w_modes[1:] = np.reshape(w[:size] + 1j*w[size:2*size], (no_modes - 1, dim))
+        w_modes[0] = w[2*size:2*size + dim]
+
+        # transpose of the response term, through the adjoint of the FFTs
+        w_curve = np.fft.irfft(w_modes/weights, n = no_samples, axis = 0)
+        w_response = np.zeros_like(w_curve)
+        sys.jac_conv_adj(curve, w_curve, w_response)
+        g_modes = -weights*np.fft.rfft(w_response, axis = 0)[:no_modes]
+        g_modes[-1].imag = 0
+
+        # transpose of the time derivative and phase condition
+        g_modes[1:] -= 1j*freq*n[1:]*w_modes[1:]
+        g_freq = np.sum((np.conj(w_modes[1:])*1j*n[1:]*traj[1:]).real)
+        g = np.concatenate([np.ravel(g_modes[1:].real), np.ravel(g_modes[1:].imag), [g_freq], g_modes[0].real])
+        g[size + comp] += w[-1]
+        return g
+
+    return LinearOperator((no_unknowns, no_unknowns), matvec = matvec, rmatvec = rmatvec, dtype = float)
+
+def _orbit_preconditioner(z, sys, no_modes, dim):
+    """
+        Return an approximate inverse of the Jacobian of an orbit, the
+        resolvent of every mode about the mean, as a linear operator mapping
+        the equations to the unknowns.
+    """
+    _, freq, mean = vec2orbit(z, no_modes, dim)
+    size = (no_modes - 1)*dim
+    no_unknowns = 2*size + 1 + dim
+    jacobian = np.reshape(sys.jacobian(mean), (dim, dim))
+    n = np.arange(1, no_modes)[:, np.newaxis, np.newaxis]
+    resolvents = np.linalg.pinv(1j*freq*n*np.eye(dim) - jacobian)
+    mean_inverse = np.linalg.pinv(-jacobian)
+
+    def matvec(r):
+        r = np.ravel(r)
+        r_modes = np.reshape(r[:size] + 1j*r[size:2*size], (no_modes - 1, dim))
+        d_modes = np.einsum('nij,nj->ni', resolvents, r_modes)
+        return np.concatenate([np.ravel(d_modes.real), np.ravel(d_modes.imag), r[-1:], mean_inverse @ r[2*size:2*size + dim]])
+
+    def rmatvec(g):
+        g = np.ravel(g)
+        g_modes = np.reshape(g[:size] + 1j*g[size:2*size], (no_modes - 1, dim))
+        w_modes = np.einsum('nji,nj->ni', np.conj(resolvents), g_modes)
+        return np.concatenate([np.ravel(w_modes.real), np.ravel(w_modes.imag), mean_inverse.T @ g[2*size + 1:], g[2*size:2*size + 1]])
+
+    return LinearOperator((no_unknowns, no_unknowns), matvec = matvec, rmatvec = rmatvec, dtype = float)
+
+def _krylov_solve(operator, rhs, preconditioner, rtol):
+    """Return the solution of a linear system with GMRES and its exit code."""
+    options = {'atol': 0, 'restart': min(rhs.shape[0], 100), 'maxiter': 20, 'M': preconditioner}
+    try:
+        return gmres(operator, rhs, rtol = rtol, **options)
+    except TypeError:
+        # older versions of SciPy name the relative tolerance tol
+        return gmres(operator, rhs, tol = rtol, **options)
+
+def orbit_jacobian(z, sys, no_modes, dim, comp):
+    """
+        Return the Jacobian of the harmonic balance equations of an orbit with
+        respect to its unknowns as a dense matrix.
+
+        The linearisation of the response is evaluated for all the unknowns at
+        once by applying the jac_conv function of the system to the curves of
+        every unit perturbation. The matrix has (2*(M - 1)*d + 1 + d)^2
+        entries for M modes of dimension d and factorising it costs
+        O((M*d)^3), so it is only meant for testing and small problems, see
+        orbit_operator for the matrix-free version used by the solvers.
+
+        Returns
+        -------
+        ndarray
+            2D array containing data of float type.
+    """
+    traj, freq, mean = vec2orbit(z, no_modes, dim)
+    no_samples = 2*(no_modes - 1)
+    size = (no_modes - 1)*dim
+    no_unknowns = 2*size + 1 + dim
+    n = np.arange(no_modes)[:, np.newaxis]
+
+    # unit perturbations of the modes, real parts, imaginary parts then mean
+    perturbations = np.zeros([2*size + dim, no_modes, dim], dtype = complex)
+    index = np.arange(size)
+    perturbations[index, 1 + index//dim, index % dim] = 1
+    perturbations[size + index, 1 + index//dim, index % dim] = 1j
+    perturbations[2*size + np.arange(dim), 0, np.arange(dim)] = 1
+
+    # linearised response to every perturbation
+    modes = np.copy(traj)
+    modes[0] = mean
+    curve = np.fft.irfft(modes*no_samples, n = no_samples, axis = 0)
+    curves = np.fft.irfft(perturbations*no_samples, n = no_samples, axis = 1)
+    responses = np.zeros([curves.shape[0]*no_samples, dim])
+    sys.jac_conv(np.tile(curve, (curves.shape[0], 1)), curves.reshape(-1, dim), responses)
+    responses = np.fft.rfft(responses.reshape(curves.shape), axis = 1)[:, :no_modes]/no_samples
+    res = 1j*freq*n*perturbations - responses
+
+    # assemble the columns in the order of the unknowns
+    jacobian = np.zeros([no_unknowns, no_unknowns])
+    mode_columns = np.r_[np.arange(2*size), 2*size + 1 + np.arange(dim)]
+    jacobian[:size, mode_columns] = np.reshape(res[:, 1:].real, (-1, size)).T
+    jacobian[size:2*size, mode_columns] = np.reshape(res[:, 1:].imag, (-1, size)).T
+    jacobian[2*size:2*size + dim, mode_columns] = res[:, 0].real.T
+    freq_column = 1j*n*traj
+    jacobian[:size, 2*size] = np.ravel(freq_column[1:].real)
+    jacobian[size:2*size, 2*size] = np.ravel(freq_column[1:].imag)
+    jacobian[-1, size + comp] = 1
+    return jacobian
+
+def refine_orbit(traj, freq, sys, mean, tol = 1e-10, max_iter = 20):
+    """
+        Return a periodic orbit refined with Newton's method, solving for its
+        modes, frequency and mean together.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        freq : float
+        sys : file or System
+        mean : ndarray
+        tol : float, default=1e-10
+            Largest norm of the harmonic balance equations.
+        max_iter : positive int, default=20
+
+        Returns
+        -------
+        traj : Trajectory
+            The refined trajectory, shifted so that its phase condition holds.
+        freq : float
+        mean : ndarray
+        residual : float
+            Norm of the harmonic balance equations.
+        converged : bool
+            Whether the norm of the equations is below tol, False if the
+            iterations ran out or no step along the Newton direction decreased
+            it, in which case the last accepted orbit is returned.
+    """
+    no_modes, dim = traj.shape
+    comp = phase_component(traj)
+    traj = traj_funcs.traj_shift(traj, -np.angle(traj[1, comp]))
+    z = orbit2vec(traj, freq, mean)
+    res = orbit_residual(z, sys, no_modes, dim, comp)
+    norm = np.linalg.norm(res)
+
+    for _ in range(max_iter):
+        if norm <= tol:
+            break
+        step, _ = _krylov_solve(orbit_operator(z, sys, no_modes, dim, comp), -res, _orbit_preconditioner(z, sys, no_modes, dim), 1e-12)
+
+        # halve the step until the equations decrease
+        for _ in range(30):
+            res_new = orbit_residual(z + step, sys, no_modes, dim, comp)
+            if np.linalg.norm(res_new) < norm:
+                break
+            step /= 2
+        else:
+            break
+        z += step
+        res = res_new
+        norm = np.linalg.norm(res)
+
+    traj, freq, mean = vec2orbit(z, no_modes, dim)
+    return traj, freq, mean, norm, norm <= tol
+
+def orbit_sensitivities(traj, freq, sys, mean, parameters = None, step = 1e-6):
+    """
+        Return the sensitivities of the period and mean of a periodic orbit to
+        the parameters of the system.
+
+        A single adjoint solve per observable, with GMRES applying the
+        transpose of the Jacobian of the harmonic balance equations, gives its
+        sensitivity to all the parameters at once. The derivatives of the equations with respect to
+        the parameters are taken by central differences at the fixed orbit,
+        which needs no further optimisation.
+
+        Parameters
+        ----------
+        traj : Trajectory
+            Converged trajectory, see refine_orbit.
+        freq : float
+        sys : file or System
+        mean : ndarray
+        parameters : list of str, default=None
+            Names of the parameters, None uses all the parameters of the
+            system.
+        step : float, default=1e-6
+            Relative step of the central differences.
+
+        Returns
+        -------
+        dict
+            Dictionary of the form {'period': {name: float},
+            'mean': {name: ndarray}} with the derivative of each observable
+            with respect to each parameter.
+
+        Raises
+        ------
+        RuntimeError
+            If an adjoint solve does not converge.
+    """
+    sys = System(sys)
+    no_modes, dim = traj.shape
+    comp = phase_component(traj)
+    traj = traj_funcs.traj_shift(traj, -np.angle(traj[1, comp]))
+    z = orbit2vec(traj, freq, mean)
+    if parameters is None:
+        parameters = list(sys.parameters)
+
+    # derivatives of the equations with respect to the parameters
+    res_p = np.zeros([z.shape[0], len(parameters)])
+    for index, name in enumerate(parameters):
+        h = step*max(1.0, abs(sys.parameters[name]))
+        res_plus = orbit_residual(z, System(sys, {name: sys.parameters[name] + h}), no_modes, dim, comp)
+        res_minus = orbit_residual(z, System(sys, {name: sys.parameters[name] - h}), no_modes, dim, comp)
+        res_p[:, index] = (res_plus - res_minus)/(2*h)
+
+    # gradients of the observables with respect to the unknowns
+    freq_index = 2*(no_modes - 1)*dim
+    observables = np.zeros([z.shape[0], 1 + dim])
+    observables[freq_index, 0] = -2*np.pi/freq**2
+    observables[freq_index + 1 + np.arange(dim), 1 + np.arange(dim)] = 1
+
+    # adjoint solve for every observable
+    operator = orbit_operator(z, sys, no_modes, dim, comp)
+    preconditioner = _orbit_preconditioner(z, sys, no_modes, dim)
+    adjoints = np.zeros_like(observables)
+    for index in range(observables.shape[1]):
+        adjoints[:, index], info = _krylov_solve(operator.H, observables[:, index], preconditioner.H, 1e-12)
+        if info != 0:
+            raise RuntimeError("The adjoint equations did not converge!")
+    sensitivities = -adjoints.T @ res_p
+
+    return {'period': {name: sensitivities[0, index] for index, name in enumerate(parameters)},
+            'mean': {name: sensitivities[1:, index] for index, name in enumerate(parameters)}}
@@ -0,0 +1,207 @@
+# This file contains the function definitions to compute the Floquet exponents
+# of periodic orbits from the harmonic balance (Hill) form of the variational
+# equations, for a batch of orbits at once.
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import eigs
+
+def jacobian_modes(trajs, sys, means, no_samples):
+    """
+        Return the Fourier modes of the Jacobian along a batch of orbits.
+
+        The Jacobian is evaluated column by column by applying the jac_conv
+        function of the system to unit vectors.
+
+        Parameters
+        ----------
+        trajs : list of Trajectory
+            Trajectories all sharing the same shape [M, d].
+        sys : file or System
+        means : list of ndarray
+        no_samples : positive int
+            Number of samples over the period, at least 2*(M - 1).
+
+        Returns
+        -------
+        ndarray
+            4D array of shape [B, no_samples, d, d] of complex type, holding
+            the mode k of the Jacobian at index k modulo no_samples.
+    """
+    no_orbits = len(trajs)
+    no_modes, dim = trajs[0].shape
+
+    # evaluate all the orbits in the time domain
+    padded = np.zeros([no_orbits, (no_samples >> 1) + 1, dim], dtype = complex)
+    for index, (traj, mean) in enumerate(zip(trajs, means)):
+        padded[index, :no_modes] = traj
+        padded[index, 0] = np.ravel(mean)
+    curves = np.fft.irfft(padded*no_samples, n = no_samples, axis = 1).reshape(-1, dim)
+
+    # evaluate the jacobian one column at a time
+    jac_t = np.zeros([no_orbits*no_samples, dim, dim])
+    unit = np.zeros_like(curves)
+    column = np.zeros_like(curves)
+    for j in range(dim):
+        unit[:] = 0
+        unit[:, j] = 1
+        sys.jac_conv(curves, unit, column)
+        jac_t[:, :, j] = column
+
+    return np.fft.fft(jac_t.reshape(no_orbits, no_samples, dim, dim), axis = 1)/no_samples
+
+def hill_matrices(trajs, freqs, sys, means, harmonics = None):
+    """
+        Return the Hill matrices of a batch of orbits.
+
+        A perturbation exp(lambda*t)*p(t) with p periodic of harmonics -K to K
+        solves the variational equations if lambda is an eigenvalue of the
+        Hill matrix with blocks H[n, m] = J_(n - m) - i*n*omega*I.
+
+        Parameters
+        ----------
+        trajs : list of Trajectory
+            Trajectories all sharing the same shape [M, d].
+        freqs : list of float
+        sys : file or System
+        means : list of ndarray
+        harmonics : positive int, default=None
+            Number of harmonics K, None uses M - 1.
+
+        Returns
+        -------
+        ndarray
+            3D array of shape [B, (2K + 1)*d, (2K + 1)*d] of complex type.
+    """
+    no_modes, dim = trajs[0].shape
+    harmonics = no_modes - 1 if harmonics is None else harmonics
+    no_samples = 2*(2*harmonics + no_modes)
+    jac_f = jacobian_modes(trajs, sys, means, no_samples)
+
+    # gather the blocks from the difference of the harmonics
+    n = np.arange(-harmonics, harmonics + 1)
+    blocks = jac_f[:, (n[:, np.newaxis] - n[np.newaxis, :]) % no_samples]
+    size = (2*harmonics + 1)*dim
+    hill = np.ascontiguousarray(np.transpose(blocks, (0, 1, 3, 2, 4))).reshape(len(trajs), size, size)
+
+    # subtract the time derivative on the diagonal
+    diag = np.arange(size)
+    hill[:, diag, diag] -= 1j*np.outer(freqs, np.repeat(n, dim))
+    return hill
+
+def select_exponents(eigvals, eigvecs, freq, harmonics, dim):
+    """
+        Return the Floquet exponents among the eigenvalues of a Hill matrix.
+
+        Every exponent appears shifted by all multiples of i*omega, the
+        representative kept is the one whose eigenvector is centred on the
+        zeroth harmonic, skipping the shifted copies (same exponent with the
+        centre at another harmonic) of the exponents already kept. The
+        imaginary parts are then folded into [-omega/2, omega/2].
+
+        Returns
+        -------
+        ndarray
+            1D array of length d of complex type, sorted by decreasing real
+            part, padded with nan if fewer than d exponents are found.
+    """
+    weights = np.sum(np.abs(eigvecs.reshape(2*harmonics + 1, dim, -1))**2, axis = 1)
+    centroids = np.arange(-harmonics, harmonics + 1) @ weights/np.sum(weights, axis = 0)
+    folded = eigvals - 1j*freq*np.round(eigvals.imag/freq)
+
+    # keep the most centred eigenvalues which are not copies of each other
+    kept = []
+    for index in np.argsort(np.abs(centroids), kind = 'stable'):
+        if all(abs(folded[index] - folded[other]) > 1e-6*max(1, abs(folded[index])) or abs(centroids[index] - centroids[other]) < 0.5 for other in kept):
+            kept.append(index)
+        if len(kept) == dim:
+            break
+
+    exponents = np.full(dim, np.nan, dtype = complex)
+    exponents[:len(kept)] = folded[kept]
+    return exponents[np.argsort(-exponents.real, kind = 'stable')]
+
+def floquet_exponents(trajs, freqs, sys, means, harmonics = None, method = 'dense', **kwargs):
+    """
+        Return the Floquet exponents of a batch of periodic orbits.
+
+        Parameters
+        ----------
+        trajs : Trajectory or list of Trajectory
+            Converged trajectories, all sharing the same shape [M, d].
+        freqs : float or list of float
+        sys : file or System
+        means : ndarray or list of ndarray
+        harmonics : positive int, default=None
+            Number of harmonics K of the Hill matrices, None uses M - 1.
+        method : {'dense', 'sparse'}, default='dense'
+            Dense batched eigenvalue decompositions, or a shift-invert Krylov
+            solver (ARPACK) on sparse Hill matrices for large numbers of
+            harmonics, which only resolves the exponents among the eigenvalues
+            closest to the shift (the others are returned as nan).
+        bandwidth : positive int, default=M - 1
+            Harmonics of the Jacobian kept in the sparse Hill matrices.
+        no_eigs : positive int, default=10*d
+            Number of eigenvalues computed by the sparse solver.
+        sigma : float, default=0.01*omega
+            Shift of the sparse solver, away from the zero exponent of
+            autonomous systems.
+
+        Returns
+        -------
+        ndarray
+            2D array of shape [B, d] of complex type, the exponents of every
+            orbit sorted by decreasing real part (1D if a single orbit is
+            given).
+    """
+    single = not isinstance(trajs, (list, tuple))
+    if single:
+        trajs, freqs, means = [trajs], [freqs], [means]
+    elif not hasattr(freqs, '__len__'):
+        freqs = [freqs]*len(trajs)
+    if isinstance(means, np.ndarray):
+        means = [means]*len(trajs)
+    no_modes, dim = trajs[0].shape
+    harmonics = no_modes - 1 if harmonics is None else harmonics
+
+    if method == 'dense':
+        eigvals, eigvecs = np.linalg.eig(hill_matrices(trajs, freqs, sys, means, harmonics = harmonics))
+        exponents = np.array([select_exponents(eigvals[b], eigvecs[b], freqs[b], harmonics, dim) for b in range(len(trajs))])
+
+    elif method == 'sparse':
+        bandwidth = min(kwargs.get('bandwidth', no_modes - 1), 2*harmonics)
+        size = (2*harmonics + 1)*dim
+        no_eigs = min(kwargs.get('no_eigs', 10*dim), size - 2)
+        no_samples = 2*(2*harmonics + no_modes)
+        jac_f = jacobian_modes(trajs, sys, means, no_samples)
+        n = np.arange(-harmonics, harmonics + 1)
+        exponents = []
+        for b, freq in enumerate(freqs):
+            hill = sparse.kron(sparse.diags(-1j*freq*n), sparse.identity(dim), format = 'csc')
+            for k in range(-bandwidth, bandwidth + 1):
+                hill += sparse.kron(sparse.eye(2*harmonics + 1, k = -k), jac_f[b, k % no_samples], format = 'csc')
+            eigvals, eigvecs = eigs(hill, k = no_eigs, sigma = kwargs.get('sigma', 0.01*freq))
+            exponents.append(select_exponents(eigvals, eigvecs, freq, harmonics, dim))
+        exponents = np.array(exponents)
+
+    else:
+        raise ValueError("Method must be 'dense' or 'sparse'!")
+
+    return exponents[0] if single else exponents
+
+def floquet_multipliers(exponents, freqs):
+    """
+        Return the Floquet multipliers exp(lambda*T) of Floquet exponents.
+
+        Parameters
+        ----------
+        exponents : ndarray
+            Exponents of shape [B, d], or [d] for a single orbit.
+        freqs : float or list of float
+
+        Returns
+        -------
+        ndarray
+    """
+    periods = 2*np.pi/np.asarray(freqs, dtype = float)
+    return np.exp(exponents*(periods[..., np.newaxis] if periods.ndim != 0 else periods))
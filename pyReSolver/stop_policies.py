@@ -0,0 +1,166 @@
+# This file contains the class definitions for the policies deciding when an
+# optimisation is unpromising enough to be stopped early, either from its own
+# residual trace or by comparison with the other runs of a multistart search.
+
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+class StopPolicy(ABC):
+    """
+        Base class of the stopping policies.
+
+        A policy is shared by all the runs of a search, each run calls
+        new_run once to get its own check, which is called after every
+        iteration with the iteration number and residual and returns whether
+        or not the run should stop.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def new_run(self):
+        """Return the check of a new run."""
+
+class StagnationPolicy(StopPolicy):
+    """
+        Stop a run once its residual has decreased by less than a relative
+        tolerance over a window of iterations.
+
+        Attributes
+        ----------
+        window : positive int
+            Number of iterations over which the decrease is measured.
+        rtol : float
+            Smallest relative decrease of the residual over the window.
+        min_iter : int
+            Number of iterations before a run can be stopped.
+    """
+
+    def __init__(self, window = 50, rtol = 1e-2, min_iter = 0):
+        super().__init__()
+        self.window = window
+        self.rtol = rtol
+        self.min_iter = min_iter
+
+    def new_run(self):
+        history = deque(maxlen = self.window + 1)
+        def check(iteration, residual):
+            history.append(residual)
+            if iteration < self.min_iter or len(history) <= self.window:
+                return False
+            return residual > (1 - self.rtol)*history[0]
+        return check
+
+class RacingPolicy(StopPolicy):
+    """
+        Stop a run once its residual is larger than a margin times the lowest
+        residual any run has reached by the same iteration.
+
+        Attributes
+        ----------
+        margin : float
+            Largest ratio of the residual of a run to the best residual.
+        min_iter : int
+            Number of iterations before a run can be stopped.
+        records : list of float
+            Lowest residual of any run at every iteration.
+    """
+
+    def __init__(self, margin = 10.0, min_iter = 20):
+        super().__init__()
+        self.margin = margin
+        self.min_iter = min_iter
+        self.records = []
+
+        # tree of the minima of ranges of records, so that recording a
+        # residual and finding the best one by an iteration are logarithmic
+        self._tree = [np.inf]*17
+
+    @property
+    def best(self):
+        """Lowest residual reached by any run by every iteration."""
+        return list(np.minimum.accumulate(self.records)) if len(self.records) != 0 else []
+
+    def _grow(self, size):
+        # double the capacity of the tree and rebuild it from the records
+        capacity = len(self._tree) - 1
+        while capacity < size:
+            capacity <<= 1
+        tree = [np.inf] + self.records + [np.inf]*(capacity - len(self.records))
+        for i in range(1, capacity + 1):
+            j = i + (i & -i)
+            if j <= capacity and tree[i] < tree[j]:
+                tree[j] = tree[i]
+        self._tree = tree
+
+    def _record(self, iteration, residual):
+        if iteration >= len(self.records):
+            self.records.extend([np.inf]*(iteration + 1 - len(self.records)))
+            if len(self.records) >= len(self._tree):
+                self._grow(len(self.records))
+        if residual < self.records[iteration]:
+            self.records[iteration] = residual
+            i = iteration + 1
+            while i < len(self._tree):
+                if residual < self._tree[i]:
+                    self._tree[i] = residual
+                i += i & -i
+
+    def _best(self, iteration):
+        best = np.inf
+        i = iteration + 1
+        while i > 0:
+            if self._tree[i] < best:
+                best = self._tree[i]
+            i -= i & -i
+        return best
+
+    def new_run(self):
+        def check(iteration, residual):
+            with self.lock:
+                self._record(iteration, residual)
+                best = self._best(iteration)
+            return iteration >= self.min_iter and residual > self.margin*best
+        return check
+
+class SuccessiveHalvingPolicy(StopPolicy):
+    """
+        Stop a run at a rung (a given iteration) unless its residual is among
+        the lowest fraction of the residuals recorded at that rung by all the
+        runs so far, as in asynchronous successive halving.
+
+        Attributes
+        ----------
+        rungs : list of int
+            Iterations at which the runs are compared.
+        keep : float
+            Fraction of the runs that continue past every rung.
+        min_population : positive int
+            Number of residuals recorded at a rung before any run is stopped
+            there.
+        results : dict
+            Residuals recorded at every rung.
+    """
+
+    def __init__(self, rungs = (25, 50, 100, 200, 400), keep = 0.5, min_population = 4):
+        super().__init__()
+        self.rungs = list(rungs)
+        self.keep = keep
+        self.min_population = min_population
+        self.results = {rung: [] for rung in self.rungs}
+
+    def new_run(self):
+        def check(iteration, residual):
+            if iteration not in self.results:
+                return False
+            with self.lock:
+                results = self.results[iteration]
+                results.append(residual)
+                rank = sum(result < residual for result in results)
+                population = len(results)
+            return population >= self.min_population and rank >= max(1, int(np.ceil(self.keep*population)))
+        return check
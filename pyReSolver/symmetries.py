@@ -0,0 +1,80 @@
+# This file contains the function definitions to restrict a trajectory to the
+# subspace of trajectories invariant under a discrete symmetry of the system.
+#
+# A symmetry is described by the sign change of each component of the state,
+# e.g. (-1, -1, 1) for (x, y, z) -> (-x, -y, z) in the Lorenz system. An orbit
+# is invariant if applying the symmetry is the same as shifting it by half a
+# period, which in the frequency domain means that component i of mode n is
+# zero unless sign_i*(-1)^n = 1.
+
+import numpy as np
+
+def symmetry_signs(sys, symmetry):
+    """
+        Return the sign change of each component for a symmetry.
+
+        Parameters
+        ----------
+        sys : file or System
+            File or System defining the symmetries of the state-space in its
+            symmetries dictionary.
+        symmetry : str or tuple of int
+            Name of the symmetry, or the sign changes themselves.
+
+        Returns
+        -------
+        ndarray
+            1D array containing data of int type.
+    """
+    if isinstance(symmetry, str):
+        symmetries = getattr(sys, 'symmetries', {})
+        if symmetry not in symmetries:
+            raise ValueError("System has no symmetry named '{}'!".format(symmetry))
+        symmetry = symmetries[symmetry]
+    return np.array(symmetry, dtype = int)
+
+def symmetric_modes(signs, no_modes):
+    """
+        Return which elements of a trajectory are allowed to be non-zero for
+        it to be invariant under a symmetry.
+
+        Parameters
+        ----------
+        signs : ndarray
+            1D array containing data of int type.
+        no_modes : positive int
+            Number of modes of the trajectory.
+
+        Returns
+        -------
+        ndarray
+            2D array of boolean type with the shape of the trajectory.
+    """
+    parity = 1 - 2*(np.arange(no_modes) % 2)
+    return np.outer(parity, signs) == 1
+
+def reduced_symmetric_modes(psi, signs, tol = 1e-10):
+    """
+        Return which elements of a reduced trajectory are allowed to be
+        non-zero for the full trajectory to be invariant under a symmetry.
+
+        A reduced coordinate is allowed if its column of psi has (relative to
+        its norm) no support on the components that must be zero, coordinates
+        mixing both kinds of components are fixed to zero.
+
+        Parameters
+        ----------
+        psi : ndarray
+            3D array of shape [M, d, r] containing data of complex type.
+        signs : ndarray
+        tol : float, default=1e-10
+
+        Returns
+        -------
+        ndarray
+            2D array of boolean type with the shape of the reduced trajectory.
+    """
+    forbidden = ~symmetric_modes(signs, psi.shape[0])
+    norms = np.linalg.norm(psi, axis = 1)
+    leak = np.sqrt(np.einsum('ik,ikl->il', forbidden, np.abs(psi)**2))
+    return leak <= tol*norms
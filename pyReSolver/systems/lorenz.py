@@ -6,42 +6,49 @@ import numpy as np
 # define parameters
 parameters = {'rho': 28.0, 'beta': 8/3, 'sigma': 10.0}
 
-def response(x, out, defaults = parameters):
+# define symmetries as the sign change of each component, (x, y, z) -> (-x, -y, z)
+symmetries = {'z2': (-1, -1, 1)}
+
+def response(x, out, parameters = parameters):
     # assign response
-    np.copyto(out[:, 0], defaults['sigma']*(x[:, 1] - x[:, 0]))
-    np.copyto(out[:, 1], (defaults['rho']*x[:, 0]) - x[:, 1] - (x[:, 0]*x[:, 2]))
-    np.copyto(out[:, 2], (x[:, 0]*x[:, 1]) - (defaults['beta']*x[:, 2]))
+    np.copyto(out[:, 0], parameters['sigma']*(x[:, 1] - x[:, 0]))
+    np.copyto(out[:, 1], (parameters['rho']*x[:, 0]) - x[:, 1] - (x[:, 0]*x[:, 2]))
+    np.copyto(out[:, 2], (x[:, 0]*x[:, 1]) - (parameters['beta']*x[:, 2]))
 
-def jacobian(x, defaults = parameters):
+def jacobian(x, parameters = parameters):
     # initialise jacobian matrix
     jacobian = np.zeros([np.shape(x)[0], np.shape(x)[1], np.shape(x)[1]])
 
     # compute jacobian elements
-    jacobian[:, 0, 0] = -defaults['sigma']
-    jacobian[:, 0, 1] = defaults['sigma']
-    jacobian[:, 1, 0] = defaults['rho'] - x[:, 2]
+    jacobian[:, 0, 0] = -parameters['sigma']
+    jacobian[:, 0, 1] = parameters['sigma']
+    jacobian[:, 1, 0] = parameters['rho'] - x[:, 2]
     jacobian[:, 1, 1] = -1
     jacobian[:, 1, 2] = -x[:, 0]
     jacobian[:, 2, 0] = x[:, 1]
     jacobian[:, 2, 1] = x[:, 0]
-    jacobian[:, 2, 2] = -defaults['beta']
+    jacobian[:, 2, 2] = -parameters['beta']
 
     return np.squeeze(jacobian)
 
-def nl_factor(x, out, defaults = parameters):
+def nl_factor(x, out, parameters = parameters):
     # assign values
     out[:, 0] = 0
     np.copyto(out[:, 1], -x[:, 0]*x[:, 2])
     np.copyto(out[:, 2], x[:, 0]*x[:, 1])
 
-def jac_conv(x, r, out, defaults = parameters):
+def nl_term(x, xp = np, parameters = parameters):
+    # pure version of nl_factor for array libraries without in-place updates
+    return xp.stack([xp.zeros_like(x[:, 0]), -x[:, 0]*x[:, 2], x[:, 0]*x[:, 1]], axis = 1)
+
+def jac_conv(x, r, out, parameters = parameters):
     # compute response
-    np.copyto(out[:, 0], -defaults['sigma']*r[:, 0] + defaults['sigma']*r[:, 1])
-    np.copyto(out[:, 1],(defaults['rho'] - x[:, 2])*r[:, 0] - r[:, 1] - x[:, 0]*r[:, 2])
-    np.copyto(out[:, 2], x[:, 1]*r[:, 0] + x[:, 0]*r[:, 1] - defaults['beta']*r[:, 2])
+    np.copyto(out[:, 0], -parameters['sigma']*r[:, 0] + parameters['sigma']*r[:, 1])
+    np.copyto(out[:, 1],(parameters['rho'] - x[:, 2])*r[:, 0] - r[:, 1] - x[:, 0]*r[:, 2])
+    np.copyto(out[:, 2], x[:, 1]*r[:, 0] + x[:, 0]*r[:, 1] - parameters['beta']*r[:, 2])
 
-def jac_conv_adj(x, r, out, defaults = parameters):
+def jac_conv_adj(x, r, out, parameters = parameters):
     # compute response
-    np.copyto(out[:, 0], -defaults['sigma']*r[:, 0] + (defaults['rho']- x[:, 2])*r[:, 1] + x[:, 1]*r[:, 2])
-    np.copyto(out[:, 1], defaults['sigma']*r[:, 0] - r[:, 1] + x[:, 0]*r[:, 2])
-    np.copyto(out[:, 2], -x[:, 0]*r[:, 1] - defaults['beta']*r[:, 2])
+    np.copyto(out[:, 0], -parameters['sigma']*r[:, 0] + (parameters['rho']- x[:, 2])*r[:, 1] + x[:, 1]*r[:, 2])
+    np.copyto(out[:, 1], parameters['sigma']*r[:, 0] - r[:, 1] + x[:, 0]*r[:, 2])
+    np.copyto(out[:, 2], -x[:, 0]*r[:, 1] - parameters['beta']*r[:, 2])
@@ -7,6 +7,9 @@ import numpy as np
 # define optional arguments
 parameters = {'mu': 0.0}
 
+# define symmetries as the sign change of each component, (x, y) -> (-x, -y)
+symmetries = {'z2': (-1, -1)}
+
 def response(x, out, parameters = parameters):
     # assign response
     np.copyto(out[:, 0], x[:, 1])
@@ -28,6 +31,10 @@ def nl_factor(x, out, parameters = parameters):
     out[:, 0] = 0
     np.copyto(out[:, 1], -parameters['mu']*(x[:, 0]**2)*x[:, 1])
 
+def nl_term(x, xp = np, parameters = parameters):
+    # pure version of nl_factor for array libraries without in-place updates
+    return xp.stack([xp.zeros_like(x[:, 0]), -parameters['mu']*(x[:, 0]**2)*x[:, 1]], axis = 1)
+
 def jac_conv(x, r, out, parameters = parameters):
     # compute response
     np.copyto(out[:, 0], r[:, 1])
@@ -6,6 +6,9 @@ import numpy as np
 # define optional arguments
 parameters = {'mu': 0.0, 'r': 1.0}
 
+# define symmetries as the sign change of each component, (x, y) -> (-x, -y)
+symmetries = {'z2': (-1, -1)}
+
 def response(x, out, parameters = parameters):
     # assign response
     np.copyto(out[:, 0], x[:, 1] + (parameters['mu']*x[:, 0])*(parameters['r'] - np.sqrt((x[:, 0]**2) + (x[:, 1]**2))))
@@ -30,6 +33,11 @@ def nl_factor(x, out, parameters = parameters):
     np.copyto(out[:, 0], -parameters['mu']*x[:, 0]*r)
     np.copyto(out[:, 1], parameters['mu']*x[:, 1]*r)
 
+def nl_term(x, xp = np, parameters = parameters):
+    # pure version of nl_factor for array libraries without in-place updates
+    r = xp.sqrt((x[:, 0]**2)+(x[:, 1]**2))
+    return xp.stack([-parameters['mu']*x[:, 0]*r, parameters['mu']*x[:, 1]*r], axis = 1)
+
 def jac_conv(x, r, out, parameters = parameters):
     # compute response
     r = np.sqrt((x[0]**2) + (x[1]**2))
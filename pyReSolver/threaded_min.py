@@ -0,0 +1,96 @@
+# This file contains the function definitions to run several optimisations
+# concurrently on a pool of threads within a single process.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .FFTPlans import FFTPlans
+from .System import System
+from .my_min import minimiseResidual
+
+_local = threading.local()
+
+def thread_plans(shape, flag = 'FFTW_EXHAUSTIVE', precision = 'double'):
+    """
+        Return the FFTW plans owned by the calling thread for a given shape.
+
+        Every thread keeps its own plans (and with them its own scratch
+        buffers), which are created on first use and reused afterwards.
+
+        Parameters
+        ----------
+        shape : list of int
+            Shape of the trajectory in the time domain.
+        flag : str, default="FFTW_EXHAUSTIVE"
+            FFTW flag to setup the transform plans.
+        precision : {'double', 'single'}, default='double'
+            Floating point precision of the transform plans.
+
+        Returns
+        -------
+        FFTPlans
+    """
+    if not hasattr(_local, 'plans'):
+        _local.plans = {}
+    key = (tuple(shape), flag, precision)
+    if key not in _local.plans:
+        _local.plans[key] = FFTPlans(list(shape), flag = flag, precision = precision)
+    return _local.plans[key]
+
+def minimiseResidualThreaded(trajs, freqs, sys, mean, **kwargs):
+    """
+        Return the results of minimising the global residual for a number of
+        initial trajectories, running the optimisations on a thread pool.
+
+        Each run gets its own cache, FFTW plans and system parameters, so the
+        runs share no mutable state. FFTW and NumPy release the GIL for the
+        heavy operations, allowing the runs to proceed in parallel.
+
+        Parameters
+        ----------
+        trajs : list of Trajectory
+        freqs : float or list of float
+        sys : file, System or list of System
+            The system definition, either shared by all runs or one per run.
+        mean : ndarray
+            1D array containing data of float type.
+        parameters : list of dict, default=None
+            Per-run parameter overrides for the system.
+        max_workers : positive int, default=None
+            Number of threads in the pool, None uses the executor default.
+        **kwargs
+            Keyword arguments passed to minimiseResidual for every run, except
+            plans and traces which are always per-run.
+
+        Returns
+        -------
+        list of tuple
+            The (op_traj, traces, sol) output of minimiseResidual for each
+            initial trajectory, in order.
+    """
+    # unpack keyword arguments
+    parameters = kwargs.pop('parameters', None)
+    max_workers = kwargs.pop('max_workers', None)
+    if 'plans' in kwargs or 'traces' in kwargs:
+        raise ValueError("Plans and traces cannot be shared between threads!")
+    flag = kwargs.get('flag', 'FFTW_EXHAUSTIVE')
+    precision = 'single' if kwargs.get('precision', 'double') == 'single' else 'double'
+
+    # broadcast per-run arguments
+    if not hasattr(freqs, '__len__'):
+        freqs = [freqs]*len(trajs)
+    if not isinstance(sys, (list, tuple)):
+        sys = [sys]*len(trajs)
+    if parameters is None:
+        systems = [System(run_sys) for run_sys in sys]
+    else:
+        systems = [System(run_sys, run_params) for run_sys, run_params in zip(sys, parameters)]
+
+    # define the work done by each thread
+    def run(traj, freq, run_sys):
+        plans = thread_plans([(traj.shape[0] - 1) << 1, traj.shape[1]], flag = flag, precision = precision)
+        return minimiseResidual(traj, freq, run_sys, mean, plans = plans, **kwargs)
+
+    # map the runs over the pool
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(run, trajs, freqs, systems))
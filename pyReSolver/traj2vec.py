@@ -4,6 +4,15 @@
 import numpy as np
 
 def init_comp_vec(traj):
+    """
+        Return an empty optimisation vector for a trajectory.
+
+        The vector is always of double precision, also for single precision
+        plans and caches, as the SciPy optimisers convert their variables to
+        double precision anyway. Only the transforms and residual evaluations
+        run in single precision, the conversions to and from the vector cast
+        between the two.
+    """
     return np.zeros([2*traj.shape[1]*(traj.shape[0] - 1)])
 
 def traj2vec(traj, vec):
@@ -58,3 +67,154 @@ def vec2traj(traj, vec):
     np.copyto(traj[1:], real_comps + 1j*imag_comps)
 
     return traj
+
+def traj_view(traj):
+    """
+        Return a real view of the non-zero modes of a trajectory.
+
+        The real and imaginary parts of each element are interleaved, so the
+        view shares memory with the trajectory and has the same length as
+        the vector returned by init_comp_vec.
+
+        Parameters
+        ----------
+        traj : Trajectory
+            C-contiguous trajectory.
+
+        Returns
+        -------
+        ndarray
+            1D array containing data of float type.
+    """
+    return traj[1:].view(np.ndarray).view(traj.real.dtype).reshape(-1)
+
+def traj2vec_interleaved(traj, vec):
+    """
+        Copy a trajectory into a vector with interleaved real and imaginary
+        parts, this is a no-op if the vector is the view of the trajectory.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        vec : ndarray
+            1D array containing data of float type.
+    """
+    view = traj_view(np.ascontiguousarray(traj))
+    if not np.may_share_memory(view, vec):
+        np.copyto(vec, view)
+
+def vec2traj_interleaved(traj, vec):
+    """
+        Copy a vector with interleaved real and imaginary parts into a
+        trajectory, this is a no-op if the vector is the view of the
+        trajectory.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        vec : ndarray
+            1D array containing data of float type.
+
+        Returns
+        -------
+        Trajectory
+    """
+    view = traj_view(traj)
+    if not np.may_share_memory(view, vec):
+        np.copyto(view, vec)
+
+    return traj
+
+def init_vec_mask(free, layout = 'block'):
+    """
+        Return the mask of the free elements of an optimisation vector.
+
+        Parameters
+        ----------
+        free : ndarray
+            2D array of boolean or complex type with the shape of the
+            trajectory, the real and imaginary parts of an element are free if
+            they are non-zero (a boolean element frees both).
+        layout : {'block', 'interleaved'}, default='block'
+
+        Returns
+        -------
+        ndarray
+            1D array of boolean type with the length of the full vector.
+    """
+    free = np.asarray(free)
+    if free.dtype == bool:
+        free = free*(1 + 1j)
+    free = np.ascontiguousarray(free, dtype = complex)
+    full = init_comp_vec(free)
+    init_vec_funcs(layout)[0](free, full)
+    return full != 0
+
+def init_vec_funcs(layout = 'block', mask = None, scale = None):
+    """
+        Return the functions converting between trajectories and optimisation
+        vectors for a given vector layout.
+
+        Parameters
+        ----------
+        layout : {'block', 'interleaved'}, default='block'
+            Whether the vector stores all the real parts followed by all the
+            imaginary parts, or interleaves them as in memory.
+        mask : ndarray, default=None
+            1D array of boolean type from init_vec_mask, if given the vector
+            only holds the free elements and all the other elements of the
+            trajectory are set to zero.
+        scale : ndarray, default=None
+            1D array of positive float type with a scale for every mode, if
+            given the vector holds the modes divided by their scale.
+
+        Returns
+        -------
+        traj2vec, vec2traj : function
+    """
+    if layout == 'block':
+        funcs = traj2vec, vec2traj
+    elif layout == 'interleaved':
+        funcs = traj2vec_interleaved, vec2traj_interleaved
+    else:
+        raise ValueError("Vector layout must be 'block' or 'interleaved'!")
+    if mask is not None:
+        funcs = masked_vec_funcs(*funcs, mask)
+    if scale is not None:
+        funcs = scaled_vec_funcs(*funcs, scale)
+    return funcs
+
+def masked_vec_funcs(full_traj2vec, full_vec2traj, mask):
+    """Return the vector functions only keeping the free elements of a mask."""
+    # scratch vectors with the full length, one per direction
+    full_out = np.zeros(mask.shape[0])
+    full_in = np.zeros(mask.shape[0])
+
+    def masked_traj2vec(traj, vec):
+        full_traj2vec(traj, full_out)
+        np.compress(mask, full_out, out = vec)
+
+    def masked_vec2traj(traj, vec):
+        full_in[mask] = vec
+        return full_vec2traj(traj, full_in)
+
+    return masked_traj2vec, masked_vec2traj
+
+def scaled_vec_funcs(unscaled_traj2vec, unscaled_vec2traj, scale):
+    """Return the vector functions dividing every mode by its scale."""
+    scale = np.asarray(scale)[:, np.newaxis]
+    scratch = {}
+
+    def scaled_traj2vec(traj, vec):
+        # divide a copy so the trajectory is left untouched
+        if traj.shape not in scratch:
+            scratch[traj.shape] = np.zeros_like(traj)
+        np.divide(traj, scale, out = scratch[traj.shape])
+        unscaled_traj2vec(scratch[traj.shape], vec)
+
+    def scaled_vec2traj(traj, vec):
+        unscaled_vec2traj(traj, vec)
+        np.multiply(traj, scale, out = traj)
+        return traj
+
+    return scaled_traj2vec, scaled_vec2traj
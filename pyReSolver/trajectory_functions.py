@@ -51,6 +51,61 @@ def traj_grad(traj, out):
     """
     np.copyto(out, np.transpose(np.tile(1j*np.arange(traj.shape[0]), (traj.shape[1], 1)))*traj)
 
+def traj_shift(traj, shift):
+    """
+        Return a trajectory shifted along its own length.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        shift : float
+            Shift of the curve parameter s, mode n is multiplied by
+            exp(i*n*shift).
+
+        Returns
+        -------
+        Trajectory
+    """
+    return traj*np.exp(1j*shift*np.arange(traj.shape[0]))[:, np.newaxis]
+
+def traj_resize(traj, no_modes):
+    """
+        Return a trajectory truncated or padded with zeros to a number of
+        modes.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        no_modes : positive int
+
+        Returns
+        -------
+        Trajectory
+    """
+    new_traj = np.zeros_like(traj, shape = (no_modes, *traj.shape[1:]))
+    new_traj[:min(no_modes, traj.shape[0])] = traj[:no_modes]
+    return new_traj
+
+def tail_energy(traj, tail = 0.1):
+    """
+        Return the fraction of the energy of a trajectory (excluding its mean)
+        held in its highest modes.
+
+        Parameters
+        ----------
+        traj : Trajectory
+        tail : float, default=0.1
+            Fraction of the modes making up the tail, at least one mode.
+
+        Returns
+        -------
+        float
+    """
+    energy = np.sum(np.abs(np.asarray(traj[1:]))**2, axis = tuple(range(1, traj.ndim)))
+    no_tail = max(1, int(np.ceil(tail*energy.shape[0])))
+    total = np.sum(energy)
+    return float(np.sum(energy[-no_tail:])/total) if total != 0 else 0.0
+
 def traj_response(traj, fftplans, func, new_traj, tmp_curve):
     """
         Return the response of a trajectory over its length due to a function.
@@ -1,4 +1,6 @@
 from .rfft import rfft, irfft_even, irfft_odd
 from .init_random_trajectory import generateRandomTrajectory
 from .func2curve import func2curve
+from .curve2Trajectory import curve2Trajectory
+from .recurrenceSeeds import integrateSystem, findRecurrences, recurrenceSeeds
 from .initialiseModes import initialiseModes
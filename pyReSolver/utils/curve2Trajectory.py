@@ -0,0 +1,41 @@
+# This file contains a utility function to convert a sampled time series of a
+# closed curve directly into a Trajectory.
+
+import numpy as np
+
+from ..Trajectory import Trajectory
+from ..FFTPlans import FFTPlans
+
+def curve2Trajectory(curve, modes = None, plans = None, flag = 'FFTW_ESTIMATE'):
+    """
+        Return the Trajectory of a curve sampled at equally spaced locations
+        over a single period.
+
+        Parameters
+        ----------
+        curve : ndarray
+            2D array of shape [N, d] containing data of float type.
+        modes : positive int, default=None
+            Number of modes of the output, truncating or zero-padding the
+            spectrum, None keeps all the (N >> 1) + 1 modes.
+        plans : FFTPlans, default=None
+            Plans for the shape of the curve, created if not given. Pass them
+            in to reuse them over several curves of the same shape.
+        flag : str, default='FFTW_ESTIMATE'
+            FFTW flag used to plan the transform if no plans are given.
+
+        Returns
+        -------
+        Trajectory
+    """
+    curve = np.asarray(curve, dtype = float)
+    if plans is None:
+        plans = FFTPlans(list(curve.shape), flag = flag)
+    freq = np.zeros([(curve.shape[0] >> 1) + 1, curve.shape[1]], dtype = complex)
+    plans.fft(freq, curve)
+    if modes is not None:
+        if modes <= freq.shape[0]:
+            freq = freq[:modes]
+        else:
+            freq = np.concatenate([freq, np.zeros([modes - freq.shape[0], curve.shape[1]], dtype = complex)])
+    return Trajectory(freq)
@@ -3,15 +3,21 @@
 
 import numpy as np
 
-def func2curve(traj_func, modes, if_freq = True):
+def func2curve(traj_func, modes, if_freq = True, vectorised = False):
     """
         Return the array of a function evaluated at a number of locations.
 
         Parameters
         ----------
         traj_func : function
+            Function of the curve parameter s, either evaluated at a single
+            location or vectorised (1D array of s in, [N, d] array out).
         modes : int
             The number of modes for the FFT of the output array.
+        vectorised : bool, default=False
+            Whether traj_func is vectorised, in which case it is evaluated on
+            the whole parameter array at once and must return an array of
+            shape [N, d].
         
         Returns
         -------
@@ -24,12 +30,23 @@ def func2curve(traj_func, modes, if_freq = True):
     else:
         disc = modes
 
-    # initialise the output array and the parameter of the curve
-    traj_array = np.zeros([disc, *np.shape(traj_func(0))])
+    # initialise the parameter of the curve
     s = np.linspace(0, 2*np.pi*(1 - 1/disc), disc)
 
+    # evaluate the function on all locations at once
+    if vectorised:
+        traj_array = np.asarray(traj_func(s), dtype = float)
+        if traj_array.ndim != 2 or traj_array.shape[0] != disc:
+            raise ValueError("Vectorised function must return an array of shape [N, d]!")
+        return traj_array
+
+    # initialise the output array
+    first = traj_func(s[0])
+    traj_array = np.zeros([disc, *np.shape(first)])
+    traj_array[0] = first
+
     # loop over the parameter of the curve evaluating the function
-    for i in range(disc):
+    for i in range(1, disc):
         traj_array[i, :] = traj_func(s[i])
 
     return traj_array
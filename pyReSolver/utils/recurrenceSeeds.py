@@ -0,0 +1,165 @@
+# This file contains the utility functions to generate initial trajectories for
+# an optimisation from the near-recurrences of a time-integrated solution of the
+# dynamical system.
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .curve2Trajectory import curve2Trajectory
+
+def integrateSystem(system, x0, dt, steps, transient = 0):
+    """
+        Return the time series of a batch of initial conditions integrated
+        with the classical fourth order Runge-Kutta scheme.
+
+        The whole batch is advanced at once through the (vectorised) response
+        function of the system.
+
+        Parameters
+        ----------
+        system : file or System
+            File or System containing the response function of the system.
+        x0 : ndarray
+            1D or 2D array of shape [B, d] of initial conditions.
+        dt : positive float
+            Time step of the integration.
+        steps : positive int
+            Number of time steps stored in the output.
+        transient : int, default=0
+            Number of time steps discarded before the output is stored.
+
+        Returns
+        -------
+        ndarray
+            3D array of shape [B, steps, d] containing data of float type.
+    """
+    x = np.array(x0, dtype = float, ndmin = 2)
+    k1, k2, k3, k4, tmp = [np.zeros_like(x) for _ in range(5)]
+    series = np.zeros([x.shape[0], steps, x.shape[1]])
+
+    for i in range(transient + steps):
+        if i >= transient:
+            series[:, i - transient] = x
+        system.response(x, k1)
+        np.add(x, 0.5*dt*k1, out = tmp)
+        system.response(tmp, k2)
+        np.add(x, 0.5*dt*k2, out = tmp)
+        system.response(tmp, k3)
+        np.add(x, dt*k3, out = tmp)
+        system.response(tmp, k4)
+        x += (dt/6)*(k1 + 2*k2 + 2*k3 + k4)
+
+    return series
+
+def findRecurrences(series, dt, min_period, max_period, tol = 0.05, stride = 1):
+    """
+        Return the near-recurrences of a time series ranked by closure error.
+
+        A KD-tree of the time series is queried for every pair of points closer
+        than the tolerance and separated by a time lag within the given range.
+        Each close approach keeps only the lag of minimum distance, provided it
+        is not cut short by the end of the series or the range of periods, and
+        of the recurrences with the same period (to within one time step) only
+        the best one is kept.
+
+        Parameters
+        ----------
+        series : ndarray
+            2D array of shape [T, d] containing data of float type.
+        dt : positive float
+            Time step of the time series.
+        min_period, max_period : positive float
+            Range of periods searched for.
+        tol : positive float, default=0.05
+            Largest closure error, relative to the root-mean-square distance of
+            the time series from its mean.
+        stride : positive int, default=1
+            Spacing of the starting points that are searched.
+
+        Returns
+        -------
+        list of tuple
+            The (start, lag, error) of every recurrence, with the start index
+            and lag in time steps, in order of increasing error.
+    """
+    scale = np.sqrt(np.mean(np.sum((series - np.mean(series, axis = 0))**2, axis = 1)))
+    min_lag = max(int(np.ceil(min_period/dt)), 1)
+    max_lag = int(np.floor(max_period/dt))
+
+    # find every close pair of points
+    starts = np.arange(0, series.shape[0] - min_lag, stride)
+    pairs = cKDTree(series[starts]).sparse_distance_matrix(cKDTree(series), tol*scale, output_type = 'ndarray')
+    i = starts[pairs['i']]
+    lag = pairs['j'] - i
+    keep = (lag >= min_lag) & (lag <= max_lag)
+    i, lag, error = i[keep], lag[keep], pairs['v'][keep]/scale
+    if i.size == 0:
+        return []
+
+    # keep the lag of minimum distance of every close approach
+    order = np.lexsort((lag, i))
+    i, lag, error = i[order], lag[order], error[order]
+    approach = np.cumsum(np.r_[True, (np.diff(i) != 0) | (np.diff(lag) != 1)])
+    order = np.lexsort((error, approach))
+    first = order[np.r_[True, np.diff(approach[order]) != 0]]
+    i, lag, error = i[first], lag[first], error[first]
+    keep = (i + lag < series.shape[0] - 1) & (lag > min_lag) & (lag < max_lag)
+    i, lag, error = i[keep], lag[keep], error[keep]
+
+    # keep the best recurrence of every period
+    recurrences = []
+    taken = set()
+    for index in np.argsort(error, kind = 'stable'):
+        if not taken.intersection(range(lag[index] - 1, lag[index] + 2)):
+            taken.add(lag[index])
+            recurrences.append((int(i[index]), int(lag[index]), float(error[index])))
+    return recurrences
+
+def recurrenceSeeds(system, x0, dt, steps, modes, min_period, max_period, **kwargs):
+    """
+        Return initial trajectories for an optimisation from the near-
+        recurrences of a time-integrated solution of a dynamical system.
+
+        Parameters
+        ----------
+        system : file or System
+        x0 : ndarray
+            1D or 2D array of shape [B, d] of initial conditions, each one is
+            integrated and searched independently.
+        dt : positive float
+        steps : positive int
+        modes : positive int
+            Number of modes of the output trajectories.
+        min_period, max_period : positive float
+        transient : int, default=0
+            Number of time steps discarded before the search.
+        tol : positive float, default=0.05
+        stride : positive int, default=1
+        max_seeds : positive int, default=None
+            Largest number of seeds returned, None returns all of them.
+
+        Returns
+        -------
+        list of tuple
+            The (traj, period, mean, error) of every seed in order of
+            increasing closure error, with the mean of the trajectory (of
+            shape [1, d]) held separately from traj. The fundamental frequency
+            for the optimisation is 2*pi/period.
+    """
+    # unpack keyword arguments
+    transient = kwargs.get('transient', 0)
+    tol = kwargs.get('tol', 0.05)
+    stride = kwargs.get('stride', 1)
+    max_seeds = kwargs.get('max_seeds', None)
+
+    # integrate and search every initial condition
+    seeds = []
+    for series in integrateSystem(system, x0, dt, steps, transient = transient):
+        for start, lag, error in findRecurrences(series, dt, min_period, max_period, tol = tol, stride = stride):
+            traj = curve2Trajectory(series[start:start + lag], modes = modes)
+            mean = np.array(np.real(traj[:1]))
+            traj[0] = 0
+            seeds.append((traj, lag*dt, mean, error))
+
+    seeds.sort(key = lambda seed: seed[3])
+    return seeds[:max_seeds]
@@ -1,9 +1,24 @@
 import unittest
 
+from tests.TestCampaignStore import TestCampaignStore
+from tests.TestCli import TestCli
+from tests.TestCluster import TestCluster
 from tests.TestFFTPlans import TestFFTPlans
 from tests.TestInitOptFuncs import TestInitOptFuncs
+from tests.TestJaxBackend import TestJaxBackend
+from tests.TestLBFGS import TestLBFGS
+from tests.TestMinimiseResidual import TestMinimiseResidual
+from tests.TestOrbitLibrary import TestOrbitLibrary
+from tests.TestPlotTraj import TestPlotTraj
+from tests.TestPackageImport import TestPackageImport
 from tests.TestResidualFunctions import TestResidualFunctions
 from tests.TestResolventModes import TestResolventModes
+from tests.TestSensitivity import TestSensitivity
+from tests.TestSharedArrays import TestSharedArrays
+from tests.TestStability import TestStability
+from tests.TestStopPolicies import TestStopPolicies
+from tests.TestSymmetries import TestSymmetries
+from tests.TestSystem import TestSystem
 from tests.TestTraj2Vec import TestTraj2Vec
 from tests.TestTrajectoryFunctions import TestTrajectoryFunctions
 from tests.TestTrajectoryMethods import TestTrajectoryMethods
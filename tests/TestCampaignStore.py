@@ -0,0 +1,105 @@
+# This file contains the unit tests for the SQLite store of the tasks and
+# results of a campaign.
+
+import os
+import shutil
+import tempfile
+import unittest
+import random as rand
+from multiprocessing import get_context
+
+import numpy as np
+
+import pyReSolver
+
+def claim_all(store, worker):
+    claimed = []
+    while True:
+        task = store.claim(worker)
+        if task is None:
+            return claimed
+        claimed.append(task['id'])
+
+class TestCampaignStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'campaign.db')
+        self.store = pyReSolver.CampaignStore(self.path)
+        self.tasks = [(seed, period, {'rho': rho}) for seed in range(5) for period in [1.5, 2.5] for rho in [24.0, 28.0]]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+        del self.directory
+        del self.path
+        del self.store
+        del self.tasks
+
+    def test_add_tasks(self):
+        self.assertEqual(self.store.add_tasks(self.tasks), len(self.tasks))
+        self.assertEqual(self.store.add_tasks(self.tasks[:3] + [(10, 1.0, None)]), 1)
+        self.assertEqual(self.store.counts()['pending'], len(self.tasks) + 1)
+
+    def test_concurrent_claims(self):
+        self.store.add_tasks(self.tasks)
+        with get_context('spawn').Pool(3) as pool:
+            claimed = pool.starmap(claim_all, [(self.store, str(worker)) for worker in range(3)])
+
+        # every task claimed by exactly one worker
+        ids = sorted(id for worker_ids in claimed for id in worker_ids)
+        self.assertEqual(ids, list(range(1, len(self.tasks) + 1)))
+        self.assertEqual(self.store.counts()['running'], len(self.tasks))
+
+    def test_resume(self):
+        self.store.add_tasks(self.tasks)
+        traj = pyReSolver.utils.generateRandomTrajectory(3, 10)
+        mean = np.array([[0, 0, 23.64]])
+        for _ in range(3):
+            task = self.store.claim()
+            self.store.complete(task['id'], traj, 2*np.pi/task['period'], mean, rand.uniform(0, 1), 10, 0.1)
+        self.store.claim()
+
+        # a restart skips the completed tasks and requeues the interrupted one
+        self.store.close()
+        self.store = pyReSolver.CampaignStore(self.path)
+        self.store.add_tasks(self.tasks)
+        self.assertEqual(self.store.requeue(), 1)
+        self.assertEqual(self.store.counts(), {'pending': len(self.tasks) - 3, 'running': 0, 'done': 3, 'failed': 0})
+        self.assertEqual(len(claim_all(self.store, None)), len(self.tasks) - 3)
+
+        # results are sorted and their trajectories stored
+        results = self.store.results()
+        self.assertEqual([result['residual'] for result in results], sorted(result['residual'] for result in results))
+        traj_load, freq, mean_load = self.store.load(results[0]['id'])
+        self.assertEqual(traj_load, traj)
+        self.assertEqual(freq, 2*np.pi/results[0]['period'])
+        self.assertTrue(np.array_equal(mean_load, mean))
+        with self.assertRaises(KeyError):
+            self.store.load(len(self.tasks))
+
+    def test_stale_worker(self):
+        self.store.add_tasks(self.tasks[:1])
+        traj = pyReSolver.utils.generateRandomTrajectory(3, 10)
+        mean = np.array([[0, 0, 23.64]])
+        task = self.store.claim('a')
+
+        # the task of a worker presumed lost is claimed by another one
+        self.assertEqual(self.store.requeue(), 1)
+        self.assertEqual(self.store.claim('b')['id'], task['id'])
+        self.assertFalse(self.store.complete(task['id'], 2*traj, 1.0, mean, 0.5, 10, 0.1, worker = 'a'))
+        self.assertFalse(self.store.fail(task['id'], 'error', worker = 'a'))
+        self.assertEqual(self.store.counts()['running'], 1)
+
+        # only the worker holding the task can finish it, and only once
+        self.assertTrue(self.store.complete(task['id'], traj, 2.0, mean, 0.1, 10, 0.1, worker = 'b'))
+        self.assertFalse(self.store.complete(task['id'], 2*traj, 1.0, mean, 0.5, 10, 0.1, worker = 'a'))
+        self.assertFalse(self.store.fail(task['id'], 'error', worker = 'b'))
+        self.assertEqual(self.store.counts()['done'], 1)
+        self.assertEqual(self.store.results()[0]['residual'], 0.1)
+        self.assertEqual(self.store.load(task['id'])[:2], (traj, 2.0))
+        self.assertEqual(os.listdir(self.store.directory), ['task_{}.npz'.format(task['id'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# This file contains the unit tests for the command-line campaign runner.
+
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+import pyReSolver
+
+from pyReSolver.cli import main, load_config, run
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'campaign.json')
+        self.config = {'system': 'lorenz', 'parameters': {'rho': 28.0}, 'mean': [[0, 0, 23.64]],
+                       'periods': {'min': 1.5, 'max': 2.5, 'count': 2}, 'seeds': 2, 'modes': 8,
+                       'options': {'maxiter': 5}, 'flag': 'FFTW_ESTIMATE'}
+        with open(self.path, 'w') as file:
+            json.dump(self.config, file)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        del self.directory
+        del self.path
+        del self.config
+
+    def test_run(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(main(['run', self.path, '--workers', '2']), 0)
+        self.assertIn('done: 4', output.getvalue())
+
+        # resuming runs nothing and keeps the stored results
+        store = pyReSolver.CampaignStore(os.path.join(self.directory, 'campaign.db'))
+        results = store.results()
+        store.close()
+        self.assertEqual(len(results), 4)
+        config = load_config(self.path)
+        self.assertEqual(run(config), {'pending': 0, 'running': 0, 'done': 4, 'failed': 0})
+        store = pyReSolver.CampaignStore(config['store'])
+        self.assertEqual(store.results(), results)
+        store.close()
+
+    def test_toml(self):
+        path = os.path.join(self.directory, 'campaign.toml')
+        with open(path, 'w') as file:
+            file.write("system = 'lorenz'\n"
+                       "mean = [[0, 0, 23.64]]\n"
+                       "modes = 8\n"
+                       "flag = 'FFTW_ESTIMATE'\n"
+                       "[parameters]\n"
+                       "rho = 28.0\n"
+                       "[periods]\n"
+                       "min = 1.5\n"
+                       "max = 2.5\n"
+                       "count = 2\n"
+                       "[options]\n"
+                       "maxiter = 5\n")
+
+        # same configuration as the JSON file, stored next to the TOML file
+        config = load_config(path)
+        json_config = load_config(self.path)
+        for key in ['system', 'parameters', 'mean', 'periods', 'modes', 'options', 'flag', 'method']:
+            self.assertEqual(config[key], json_config[key])
+        self.assertEqual(config['seeds'], 1)
+        self.assertEqual(config['store'], os.path.join(self.directory, 'campaign.db'))
+        self.assertEqual(run(config)['done'], 2)
+
+    def test_psi(self):
+        config = load_config(self.path)
+        config['psi'] = {'B': [[0, 0], [-1, 0], [0, 1]]}
+        config['sweep'] = [{}, {'rho': 24.0}]
+        self.assertEqual(run(config)['done'], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
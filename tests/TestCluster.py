@@ -0,0 +1,103 @@
+# This file contains the unit tests for the distributed execution of campaigns
+# on a local cluster of worker processes.
+
+import unittest
+import random as rand
+from concurrent.futures import Future
+
+import numpy as np
+
+import pyReSolver
+
+class TestCluster(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cluster = pyReSolver.LocalCluster(no_workers = 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.cluster.close()
+
+    def setUp(self):
+        self.sys = pyReSolver.systems.lorenz
+        self.mean = np.array([[0, 0, 23.64]])
+        self.freq = (2*np.pi)/rand.uniform(1.5, 3.5)
+        self.trajs = [pyReSolver.utils.generateRandomTrajectory(3, rand.randint(5, 15)) for _ in range(4)]
+        for traj in self.trajs:
+            traj[0] = 0
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.freq
+        del self.trajs
+
+    def test_map(self):
+        parameters = [{'rho': rand.uniform(20, 30)} for _ in self.trajs]
+        options = {'maxiter': 5}
+        results = self.cluster.map(self.trajs, self.freq, self.sys, self.mean, parameters = parameters, flag = 'FFTW_ESTIMATE', options = options)
+
+        # same results as running in sequence
+        self.assertEqual(len(results), len(self.trajs))
+        for traj, run_params, (op_traj, traces, sol) in zip(self.trajs, parameters, results):
+            op_traj_true, _, sol_true = pyReSolver.minimiseResidual(traj, self.freq, pyReSolver.System(self.sys, run_params), self.mean, flag = 'FFTW_ESTIMATE', options = options)
+            self.assertAlmostEqual(sol.fun, sol_true.fun)
+            self.assertTrue(np.allclose(op_traj, op_traj_true))
+
+        # the shared data is released with the campaign
+        self.assertEqual(self.cluster.scheduler.campaigns, {})
+
+    def test_worker_loss(self):
+        cluster = pyReSolver.LocalCluster(no_workers = 2)
+        try:
+            # tasks sent to the lost worker are resubmitted to the other one
+            cluster.processes[0].terminate()
+            cluster.processes[0].join()
+            results = cluster.map(self.trajs, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+            self.assertEqual(len(results), len(self.trajs))
+        finally:
+            cluster.close()
+
+    def test_all_workers_lost(self):
+        cluster = pyReSolver.LocalCluster(no_workers = 1, worker_timeout = 1.0)
+        try:
+            # the tasks fail instead of waiting forever for a worker
+            cluster.processes[0].terminate()
+            cluster.processes[0].join()
+            with self.assertRaises(RuntimeError):
+                cluster.map(self.trajs, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+            self.assertEqual(cluster.scheduler.campaigns, {})
+        finally:
+            cluster.close()
+
+    def test_unpicklable(self):
+        # rejected before anything is queued
+        with self.assertRaises(ValueError):
+            self.cluster.scheduler.submit(self.trajs, self.freq, self.sys, self.mean, callback = lambda *args: None)
+        self.assertEqual(self.cluster.scheduler.campaigns, {})
+
+        # a task that cannot be sent fails on its own and keeps the workers
+        futures = self.cluster.scheduler.submit(self.trajs[:1], self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+        futures[0].result()
+        scheduler = self.cluster.scheduler
+        with scheduler.lock:
+            scheduler.pending[-1] = 1
+            scheduler.campaigns[-1] = {'module': 'pyReSolver.systems.lorenz', 'parameters': {}, 'mean': self.mean, 'kwargs': {}}
+        future = Future()
+        scheduler.tasks.put((-1, 0, (self.trajs[0], self.freq, lambda: None), future, 0))
+        with self.assertRaises(RuntimeError):
+            future.result(timeout = 30)
+        self.assertEqual(scheduler.campaigns, {})
+        self.assertEqual(scheduler.workers, 2)
+        results = self.cluster.map(self.trajs[:2], self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+        self.assertEqual(len(results), 2)
+
+    def test_error(self):
+        futures = self.cluster.scheduler.submit(self.trajs[:1], self.freq, self.sys, self.mean, method = 'not a method')
+        with self.assertRaises(RuntimeError):
+            futures[0].result()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -81,6 +81,21 @@ class TestFFTPlans(unittest.TestCase):
         plans.ifft(delta_f, tmp_t)
         self.assertTrue(np.allclose(tmp_t, delta_t))
 
+    def test_single(self):
+        plans = pyReSolver.FFTPlans(self.shape, flag = self.flag, precision = 'single')
+        self.assertEqual(plans.tmp_t.dtype, np.float32)
+        self.assertEqual(plans.tmp_f.dtype, np.complex64)
+        randt = np.random.rand(*self.shape).astype(np.float32)
+        randf = np.zeros(self.shapef, dtype = np.complex64)
+        plans.fft(randf, randt)
+        self.assertEqual(randf.dtype, np.complex64)
+        self.assertTrue(np.allclose(randf, np.fft.rfft(randt, axis = 0)/np.shape(randt)[0], atol = 1e-5))
+        tmp_t = np.zeros_like(randt)
+        plans.ifft(randf, tmp_t)
+        self.assertTrue(np.allclose(tmp_t, randt, atol = 1e-5))
+        with self.assertRaises(ValueError):
+            pyReSolver.FFTPlans(self.shape, flag = self.flag, precision = 'half')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -144,6 +144,59 @@ class TestInitOptFuncs(unittest.TestCase):
         self.assertEqual(gr_traj_t2s1, gr_traj_t2s1_true)
         self.assertEqual(gr_traj_t3s2, gr_traj_t3s2_true)
 
+    def test_reduced(self):
+        # generate resolvent modes and a reduced trajectory
+        B = np.array([[0, 0], [-1, 0], [0, 1]])
+        psi = pyReSolver.resolvent_modes(pyReSolver.resolvent(self.freq3, range(self.traj3.shape[0]), self.sys2.jacobian(self.mean3), B))[0]
+        red_traj = pyReSolver.Trajectory(np.random.rand(self.traj3.shape[0], 2) + 1j*np.random.rand(self.traj3.shape[0], 2))
+        red_traj[0] = 0
+        red_vec = init_comp_vec(red_traj)
+        traj2vec(red_traj, red_vec)
+        cache = Cache(np.zeros_like(self.traj3), self.mean3, self.sys2, self.plan_t3, psi = psi)
+        res_func, jac_func = init_opt_funcs(cache, self.freq3, self.plan_t3, self.sys2, self.mean3, psi = psi)
+        gr = res_func(red_vec)
+        gr_grad = np.zeros_like(red_traj)
+        vec2traj(gr_grad, jac_func(np.copy(red_vec)))
+
+        # correct values from the full space
+        full_traj = red_traj.matmul_left_traj(psi)
+        full_cache = Cache(full_traj, self.mean3, self.sys2, self.plan_t3)
+        H_n_inv = init_H_n_inv(full_traj, self.sys2, self.freq3, self.mean3)
+        res_funcs.local_residual(full_cache, self.sys2, H_n_inv, self.plan_t3)
+        gr_true = res_funcs.global_residual(full_cache)
+        gr_grad_true = res_funcs.gr_traj_grad(full_cache, self.sys2, self.freq3, self.mean3, self.plan_t3).matmul_left_traj(np.conj(np.transpose(psi, axes = [0, 2, 1])))
+        gr_grad_true[0] = 0
+        self.assertAlmostEqual(gr, gr_true)
+        self.assertEqual(gr_grad, gr_grad_true)
+
+    def test_free_mean(self):
+        B = np.array([[0, 0], [-1, 0], [0, 1]])
+        psi = pyReSolver.resolvent_modes(pyReSolver.resolvent(self.freq3, range(self.traj3.shape[0]), self.sys2.jacobian(self.mean3), B))[0]
+        new_mean = self.mean3 + np.random.rand(1, 3)
+        for reduced in [None, psi]:
+            traj = self.traj3 if reduced is None else pyReSolver.Trajectory(np.random.rand(self.traj3.shape[0], 2) + 1j*np.random.rand(self.traj3.shape[0], 2))
+            traj[0] = 0
+            traj_vec = init_comp_vec(traj)
+            traj2vec(traj, traj_vec)
+            cache = Cache(np.zeros_like(self.traj3), self.mean3, self.sys2, self.plan_t3, psi = reduced)
+            res_func, jac_func = init_opt_funcs(cache, self.freq3, self.plan_t3, self.sys2, self.mean3, psi = reduced, free_mean = True)
+
+            # residual after a change of mean matches the residual at that mean
+            fixed_cache = Cache(np.zeros_like(self.traj3), new_mean, self.sys2, self.plan_t3, psi = reduced)
+            fixed_res_func, _ = init_opt_funcs(fixed_cache, self.freq3, self.plan_t3, self.sys2, new_mean, psi = reduced)
+            res_func(np.concatenate([traj_vec, self.mean3[0]]))
+            vec = np.concatenate([traj_vec, new_mean[0]])
+            self.assertAlmostEqual(res_func(vec), fixed_res_func(traj_vec))
+
+            # gradient w.r.t. the mean (half the derivative like the trajectory gradient)
+            gr_grad = jac_func(np.copy(vec))[-3:]
+            gr_grad_FD = np.zeros(3)
+            for i in range(3):
+                step = np.zeros_like(vec)
+                step[-3 + i] = 1e-6
+                gr_grad_FD[i] = (res_func(vec + step) - res_func(vec - step))/(4e-6)
+            self.assertTrue(np.allclose(gr_grad, gr_grad_FD, rtol = 1e-5, atol = 1e-5))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+# This file contains the unit tests for the JAX backend of the residual and its
+# gradient, they are skipped if jax is not installed.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.Cache import Cache
+from pyReSolver.init_opt_funcs import init_opt_funcs
+from pyReSolver.jax_backend import jax_available, init_jax_funcs
+from pyReSolver.traj2vec import init_comp_vec, traj2vec
+
+@unittest.skipUnless(jax_available(), "jax is not installed")
+class TestJaxBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.sys = pyReSolver.System(pyReSolver.systems.lorenz)
+        self.mean = np.array([[0, 0, 23.64]])
+        self.freq = (2*np.pi)/rand.uniform(1.5, 3.5)
+        self.traj = pyReSolver.utils.generateRandomTrajectory(3, rand.randint(5, 20))
+        self.traj[0] = 0
+        self.traj[-1] = 0
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.freq
+        del self.traj
+
+    def test_residual(self):
+        plans = pyReSolver.FFTPlans([(self.traj.shape[0] - 1) << 1, self.traj.shape[1]], flag = 'FFTW_ESTIMATE')
+        cache = Cache(pyReSolver.Trajectory(np.copy(self.traj)), self.mean, self.sys, plans)
+        res_func, _ = init_opt_funcs(cache, self.freq, plans, self.sys, self.mean)
+        jax_res_func, jax_jac_func = init_jax_funcs(self.traj.shape, self.freq, self.sys, self.mean)
+        vec = init_comp_vec(self.traj)
+        traj2vec(self.traj, vec)
+
+        # same residual as the NumPy backend
+        self.assertAlmostEqual(jax_res_func(vec), res_func(vec), places = 6)
+
+        # gradient equal to half the central finite differences
+        jax_grad = jax_jac_func(np.copy(vec))
+        fd_grad = np.zeros_like(vec)
+        step = 1e-6
+        for i in range(vec.shape[0]):
+            vec[i] += step
+            res_plus = jax_res_func(vec)
+            vec[i] -= 2*step
+            res_minus = jax_res_func(vec)
+            vec[i] += step
+            fd_grad[i] = (res_plus - res_minus)/(4*step)
+        self.assertTrue(np.allclose(jax_grad, fd_grad, rtol = 1e-6, atol = 1e-6*np.max(np.abs(fd_grad))))
+
+    def test_global_config(self):
+        import jax
+        x64 = jax.config.read('jax_enable_x64')
+        jax_res_func, jax_jac_func = init_jax_funcs(self.traj.shape, self.freq, self.sys, self.mean)
+        vec = init_comp_vec(self.traj)
+        traj2vec(self.traj, vec)
+        jax_res_func(vec)
+        jax_jac_func(np.copy(vec))
+
+        # double precision does not leak into the rest of the process
+        self.assertEqual(jax.config.read('jax_enable_x64'), x64)
+        self.assertEqual(jax.numpy.zeros(1).dtype, np.float64 if x64 else np.float32)
+
+    def test_minimise(self):
+        _, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', backend = 'jax', phase_fix = True, options = {'maxiter': 20})
+        self.assertLess(traces["residual"][-1], traces["residual"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# This file contains the unit tests for the native limited-memory BFGS
+# optimiser.
+
+import os
+import pickle
+import tempfile
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+class TestLBFGS(unittest.TestCase):
+
+    def setUp(self):
+        self.shape = (rand.randint(3, 8), rand.randint(1, 4))
+        rng = np.random.default_rng()
+        self.weights = rng.uniform(1, 10, self.shape)
+        self.target = rng.standard_normal(self.shape) + 1j*rng.standard_normal(self.shape)
+        self.x0 = np.zeros(self.shape, dtype = complex)
+
+    def tearDown(self):
+        del self.shape
+        del self.weights
+        del self.target
+        del self.x0
+
+    def func(self, x):
+        return np.sum(self.weights*np.abs(x - self.target)**2)
+
+    def grad(self, x):
+        # half the derivative, as for the global residual
+        return self.weights*(x - self.target)
+
+    def test_minimise(self):
+        lbfgs = pyReSolver.LBFGS(self.shape, memory = 5)
+        result = lbfgs.minimise(self.func, self.grad, self.x0, gtol = 1e-10, ftol = 0)
+        self.assertTrue(result['success'])
+        self.assertTrue(np.allclose(self.x0, self.target))
+        self.assertAlmostEqual(result['fun'], self.func(self.x0))
+        self.assertEqual(lbfgs.count, min(5, lbfgs.iteration))
+
+        # fixed parts are left untouched
+        free = np.full(self.shape, 1 + 1j)
+        free[0, 0] = 1
+        x0 = np.zeros(self.shape, dtype = complex)
+        pyReSolver.LBFGS(self.shape).minimise(self.func, self.grad, x0, free = free, gtol = 1e-10, ftol = 0)
+        self.assertEqual(x0[0, 0].imag, 0)
+        self.assertAlmostEqual(x0[0, 0].real, self.target[0, 0].real)
+
+    def test_callback(self):
+        values = []
+        def callback(iteration, x, value):
+            values.append(value)
+            if iteration == 3:
+                raise StopIteration
+        result = pyReSolver.LBFGS(self.shape).minimise(self.func, self.grad, self.x0, callback = callback)
+        self.assertEqual(result['status'], 99)
+        self.assertEqual(result['nit'], 3)
+        self.assertEqual(len(values), 3)
+        self.assertTrue(np.all(np.diff(values) < 0))
+
+    def test_retry(self):
+        # short line searches on a badly scaled problem fail along the
+        # quasi-Newton direction, the retries along the gradient are part of
+        # the same iteration
+        self.shape = (8, 3)
+        self.weights = np.logspace(0, 4, np.prod(self.shape)).reshape(self.shape)
+        self.target = np.full(self.shape, 1 + 1j)
+        self.x0 = np.zeros(self.shape, dtype = complex)
+        iterations = []
+        lbfgs = pyReSolver.LBFGS(self.shape)
+        nfev = 0
+        def func(x):
+            nonlocal nfev
+            nfev += 1
+            return self.func(x)
+        result = lbfgs.minimise(func, self.grad, self.x0, callback = lambda iteration, x, value: iterations.append(iteration), maxiter = 30, maxls = 1, ftol = 0)
+        self.assertEqual(iterations, list(range(1, result['nit'] + 1)))
+        self.assertEqual(lbfgs.iteration, result['nit'])
+        self.assertEqual(result['nfev'], nfev)
+
+    def test_ring_buffer(self):
+        lbfgs = pyReSolver.LBFGS((2,), memory = 3)
+        for i in range(5):
+            self.assertTrue(lbfgs.update(np.array([i + 1, 0j]), np.array([1, 0j])))
+        self.assertEqual(lbfgs.count, 3)
+        self.assertEqual(lbfgs.head, 2)
+        self.assertTrue(np.array_equal(lbfgs.s[:, 0].real, [4, 5, 3]))
+
+        # pairs without positive curvature are skipped
+        self.assertFalse(lbfgs.update(np.array([1, 0j]), np.array([-1, 0j])))
+        self.assertEqual(lbfgs.count, 3)
+
+    def test_save_load(self):
+        lbfgs = pyReSolver.LBFGS(self.shape)
+        lbfgs.minimise(self.func, self.grad, self.x0, maxiter = 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lbfgs.npz')
+            lbfgs.save(path)
+            loaded = pyReSolver.LBFGS.load(path)
+        copied = pickle.loads(pickle.dumps(lbfgs))
+        for other in (loaded, copied):
+            self.assertEqual((other.head, other.count, other.iteration), (lbfgs.head, lbfgs.count, lbfgs.iteration))
+            self.assertTrue(np.array_equal(other.s, lbfgs.s))
+            self.assertTrue(np.array_equal(other.y, lbfgs.y))
+
+        # resumed run takes the same steps as an uninterrupted one
+        x_resumed = np.copy(self.x0)
+        loaded.minimise(self.func, self.grad, x_resumed, maxiter = 3)
+        lbfgs.minimise(self.func, self.grad, self.x0, maxiter = 3)
+        self.assertTrue(np.allclose(x_resumed, self.x0))
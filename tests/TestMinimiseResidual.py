@@ -0,0 +1,203 @@
+# This file contains the unit tests for the options of the minimiseResidual
+# optimisation driver.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.Cache import Cache
+from pyReSolver.init_opt_funcs import init_opt_funcs, vector_scale
+from pyReSolver.traj2vec import init_comp_vec, traj2vec
+
+class TestMinimiseResidual(unittest.TestCase):
+
+    def setUp(self):
+        self.sys = pyReSolver.System(pyReSolver.systems.lorenz, {'rho': 28.0, 'beta': 8/3, 'sigma': 10.0})
+        self.mean = np.array([[0, 0, 23.64]])
+        self.period = rand.uniform(1.5, 3.5)
+        self.freq = (2*np.pi)/self.period
+        self.traj = pyReSolver.utils.generateRandomTrajectory(3, int(5*self.period))
+        self.traj[0] = 0
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.period
+        del self.freq
+        del self.traj
+
+    def test_single_precision(self):
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', precision = 'single', options = {'maxiter': 20})
+        self.assertEqual(op_traj.shape, self.traj.shape)
+        self.assertLess(traces["residual"][-1], traces["residual"][0])
+
+    def test_mixed_precision(self):
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', precision = 'mixed', promote_iter = 10, options = {'maxiter': 30})
+        self.assertEqual(op_traj.dtype, np.complex128)
+        self.assertTrue(np.array_equal(traces["iteration"], np.arange(len(traces["iteration"]))))
+        self.assertLessEqual(len(traces["iteration"]), 30)
+
+        # final residual consistent with double precision evaluation
+        self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+
+    def test_interleaved(self):
+        _, traces_block, sol_block = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', store_grad = True, options = {'maxiter': 20})
+        _, traces_inter, sol_inter = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', store_grad = True, layout = 'interleaved', options = {'maxiter': 20})
+        self.assertAlmostEqual(sol_block.fun, sol_inter.fun, places = 6)
+        self.assertTrue(np.allclose(traces_block["gradient"], traces_inter["gradient"]))
+
+    def test_timer(self):
+        timer = pyReSolver.Timer()
+        _, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', timer = timer, options = {'maxiter': 10})
+        _, _, sol_true = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 10})
+        timings = traces["timings"]
+
+        # timing does not change the optimisation
+        self.assertEqual(sol.fun, sol_true.fun)
+
+        # consistent call counts and times
+        self.assertEqual(timings["residual"]["calls"], sol.nfev + len(traces["residual"]))
+        self.assertEqual(timings["gradient"]["calls"], sol.njev)
+        self.assertEqual(timings["local_residual"]["calls"], timings["residual"]["calls"])
+        self.assertEqual(timings["traj_response"]["calls"], timings["residual"]["calls"])
+        self.assertEqual(timings["traj_response2"]["calls"], timings["gradient"]["calls"])
+        self.assertEqual(timings["ifft"]["calls"], timings["traj_response"]["calls"] + 2*timings["traj_response2"]["calls"])
+        self.assertEqual(timings["fft"]["calls"], timings["traj_response"]["calls"] + timings["traj_response2"]["calls"])
+        self.assertEqual(timings["vec2traj"]["calls"], timings["residual"]["calls"] + timings["gradient"]["calls"])
+        self.assertEqual(timings["traj2vec"]["calls"], timings["gradient"]["calls"])
+        self.assertLessEqual(timings["residual"]["time"] + timings["gradient"]["time"], timings["minimize"]["time"])
+        self.assertAlmostEqual(timings["overhead"]["time"], timings["minimize"]["time"] - timings["residual"]["time"] - timings["gradient"]["time"])
+
+    def test_library(self):
+        library = pyReSolver.OrbitLibrary(tol = 1e-1)
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 50})
+        library.add(op_traj, self.freq, self.mean, sol.fun)
+
+        # the same run stops once it reaches the known orbit
+        _, traces_lib, sol_lib = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', library = library, library_every = 1, options = {'maxiter': 50})
+        self.assertEqual(traces_lib["duplicate"], 0)
+        self.assertEqual(sol_lib.status, 99)
+        self.assertEqual(sol_lib.nit, len(traces_lib["iteration"]))
+        self.assertAlmostEqual(sol_lib.fun, traces_lib["residual"][-1])
+        self.assertLessEqual(len(traces_lib["iteration"]), len(traces["iteration"]))
+
+    def test_stop_policy(self):
+        stop = rand.randint(2, 10)
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', stop_policy = lambda iteration, residual: iteration == stop, options = {'maxiter': 50})
+        self.assertEqual(traces["stopped"], stop)
+        self.assertEqual(len(traces["iteration"]), stop)
+        self.assertEqual(sol.status, 99)
+
+        # a stopped mixed precision run is not promoted to double precision
+        policy = pyReSolver.StagnationPolicy(window = 1, rtol = 1.0)
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', precision = 'mixed', promote_iter = 10, stop_policy = policy, options = {'maxiter': 30})
+        self.assertEqual(traces["stopped"], 2)
+        self.assertEqual(len(traces["iteration"]), 2)
+
+    def test_phase_fix(self):
+        comp = int(np.argmax(np.abs(self.traj[1])))
+        for layout in ['block', 'interleaved']:
+            op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', phase_fix = True, layout = layout, options = {'maxiter': 20})
+            self.assertEqual(op_traj[1, comp].imag, 0)
+            self.assertEqual(sol.x.shape[0], 2*3*(self.traj.shape[0] - 1) - 1)
+
+            self.assertLess(sol.fun, self.global_residual(self.traj))
+
+    def test_free_mean(self):
+        mean = self.mean + np.random.rand(1, 3)
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, mean, flag = 'FFTW_ESTIMATE', free_mean = True, options = {'maxiter': 30})
+        self.assertEqual(sol.mean.shape, (1, 3))
+        self.assertEqual(op_traj.shape, self.traj.shape)
+        self.assertLess(traces["residual"][-1], traces["residual"][0])
+
+        # final residual consistent with the optimised mean
+        self.mean = sol.mean
+        self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+
+    def test_scaling(self):
+        for scaling in ['freq', 'resolvent']:
+            op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', scaling = scaling, options = {'maxiter': 20})
+            self.assertLess(traces["residual"][-1], traces["residual"][0])
+            self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+
+        # named scalings follow the number of modes, explicit ones cannot
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', scaling = 'resolvent', adaptive_modes = {'chunk': 5, 'max_modes': 2*self.traj.shape[0]}, options = {'maxiter': 20})
+        self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+        with self.assertRaises(ValueError):
+            pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', scaling = np.ones(self.traj.shape[0]), adaptive_modes = True)
+
+        # gradient with respect to the scaled vector
+        plans = pyReSolver.FFTPlans([(self.traj.shape[0] - 1) << 1, self.traj.shape[1]], flag = 'FFTW_ESTIMATE')
+        scale = vector_scale('resolvent', self.traj.shape[0], self.freq, self.sys, self.mean)
+        cache = Cache(pyReSolver.Trajectory(np.copy(self.traj)), self.mean, self.sys, plans)
+        res_func, jac_func = init_opt_funcs(cache, self.freq, plans, self.sys, self.mean, scale = scale)
+        res_func_true, jac_func_true = init_opt_funcs(Cache(pyReSolver.Trajectory(np.copy(self.traj)), self.mean, self.sys, plans), self.freq, plans, self.sys, self.mean)
+        vec = init_comp_vec(self.traj)
+        traj2vec(self.traj/scale[:, np.newaxis], vec)
+        vec_true = init_comp_vec(self.traj)
+        traj2vec(self.traj, vec_true)
+        self.assertAlmostEqual(res_func(vec), res_func_true(vec_true))
+        grad = jac_func(np.copy(vec))
+        grad_true = jac_func_true(np.copy(vec_true))
+        self.assertTrue(np.allclose(grad, grad_true*np.tile(np.repeat(scale[1:], 3), 2)))
+
+    def test_native_lbfgs(self):
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', method = 'native-lbfgs', options = {'maxiter': 50})
+        self.assertEqual(op_traj.shape, self.traj.shape)
+        self.assertLess(traces["residual"][-1], traces["residual"][0])
+        self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+        self.assertEqual(sol.lbfgs.iteration, sol.nit)
+
+        # warm start from the history of the previous run
+        op_traj, traces, sol = pyReSolver.minimiseResidual(op_traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', method = 'native-lbfgs', lbfgs = sol.lbfgs, traces = traces, options = {'maxiter': 50})
+        self.assertTrue(np.array_equal(traces["iteration"], np.arange(len(traces["iteration"]))))
+        self.assertAlmostEqual(sol.fun, self.global_residual(op_traj), places = 8)
+
+        # fixed phase kept by the optimiser
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', method = 'native-lbfgs', phase_fix = 0, options = {'maxiter': 20})
+        self.assertEqual(op_traj[1, 0].imag, 0)
+        with self.assertRaises(ValueError):
+            pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', method = 'native-lbfgs', free_mean = True)
+
+    def test_adaptive_modes(self):
+        # modes grown up to the limit for a random trajectory
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', adaptive_modes = {'chunk': 10, 'max_modes': self.traj.shape[0] + 10}, options = {'maxiter': 40})
+        self.assertNotEqual(len(traces["modes"]), 0)
+        self.assertEqual(op_traj.shape[0], traces["modes"][-1][1])
+        self.assertEqual(op_traj.shape[0], self.traj.shape[0] + 10)
+
+        # modes shrunk for a trajectory with an empty tail, resolvent modes follow
+        traj = pyReSolver.Trajectory(np.zeros([40, 3], dtype = complex))
+        traj[1:4] = self.traj[1:4]
+        B = np.array([[0, 0], [-1, 0], [0, 1]])
+        psi = pyReSolver.utils.initialiseModes(self.period, self.mean, self.sys, traj.shape[0])
+        settings = {'chunk': 10, 'shrink_tol': 1e-2, 'grow_tol': 1, 'res_grow_tol': 1, 'factor': 2, 'min_modes': 10, 'B': B}
+        op_traj, traces, sol = pyReSolver.minimiseResidual(traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', psi = psi, adaptive_modes = settings, options = {'maxiter': 60})
+        self.assertEqual(op_traj.shape[0], 10)
+        self.assertTrue(all(new < old for (_, new), (_, old) in zip(traces["modes"], [(0, 40)] + traces["modes"])))
+
+        # modes grown with the resolvent modes of the new mode numbers
+        no_modes = self.traj.shape[0]
+        psi = pyReSolver.utils.initialiseModes(self.period, self.mean, self.sys, no_modes)
+        psis = []
+        settings = {'chunk': 5, 'grow_tol': 0, 'factor': 1.5, 'max_modes': no_modes + 10, 'B': B}
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', psi = psi, adaptive_modes = settings,
+                                                           callback = lambda x, iteration, psi, *args: psis.append(psi), options = {'maxiter': 30})
+        self.assertEqual(op_traj.shape[0], no_modes + 10)
+        self.assertEqual(psis[-1].shape[0], no_modes + 10)
+        self.assertTrue(np.allclose(psis[-1], pyReSolver.utils.initialiseModes(self.period, self.mean, self.sys, no_modes + 10)))
+
+    def global_residual(self, traj):
+        plans = pyReSolver.FFTPlans([(traj.shape[0] - 1) << 1, traj.shape[1]], flag = 'FFTW_ESTIMATE')
+        cache = Cache(pyReSolver.Trajectory(np.copy(traj)), self.mean, self.sys, plans)
+        res_func, _ = init_opt_funcs(cache, self.freq, plans, self.sys, self.mean)
+        vec = init_comp_vec(traj)
+        traj2vec(traj, vec)
+        return res_func(vec)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# This file contains the unit tests for the OrbitLibrary class.
+
+import unittest
+import random as rand
+import os
+import tempfile
+
+import numpy as np
+
+import pyReSolver
+
+class TestOrbitLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.modes = rand.randint(5, 20)
+        self.trajs = [pyReSolver.utils.generateRandomTrajectory(3, self.modes) for _ in range(50)]
+        self.freqs = [rand.uniform(1, 5) for _ in range(50)]
+        self.means = [np.random.standard_normal([1, 3]) for _ in range(50)]
+        for traj in self.trajs:
+            traj[0] = 0
+        self.library = pyReSolver.OrbitLibrary(no_modes = 4, tol = 1e-6)
+
+    def tearDown(self):
+        del self.modes
+        del self.trajs
+        del self.freqs
+        del self.means
+        del self.library
+
+    def shift(self, traj, phase):
+        return pyReSolver.Trajectory(traj*np.exp(1j*phase*np.arange(traj.shape[0]))[:, np.newaxis])
+
+    def test_add(self):
+        for index, (traj, freq, mean) in enumerate(zip(self.trajs, self.freqs, self.means)):
+            self.assertEqual(self.library.add(traj, freq, mean, 1.0), (index, True))
+        self.assertEqual(len(self.library), 50)
+        self.assertGreater(self.library.indexed, 0)
+
+        # time-shifted orbits are duplicates, the lower residual is kept
+        for index in rand.sample(range(50), 10):
+            shifted = self.shift(self.trajs[index], rand.uniform(0, 2*np.pi))
+            self.assertEqual(self.library.match(shifted, self.freqs[index], self.means[index]), index)
+            self.assertEqual(self.library.add(shifted, self.freqs[index], self.means[index], 0.5), (index, False))
+            self.assertTrue(np.allclose(self.library[index][0], shifted))
+            self.assertEqual(self.library.add(self.trajs[index], self.freqs[index], self.means[index], 2.0), (index, False))
+            self.assertTrue(np.allclose(self.library[index][0], shifted))
+        self.assertEqual(len(self.library), 50)
+
+        # different period, mean or shape are not duplicates
+        self.assertIsNone(self.library.match(self.trajs[0], self.freqs[0] + 1e-3, self.means[0]))
+        self.assertIsNone(self.library.match(self.trajs[0], self.freqs[0], self.means[0] + 1e-3))
+        self.assertIsNone(self.library.match(2*self.trajs[0], self.freqs[0], self.means[0]))
+
+    def test_trees(self):
+        trajs = [pyReSolver.utils.generateRandomTrajectory(3, self.modes) for _ in range(300)]
+        for index, traj in enumerate(trajs):
+            self.library.add(traj, 1.0, self.means[0])
+
+            # the buffer is bounded and the trees more than halve in size
+            self.assertLess(len(self.library.fingerprints) - self.library.indexed, self.library.buffer_size)
+            ends = [start for start, _ in self.library.trees[1:]] + [self.library.indexed]
+            sizes = [end - start for (start, _), end in zip(self.library.trees, ends)]
+            self.assertTrue(all(2*size < previous for previous, size in zip(sizes, sizes[1:])))
+        for index in rand.sample(range(300), 20):
+            self.assertEqual(self.library.match(trajs[index], 1.0, self.means[0]), index)
+
+    def test_save_load(self):
+        for traj, freq, mean in zip(self.trajs, self.freqs, self.means):
+            self.library.add(traj, freq, mean, rand.uniform(0, 1))
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'library.npz')
+            self.library.save(file)
+            library = pyReSolver.OrbitLibrary.load(file)
+        self.assertEqual(len(library), 50)
+        self.assertEqual(library.tol, self.library.tol)
+        for orbit, orbit_true in zip(library.orbits, self.library.orbits):
+            self.assertTrue(np.array_equal(orbit[0], orbit_true[0]))
+            self.assertEqual(orbit[1:2] + orbit[3:], orbit_true[1:2] + orbit_true[3:])
+            self.assertTrue(np.array_equal(orbit[2], orbit_true[2]))
+        self.assertEqual(library.match(self.shift(self.trajs[7], 1.0), self.freqs[7], self.means[7]), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+# This file contains the unit tests for the lazy loading of the package
+# attributes.
+
+import unittest
+import subprocess
+import sys
+
+class TestPackageImport(unittest.TestCase):
+
+    def run_python(self, code):
+        return subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True).stdout.split()
+
+    def test_lazy_import(self):
+        loaded = self.run_python("import sys; import pyReSolver; print(*[name in sys.modules for name in ('matplotlib', 'scipy.optimize', 'pyfftw')])")
+        self.assertEqual(loaded, ['False', 'False', 'False'])
+
+    def test_lazy_attributes(self):
+        code = ("import pyReSolver, pyReSolver.FFTPlans, pyReSolver.resolvent_modes\n"
+                "print(callable(pyReSolver.FFTPlans), callable(pyReSolver.resolvent_modes), callable(pyReSolver.minimiseResidual))\n"
+                "print(pyReSolver.utils.__name__, 'plot_traj' in dir(pyReSolver))")
+        self.assertEqual(self.run_python(code), ['True', 'True', 'True', 'pyReSolver.utils', 'True'])
+
+    def test_no_global_warning_filters(self):
+        code = ("import warnings; import pyReSolver, pyReSolver.plot_traj\n"
+                "print(any(f[0] == 'error' for f in warnings.filters))")
+        self.assertEqual(self.run_python(code), ['False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
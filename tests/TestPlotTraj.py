@@ -0,0 +1,83 @@
+# This file contains the unit tests for the batched plotting of trajectory
+# sets, rendered with the Agg backend.
+
+import os
+import tempfile
+import unittest
+import random as rand
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+import pyReSolver
+
+from pyReSolver.plot_traj import traj_curves, plot_traj_collection
+
+class TestPlotTraj(unittest.TestCase):
+
+    def setUp(self):
+        self.no_trajs = rand.randint(2, 10)
+        self.trajs = [pyReSolver.utils.generateRandomTrajectory(3, rand.randint(5, 40)) for _ in range(self.no_trajs)]
+        self.means = [np.random.rand(1, 3) for _ in range(self.no_trajs)]
+
+    def tearDown(self):
+        del self.no_trajs
+        del self.trajs
+        del self.means
+
+    def test_traj_curves(self):
+        # closed curves at the native resolution of every trajectory
+        curves = traj_curves(self.trajs)
+        self.assertEqual(len(curves), self.no_trajs)
+        for traj, curve in zip(self.trajs, curves):
+            self.assertEqual(curve.shape, (2*(traj.shape[0] - 1) + 1, 3))
+            self.assertTrue(np.array_equal(curve[0], curve[-1]))
+            self.assertTrue(np.allclose(np.mean(curve[:-1], axis = 0), traj[0].real))
+
+        # common resolution, never below the native one
+        disc = 64
+        for traj, curve in zip(self.trajs, traj_curves(self.trajs, disc = disc)):
+            self.assertEqual(curve.shape[0], max(disc, 2*(traj.shape[0] - 1)) + 1)
+
+        # per-trajectory means replace the zeroth modes
+        for mean, curve in zip(self.means, traj_curves(self.trajs, means = self.means)):
+            self.assertTrue(np.allclose(np.mean(curve[:-1], axis = 0), mean[0]))
+
+    def test_max_points(self):
+        max_points = rand.randint(2, 10)
+        full_curves = traj_curves(self.trajs)
+        for full_curve, curve in zip(full_curves, traj_curves(self.trajs, max_points = max_points)):
+            no_samples = full_curve.shape[0] - 1
+            stride = -(-no_samples//max_points)
+            self.assertLessEqual(curve.shape[0] - 1, max_points)
+            self.assertTrue(np.allclose(curve[:-1], full_curve[:-1:stride]))
+            self.assertTrue(np.array_equal(curve[0], curve[-1]))
+
+    def test_plot_traj_collection(self):
+        # one line per trajectory in a single 3D collection
+        fig = plot_traj_collection(self.trajs, means = self.means)
+        fig.canvas.draw()
+        ax = fig.axes[0]
+        self.assertEqual(len(ax.collections), 1)
+        self.assertEqual(len(ax.collections[0].get_segments()), self.no_trajs)
+        self.assertEqual(len(ax.lines), 0)
+
+        # projected onto a plane, saved to file
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'collection.png')
+            fig = plot_traj_collection(self.trajs, proj = 'xz', max_points = 8, save = path)
+            self.assertTrue(os.path.getsize(path) > 0)
+        segments = fig.axes[0].collections[0].get_segments()
+        self.assertEqual(len(segments), self.no_trajs)
+        for segment in segments:
+            self.assertEqual(segment.shape[1], 2)
+            self.assertLessEqual(segment.shape[0], 9)
+
+        # higher dimensions cannot be plotted
+        with self.assertRaises(ValueError):
+            plot_traj_collection([pyReSolver.utils.generateRandomTrajectory(4, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# This file contains the unit tests for the Newton refinement and the adjoint
+# sensitivities of periodic orbits.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.sensitivity import orbit2vec, orbit_residual, orbit_jacobian, orbit_operator, phase_component, refine_orbit, orbit_sensitivities
+
+class TestSensitivity(unittest.TestCase):
+
+    def setUp(self):
+        self.mu = rand.uniform(0.2, 1.0)
+        self.sys = pyReSolver.System(pyReSolver.systems.van_der_pol, {'mu': self.mu})
+        seeds = pyReSolver.utils.recurrenceSeeds(self.sys, [2.0, 0.0], 0.01, 2000, 33, 5, 8, transient = 3000)
+        traj, period, mean, _ = seeds[0]
+        self.traj, self.freq, self.mean, self.res, self.converged = refine_orbit(traj, 2*np.pi/period, self.sys, mean)
+
+    def tearDown(self):
+        del self.mu
+        del self.sys
+        del self.traj
+        del self.freq
+        del self.mean
+        del self.res
+        del self.converged
+
+    def test_jacobian(self):
+        sys = pyReSolver.System(pyReSolver.systems.lorenz)
+        traj = pyReSolver.utils.generateRandomTrajectory(3, rand.randint(3, 8))
+        comp = phase_component(traj)
+        z = orbit2vec(traj, rand.uniform(1, 4), np.array([[0, 0, 23.64]]))
+        jacobian = orbit_jacobian(z, sys, traj.shape[0], 3, comp)
+
+        # compare against central differences
+        jacobian_fd = np.zeros_like(jacobian)
+        for k in range(z.shape[0]):
+            dz = np.zeros_like(z)
+            dz[k] = 1e-6
+            jacobian_fd[:, k] = (orbit_residual(z + dz, sys, traj.shape[0], 3, comp) - orbit_residual(z - dz, sys, traj.shape[0], 3, comp))/2e-6
+        self.assertTrue(np.allclose(jacobian, jacobian_fd, atol = 1e-6))
+
+    def test_operator(self):
+        sys = pyReSolver.System(pyReSolver.systems.lorenz)
+        traj = pyReSolver.utils.generateRandomTrajectory(3, rand.randint(2, 8))
+        comp = phase_component(traj)
+        z = orbit2vec(traj, rand.uniform(1, 4), np.array([[0, 0, 23.64]]))
+        jacobian = orbit_jacobian(z, sys, traj.shape[0], 3, comp)
+        operator = orbit_operator(z, sys, traj.shape[0], 3, comp)
+
+        # compare the products with the Jacobian and its transpose
+        v = np.random.randn(z.shape[0])
+        self.assertTrue(np.allclose(operator.matvec(v), jacobian @ v))
+        self.assertTrue(np.allclose(operator.rmatvec(v), jacobian.T @ v))
+
+    def test_refine_orbit(self):
+        self.assertTrue(self.converged)
+        self.assertLess(self.res, 1e-10)
+        self.assertAlmostEqual(self.traj[1, phase_component(self.traj)].imag, 0)
+        self.assertTrue(np.allclose(self.mean, 0))
+
+        # period grows with the nonlinearity
+        self.assertGreater(2*np.pi/self.freq, 2*np.pi)
+
+    def test_refine_orbit_stall(self):
+        # a zero residual is out of reach, and no step may increase it
+        _, _, _, res, converged = refine_orbit(self.traj, self.freq, self.sys, self.mean, tol = 0)
+        self.assertFalse(converged)
+        self.assertLessEqual(res, self.res)
+
+    def test_sensitivities(self):
+        sensitivities = orbit_sensitivities(self.traj, self.freq, self.sys, self.mean)
+
+        # compare against refined orbits of perturbed systems
+        h = 1e-4
+        orbit_plus = refine_orbit(self.traj, self.freq, pyReSolver.System(self.sys, {'mu': self.mu + h}), self.mean)
+        orbit_minus = refine_orbit(self.traj, self.freq, pyReSolver.System(self.sys, {'mu': self.mu - h}), self.mean)
+        self.assertTrue(orbit_plus[4] and orbit_minus[4])
+        period_fd = (2*np.pi/orbit_plus[1] - 2*np.pi/orbit_minus[1])/(2*h)
+        self.assertAlmostEqual(sensitivities['period']['mu'], period_fd, places = 6)
+        self.assertTrue(np.allclose(sensitivities['mean']['mu'], 0, atol = 1e-8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# This file contains the unit tests for the arrays allocated in memory shared
+# between processes.
+
+import unittest
+import random as rand
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.SharedArrays import SharedArrays, SharedHandle
+
+def double_first_mode(handle):
+    traj = handle.attach()
+    traj[1] *= 2
+    return isinstance(traj, pyReSolver.Trajectory)
+
+class TestSharedArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.modes = rand.randint(100, 1000)
+        self.traj = pyReSolver.utils.generateRandomTrajectory(3, self.modes)
+
+    def tearDown(self):
+        del self.modes
+        del self.traj
+
+    def test_shared(self):
+        for backend in ['shm', 'memmap']:
+            with SharedArrays(backend) as arrays:
+                shared, handle = arrays.copy(self.traj)
+                self.assertIsInstance(shared, pyReSolver.Trajectory)
+                self.assertTrue(np.array_equal(shared, self.traj))
+
+                # handles are small and attach to the same memory
+                self.assertLess(len(pickle.dumps(handle)), 200)
+                attached = pickle.loads(pickle.dumps(handle)).attach()
+                attached[2] = 0
+                self.assertTrue(np.all(shared[2] == 0))
+
+                # workers modify the array in place, spawned since forking a
+                # process that has started threads (e.g. JAX) can deadlock
+                with ProcessPoolExecutor(1, mp_context = get_context('spawn')) as executor:
+                    self.assertTrue(executor.submit(double_first_mode, handle).result())
+                self.assertTrue(np.allclose(shared[1], 2*self.traj[1]))
+
+                # plain arrays stay plain arrays
+                array, array_handle = arrays.empty([self.modes, 3, 3], dtype = complex)
+                self.assertNotIsInstance(array_handle.attach(), pyReSolver.Trajectory)
+                self.assertEqual(array_handle.attach().shape, (self.modes, 3, 3))
+                directory = arrays.directory
+            del shared, attached, array
+
+            # memory is released on closing
+            if backend == 'shm':
+                with self.assertRaises(FileNotFoundError):
+                    SharedHandle('shm', handle.name, handle.shape, handle.dtype).attach()
+            else:
+                self.assertFalse(os.path.exists(directory))
+
+        with self.assertRaises(ValueError):
+            SharedArrays('other')
+
+
+if __name__ == '__main__':
+    unittest.main()
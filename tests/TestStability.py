@@ -0,0 +1,82 @@
+# This file contains the unit tests for the Floquet stability analysis of
+# periodic orbits.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.stability import hill_matrices, floquet_exponents, floquet_multipliers
+
+class TestStability(unittest.TestCase):
+
+    def setUp(self):
+        self.sys = pyReSolver.System(pyReSolver.systems.lorenz)
+        self.mean = np.array([[0, 0, 23.64]])
+        self.freq = rand.uniform(1.5, 4)
+        self.modes = rand.randint(3, 10)
+        self.trajs = [pyReSolver.utils.generateRandomTrajectory(3, self.modes)/(np.arange(self.modes)[:, np.newaxis] + 1)**2 for _ in range(4)]
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.freq
+        del self.modes
+        del self.trajs
+
+    def fold(self, exponents, freq):
+        return exponents - 1j*freq*np.round(exponents.imag/freq)
+
+    def assertSameExponents(self, exponents, exponents_true):
+        distances = np.abs(np.subtract.outer(exponents, exponents_true))
+        self.assertTrue(np.all(np.min(distances, axis = 0) < 1e-8))
+        self.assertTrue(np.all(np.min(distances, axis = 1) < 1e-8))
+
+    def test_constant_jacobian(self):
+        # equilibrium of the lorenz system
+        beta, rho = self.sys.parameters['beta'], self.sys.parameters['rho']
+        mean = np.array([[np.sqrt(beta*(rho - 1)), np.sqrt(beta*(rho - 1)), rho - 1]])
+        traj = pyReSolver.Trajectory(np.zeros([self.modes, 3], dtype = complex))
+        exponents_true = self.fold(np.linalg.eigvals(self.sys.jacobian(mean)), self.freq)
+        for method in ['dense', 'sparse']:
+            exponents = floquet_exponents(traj, self.freq, self.sys, mean, method = method)
+            self.assertSameExponents(exponents, exponents_true)
+            self.assertTrue(np.all(np.diff(exponents.real) <= 0))
+
+        # harmonic oscillator
+        sys = pyReSolver.System(pyReSolver.systems.van_der_pol, {'mu': 0.0})
+        traj = pyReSolver.utils.generateRandomTrajectory(2, self.modes)
+        exponents = floquet_exponents(traj, 2.5, sys, np.zeros([1, 2]))
+        self.assertSameExponents(exponents, [-1j, 1j])
+
+    def test_hill_matrix(self):
+        harmonics = rand.randint(1, 5)
+        hill = hill_matrices(self.trajs, [self.freq]*4, self.sys, [self.mean]*4, harmonics = harmonics)
+        self.assertEqual(hill.shape, (4, 3*(2*harmonics + 1), 3*(2*harmonics + 1)))
+
+        # trace is the mean trace of the jacobian for every harmonic, less the derivatives
+        trace_true = -(2*harmonics + 1)*(self.sys.parameters['sigma'] + 1 + self.sys.parameters['beta'])
+        self.assertTrue(np.allclose(np.trace(hill, axis1 = 1, axis2 = 2), trace_true))
+
+    def test_liouville(self):
+        exponents = floquet_exponents(self.trajs, self.freq, self.sys, self.mean, harmonics = 24)
+        self.assertEqual(exponents.shape, (4, 3))
+
+        # sum of the exponents is the mean trace of the jacobian
+        self.assertTrue(np.allclose(np.sum(exponents.real, axis = 1), -(self.sys.parameters['sigma'] + 1 + self.sys.parameters['beta'])))
+
+        # batch gives the same exponents as the individual orbits
+        for traj, batch_exponents in zip(self.trajs, exponents):
+            self.assertTrue(np.allclose(floquet_exponents(traj, self.freq, self.sys, self.mean, harmonics = 24), batch_exponents))
+        self.assertTrue(np.allclose(floquet_exponents(self.trajs, self.freq, self.sys, self.mean, harmonics = 24, method = 'sparse', no_eigs = 140), exponents))
+
+        # multipliers
+        multipliers = floquet_multipliers(exponents, [self.freq]*4)
+        self.assertTrue(np.allclose(multipliers, np.exp(exponents*2*np.pi/self.freq)))
+        self.assertTrue(np.allclose(floquet_multipliers(exponents[0], self.freq), multipliers[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# This file contains the unit tests for the stopping policies of the
+# optimisations.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.stop_policies import StopPolicy
+
+class TestStopPolicies(unittest.TestCase):
+
+    def setUp(self):
+        self.window = rand.randint(5, 20)
+        self.min_iter = rand.randint(0, 10)
+
+    def tearDown(self):
+        del self.window
+        del self.min_iter
+
+    def run_policy(self, check, residuals):
+        for iteration, residual in enumerate(residuals, start = 1):
+            if check(iteration, residual):
+                return iteration
+        return None
+
+    def test_stagnation(self):
+        policy = pyReSolver.StagnationPolicy(window = self.window, rtol = 1e-2, min_iter = self.min_iter)
+
+        # steadily decreasing residual never stops
+        self.assertIsNone(self.run_policy(policy.new_run(), 0.9**np.arange(200)))
+
+        # plateau stops after a full window
+        residuals = np.concatenate([0.9**np.arange(30), np.full(100, 0.9**29)])
+        stopped = self.run_policy(policy.new_run(), residuals)
+        self.assertEqual(stopped, max(30 + self.window, self.min_iter))
+
+    def test_racing(self):
+        policy = pyReSolver.RacingPolicy(margin = 10.0, min_iter = self.min_iter)
+        self.assertIsNone(self.run_policy(policy.new_run(), 0.5**np.arange(50)))
+
+        # a run slower than the leader by more than the margin stops
+        stopped = self.run_policy(policy.new_run(), 0.9**np.arange(50))
+        leader = 0.5**np.arange(50)
+        slow = 0.9**np.arange(50)
+        self.assertEqual(stopped, max(np.argmax(slow > 10*leader) + 1, self.min_iter))
+
+        # the board holds the lowest residual reached by every iteration
+        self.assertTrue(np.all(np.diff(policy.best) <= 0))
+
+        # runs out of step with each other give the same board as a brute
+        # force minimum over all the residuals recorded so far
+        policy = pyReSolver.RacingPolicy(margin = 10.0, min_iter = 0)
+        checks = [policy.new_run() for _ in range(4)]
+        recorded = []
+        for _ in range(200):
+            iteration = rand.randint(0, 100)
+            residual = rand.uniform(0, 1)
+            recorded.append((iteration, residual))
+            best = min(value for i, value in recorded if i <= iteration)
+            self.assertEqual(rand.choice(checks)(iteration, residual), residual > 10*best)
+        self.assertTrue(np.allclose(policy.best, [min([value for i, value in recorded if i <= iteration], default = np.inf) for iteration in range(len(policy.best))]))
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            StopPolicy()
+
+    def test_successive_halving(self):
+        policy = pyReSolver.SuccessiveHalvingPolicy(rungs = [10, 20], keep = 0.5, min_population = 4)
+        rates = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.55, 0.99]
+        stopped = [self.run_policy(policy.new_run(), rate**np.arange(30)) for rate in rates]
+
+        # the first runs fill the rung, later ones only continue if in the best half
+        self.assertEqual(stopped[:3], [None, None, None])
+        self.assertEqual(stopped[3:], [10, 10, 10, None, 10])
+        self.assertEqual(len(policy.results[10]), 8)
+        self.assertEqual(len(policy.results[20]), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# This file contains the unit tests for the symmetry reduction of the
+# trajectories.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+from pyReSolver.symmetries import symmetry_signs, symmetric_modes, reduced_symmetric_modes
+
+class TestSymmetries(unittest.TestCase):
+
+    def setUp(self):
+        self.sys = pyReSolver.System(pyReSolver.systems.lorenz)
+        self.mean = np.array([[0, 0, 23.64]])
+        self.freq = (2*np.pi)/rand.uniform(1.5, 3.5)
+        self.modes = rand.randint(5, 20)
+        self.traj = pyReSolver.utils.generateRandomTrajectory(3, self.modes)
+        self.traj[0] = 0
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.freq
+        del self.modes
+        del self.traj
+
+    def test_symmetric_modes(self):
+        signs = symmetry_signs(self.sys, 'z2')
+        self.assertTrue(np.array_equal(signs, [-1, -1, 1]))
+        self.assertTrue(np.array_equal(symmetry_signs(self.sys, (1, -1, 1)), [1, -1, 1]))
+        with self.assertRaises(ValueError):
+            symmetry_signs(self.sys, 'other')
+
+        # x and y have odd modes only, z has even modes only
+        modes = symmetric_modes(signs, self.modes)
+        for n in range(self.modes):
+            self.assertTrue(np.array_equal(modes[n], [n % 2 == 1, n % 2 == 1, n % 2 == 0]))
+
+        # symmetric curves are invariant under the symmetry and a half period shift
+        curve = pyReSolver.utils.irfft_even(self.traj*modes)
+        half = curve.shape[0] >> 1
+        self.assertTrue(np.allclose(signs*np.roll(curve, -half, axis = 0), curve))
+
+    def test_reduced_symmetric_modes(self):
+        # columns supported on x and y, on z, or on both
+        psi = np.zeros([self.modes, 3, 3], dtype = complex)
+        psi[:, :2, 0] = np.random.rand(self.modes, 2)
+        psi[:, 2, 1] = np.random.rand(self.modes)
+        psi[:, :, 2] = np.random.rand(self.modes, 3)
+        modes = reduced_symmetric_modes(psi, np.array([-1, -1, 1]))
+        for n in range(self.modes):
+            self.assertTrue(np.array_equal(modes[n], [n % 2 == 1, n % 2 == 0, False]))
+
+    def test_minimise(self):
+        modes = symmetric_modes(np.array([-1, -1, 1]), self.modes)
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', symmetry = 'z2', options = {'maxiter': 20})
+        self.assertEqual(sol.x.shape[0], 2*np.count_nonzero(modes[1:]))
+        self.assertTrue(np.all(op_traj[~modes] == 0))
+        self.assertLess(sol.fun, traces["residual"][0] + 1e-12)
+
+        # combined with the phase condition
+        op_traj, traces, sol = pyReSolver.minimiseResidual(self.traj, self.freq, self.sys, self.mean, flag = 'FFTW_ESTIMATE', symmetry = 'z2', phase_fix = True, layout = 'interleaved', options = {'maxiter': 20})
+        self.assertEqual(sol.x.shape[0], 2*np.count_nonzero(modes[1:]) - 1)
+        self.assertTrue(np.all(op_traj[~modes] == 0))
+        self.assertEqual(op_traj[1, int(np.argmax(np.abs(self.traj[1, :2])))].imag, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
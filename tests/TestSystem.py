@@ -0,0 +1,85 @@
+# This file contains the unit tests for the System class and the threaded
+# optimisation of several trajectories.
+
+import unittest
+import random as rand
+
+import numpy as np
+
+import pyReSolver
+
+class TestSystem(unittest.TestCase):
+
+    def setUp(self):
+        self.sys = pyReSolver.systems.lorenz
+        self.mean = np.array([[0, 0, 23.64]])
+        self.modes = rand.randint(5, 20)
+        self.trajs = [pyReSolver.utils.generateRandomTrajectory(3, self.modes) for _ in range(4)]
+        for traj in self.trajs:
+            traj[0] = 0
+
+    def tearDown(self):
+        del self.sys
+        del self.mean
+        del self.modes
+        del self.trajs
+
+    def test_parameters(self):
+        rho = rand.uniform(0, 30)
+        defaults = dict(self.sys.parameters)
+        sys = pyReSolver.System(self.sys, {'rho': rho})
+
+        # module parameters untouched and copied
+        self.assertEqual(self.sys.parameters, defaults)
+        self.assertEqual(sys.parameters['rho'], rho)
+        self.assertEqual(sys.parameters['beta'], defaults['beta'])
+        self.assertIsNot(sys.parameters, self.sys.parameters)
+
+        # bound functions use the instance parameters
+        x = np.random.rand(10, 3)
+        out_true = np.zeros_like(x)
+        out = np.zeros_like(x)
+        self.sys.response(x, out_true, parameters = {**defaults, 'rho': rho})
+        sys.response(x, out)
+        self.assertTrue(np.allclose(out, out_true))
+        self.assertTrue(np.allclose(sys.jacobian(self.mean), self.sys.jacobian(self.mean, parameters = sys.parameters)))
+
+        # systems can be derived from other systems
+        sys2 = pyReSolver.System(sys, {'sigma': 5.0})
+        self.assertEqual(sys2.parameters['rho'], rho)
+        self.assertEqual(sys2.parameters['sigma'], 5.0)
+        self.assertEqual(sys.parameters['sigma'], defaults['sigma'])
+
+    def test_nl_term(self):
+        for module in [pyReSolver.systems.lorenz, pyReSolver.systems.van_der_pol, pyReSolver.systems.viswanath]:
+            sys = pyReSolver.System(module)
+            x = np.random.rand(10, len(sys.symmetries['z2']))
+            out = np.zeros_like(x)
+            sys.nl_factor(x, out)
+            self.assertTrue(np.allclose(sys.nl_term(x), out))
+
+    def test_threaded(self):
+        freq = (2*np.pi)/rand.uniform(1, 5)
+        options = {'maxiter': 5}
+        results = pyReSolver.minimiseResidualThreaded(self.trajs, freq, self.sys, self.mean, max_workers = 2, flag = 'FFTW_ESTIMATE', options = options)
+
+        # same result as running in sequence and initial trajectories untouched
+        self.assertEqual(len(results), len(self.trajs))
+        for traj, (op_traj, traces, sol) in zip(self.trajs, results):
+            traj_copy = np.copy(traj)
+            op_traj_true, _, sol_true = pyReSolver.minimiseResidual(traj, freq, pyReSolver.System(self.sys), self.mean, flag = 'FFTW_ESTIMATE', options = options)
+            self.assertTrue(np.array_equal(traj, traj_copy))
+            self.assertEqual(op_traj, op_traj_true)
+            self.assertAlmostEqual(sol.fun, sol_true.fun)
+
+    def test_threaded_parameters(self):
+        freq = (2*np.pi)/rand.uniform(1, 5)
+        parameters = [{'rho': rand.uniform(20, 30)} for _ in self.trajs]
+        results = pyReSolver.minimiseResidualThreaded(self.trajs, freq, self.sys, self.mean, parameters = parameters, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+        for traj, params, (_, _, sol) in zip(self.trajs, parameters, results):
+            _, _, sol_true = pyReSolver.minimiseResidual(traj, freq, pyReSolver.System(self.sys, params), self.mean, flag = 'FFTW_ESTIMATE', options = {'maxiter': 5})
+            self.assertAlmostEqual(sol.fun, sol_true.fun)
+
+
+if __name__ == '__main__':
+    unittest.main()
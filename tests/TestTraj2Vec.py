@@ -46,6 +46,80 @@ class TestTraj2Vec(unittest.TestCase):
         # check vec2traj returns correct trajectory
         self.assertEqual(tmp_traj, self.traj)
 
+    def test_interleaved(self):
+        # view shares memory with the trajectory
+        view = t2v.traj_view(self.traj)
+        self.assertTrue(np.shares_memory(view, self.traj))
+        self.assertEqual(view.shape, self.vec.shape)
+        for i in range(self.traj.shape[0] - 1):
+            for j in range(self.traj.shape[1]):
+                self.assertEqual(view[2*(i*self.traj.shape[1] + j)], self.traj[i + 1, j].real)
+                self.assertEqual(view[2*(i*self.traj.shape[1] + j) + 1], self.traj[i + 1, j].imag)
+
+        # conversions are consistent with the view
+        vec = t2v.init_comp_vec(self.traj)
+        t2v.traj2vec_interleaved(self.traj, vec)
+        self.assertTrue(np.array_equal(vec, view))
+        tmp_traj = np.zeros_like(self.traj)
+        t2v.vec2traj_interleaved(tmp_traj, vec)
+        self.assertEqual(tmp_traj, self.traj)
+
+        # converting the view of the trajectory does nothing
+        t2v.vec2traj_interleaved(self.traj, view)
+        t2v.traj2vec_interleaved(self.traj, view)
+        self.assertTrue(np.array_equal(vec, view))
+
+    def test_init_vec_funcs(self):
+        self.assertEqual(t2v.init_vec_funcs('block'), (t2v.traj2vec, t2v.vec2traj))
+        self.assertEqual(t2v.init_vec_funcs('interleaved'), (t2v.traj2vec_interleaved, t2v.vec2traj_interleaved))
+        with self.assertRaises(ValueError):
+            t2v.init_vec_funcs('other')
+
+    def test_masked(self):
+        # random real and imaginary parts are free
+        free = (np.random.rand(*self.traj.shape) > 0.5) + 1j*(np.random.rand(*self.traj.shape) > 0.5)
+        masked_traj = np.zeros_like(self.traj)
+        masked_traj.real[free.real != 0] = self.traj.real[free.real != 0]
+        masked_traj.imag[free.imag != 0] = self.traj.imag[free.imag != 0]
+        for layout in ['block', 'interleaved']:
+            mask = t2v.init_vec_mask(free, layout)
+            self.assertEqual(np.count_nonzero(mask), np.count_nonzero(free[1:].real) + np.count_nonzero(free[1:].imag))
+            to_vec, to_traj = t2v.init_vec_funcs(layout, mask)
+
+            # masked vector holds the free elements in the order of the full vector
+            vec = np.zeros(np.count_nonzero(mask))
+            to_vec(self.traj, vec)
+            full_vec = t2v.init_comp_vec(self.traj)
+            t2v.init_vec_funcs(layout)[0](self.traj, full_vec)
+            self.assertTrue(np.array_equal(vec, full_vec[mask]))
+
+            # all other elements are set to zero
+            traj = pyReSolver.Trajectory(np.random.rand(*self.traj.shape) + 1j*np.random.rand(*self.traj.shape))
+            to_traj(traj, vec)
+            self.assertTrue(np.array_equal(traj[1:], masked_traj[1:]))
+
+        # boolean masks free both parts
+        self.assertTrue(np.all(t2v.init_vec_mask(np.ones(self.traj.shape, dtype = bool))))
+
+    def test_scaled(self):
+        scale = np.random.rand(self.traj.shape[0]) + 0.5
+        traj_copy = np.copy(self.traj)
+        for layout in ['block', 'interleaved']:
+            to_vec, to_traj = t2v.init_vec_funcs(layout, scale = scale)
+
+            # vector holds the scaled down modes, trajectory untouched
+            vec = t2v.init_comp_vec(self.traj)
+            to_vec(self.traj, vec)
+            full_vec = t2v.init_comp_vec(self.traj)
+            t2v.init_vec_funcs(layout)[0](self.traj/scale[:, np.newaxis], full_vec)
+            self.assertTrue(np.allclose(vec, full_vec))
+            self.assertTrue(np.array_equal(self.traj, traj_copy))
+
+            # round trip
+            traj = np.zeros_like(self.traj)
+            to_traj(traj, vec)
+            self.assertTrue(np.allclose(traj[1:], self.traj[1:]))
+
 
 if __name__ == "__main__":
     unittest.main()
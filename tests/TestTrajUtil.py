@@ -46,6 +46,61 @@ class TestTrajUtil(unittest.TestCase):
             s = (2*np.pi)/(2*(self.rand3 - 1))*i
             self.assertTrue(np.allclose(self.array3[i], uc3d(s)))
 
+    def test_func2curve_vectorised(self):
+        def uc_vec(s):
+            return np.stack([np.cos(s), -np.sin(s)], axis = -1)
+        self.assertTrue(np.allclose(pyReSolver.utils.func2curve(uc_vec, modes = self.rand1), self.array1))
+        self.assertTrue(np.allclose(pyReSolver.utils.func2curve(uc_vec, modes = self.rand1, vectorised = True), self.array1))
+
+        # a function of a single location with as many outputs as locations
+        # is only evaluated one location at a time unless told otherwise
+        def square(s):
+            return np.array([[np.cos(s), np.sin(s)], [-np.sin(s), np.cos(s)]])
+        curve = pyReSolver.utils.func2curve(square, modes = 2)
+        self.assertEqual(curve.shape, (2, 2, 2))
+        self.assertTrue(np.allclose(curve[1], square(np.pi)))
+
+        # wrong shape from a function said to be vectorised
+        modes = rand.randint(3, 50)
+        with self.assertRaises(ValueError):
+            pyReSolver.utils.func2curve(uc, modes = modes, vectorised = True)
+
+    def test_curve2Trajectory(self):
+        for array in [self.array1, self.array2, self.array3]:
+            traj = pyReSolver.utils.curve2Trajectory(array)
+            self.assertIsInstance(traj, pyReSolver.Trajectory)
+            self.assertTrue(np.allclose(traj, pyReSolver.utils.rfft(array)))
+
+        # truncation and padding of the modes
+        traj = pyReSolver.utils.curve2Trajectory(self.array2)
+        self.assertTrue(np.allclose(pyReSolver.utils.curve2Trajectory(self.array2, modes = 2), traj[:2]))
+        padded = pyReSolver.utils.curve2Trajectory(self.array2, modes = self.rand2 + 3)
+        self.assertEqual(padded.shape, (self.rand2 + 3, 2))
+        self.assertTrue(np.allclose(padded[:self.rand2], traj))
+        self.assertTrue(np.allclose(padded[self.rand2:], 0))
+
+    def test_recurrenceSeeds(self):
+        sys = pyReSolver.System(pyReSolver.systems.van_der_pol, {'mu': 0.0})
+
+        # harmonic oscillator integrated in a batch
+        series = pyReSolver.utils.integrateSystem(sys, [[1.0, 0.0], [2.0, 0.0]], 0.01, 1000)
+        t = 0.01*np.arange(1000)
+        self.assertEqual(series.shape, (2, 1000, 2))
+        self.assertTrue(np.allclose(series[1, :, 0], 2*np.cos(t)))
+        self.assertTrue(np.allclose(series[1, :, 1], -2*np.sin(t)))
+
+        # best seed is the circle with a period of 2*pi
+        seeds = pyReSolver.utils.recurrenceSeeds(sys, [1.0, 0.0], 0.01, 2000, self.rand1 + 2, 3, 10)
+        traj, period, mean, error = seeds[0]
+        self.assertIsInstance(traj, pyReSolver.Trajectory)
+        self.assertEqual(traj.shape, (self.rand1 + 2, 2))
+        self.assertAlmostEqual(period, 2*np.pi, places = 2)
+        self.assertTrue(np.allclose(mean, 0, atol = 1e-2))
+        self.assertTrue(np.allclose(traj[0], 0))
+        self.assertTrue(np.allclose(np.abs(traj[1]), 0.5, atol = 1e-2))
+        self.assertLess(error, 0.01)
+        self.assertEqual([seed[3] for seed in seeds], sorted(seed[3] for seed in seeds))
+
 
 if __name__ == "__main__":
     unittest.main()
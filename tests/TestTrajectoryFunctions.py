@@ -104,6 +104,30 @@ class TestTrajectoryFunctions(unittest.TestCase):
                     for l in range(traj3.shape[3]):
                         self.assertEqual(traj3[i, j, k, l], np.conj(traj3_conj[i, j, k, l]))
 
+    def test_traj_shift(self):
+        traj = pyReSolver.utils.generateRandomTrajectory(3, rand.randint(2, 20))
+        no_samples = 2*(traj.shape[0] - 1)
+        steps = rand.randint(0, no_samples - 1)
+        shifted = pyReSolver.trajectory_functions.traj_shift(traj, 2*np.pi*steps/no_samples)
+
+        # shifting by a whole number of samples rolls the curve
+        curve = pyReSolver.utils.irfft_even(traj)
+        self.assertTrue(np.allclose(pyReSolver.utils.irfft_even(shifted), np.roll(curve, -steps, axis = 0)))
+        self.assertTrue(np.allclose(np.abs(shifted), np.abs(traj)))
+
+    def test_traj_resize(self):
+        traj = pyReSolver.utils.generateRandomTrajectory(3, rand.randint(5, 20))
+        longer = traj_funcs.traj_resize(traj, traj.shape[0] + 5)
+        shorter = traj_funcs.traj_resize(traj, traj.shape[0] - 3)
+        self.assertIsInstance(longer, pyReSolver.Trajectory)
+        self.assertEqual(longer[:traj.shape[0]], traj)
+        self.assertTrue(np.all(longer[traj.shape[0]:] == 0))
+        self.assertEqual(shorter, traj[:-3])
+
+        # all the energy in the tail of the padded trajectory is zero
+        self.assertEqual(traj_funcs.tail_energy(longer, tail = 5/(longer.shape[0] - 1)), 0)
+        self.assertAlmostEqual(traj_funcs.tail_energy(traj, tail = 1), 1)
+
     def test_traj_grad(self):
         traj1_grad = pyReSolver.Trajectory(np.zeros_like(self.traj1))
         traj2_grad = pyReSolver.Trajectory(np.zeros_like(self.traj2))